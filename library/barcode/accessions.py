@@ -0,0 +1,61 @@
+from django.conf import settings
+from django.db.models import Q
+from django.utils.dateparse import parse_date
+
+
+# Number of Items read per query when the Items of an accession batch are walked
+ACCESSION_PAGE_SIZE = getattr(settings, 'ACCESSION_PAGE_SIZE', 1000)
+
+
+def accession_filter(since, until='', homebranch='', itype='', location=''):
+    """
+        This definition builds a filter matching a batch of accessions, e.g. every BOOK accessioned at a branch
+        since Monday. The dates are compared as a plain range on **dateaccessioned** and the other criteria as
+        equalities, so that the Database can use its indexes on any of them, e.g. on homebranch or itype.
+
+        :param since: *The first day of accession, as YYYY-MM-DD* \n
+        :param until: *The last day of accession, as YYYY-MM-DD, if any* \n
+        :param homebranch: *The home branch of the Items, if any* \n
+        :param itype: *The item type of the Items, if any, e.g. BOOK* \n
+        :param location: *The shelving location of the Items, if any*
+
+        :return: `Q object <https://docs.djangoproject.com/en/2.2/topics/db/queries/#complex-lookups-with-q-objects>`_ - *A filter on the Items, or None if the dates are invalid*
+
+    """
+    try:
+        first = parse_date(since)
+        last = parse_date(until) if until else None
+    except ValueError:
+        return None
+    if first is None or (until and last is None) or (last and last < first):
+        return None
+
+    query = Q(dateaccessioned__range=(first, last)) if last else Q(dateaccessioned__gte=first)
+    if homebranch:
+        query &= Q(homebranch=homebranch)
+    if itype:
+        query &= Q(itype=itype)
+    if location:
+        query &= Q(location=location)
+    return query
+
+
+def accession_pages(queryset, size=None):
+    """
+        This definition reads Items in the order they were catalogued, page by page. Every page starts right
+        after the last itemnumber of the previous one, so a large batch is read with a bounded amount of memory.
+
+        :param queryset: *A queryset of the Items returned by items.get_items(), e.g. filtered by accession_filter()* \n
+        :param size: *Number of Items per page, defaults to ACCESSION_PAGE_SIZE*
+
+        :return: *A generator of lists of Items*
+
+    """
+    queryset = queryset.order_by('itemnumber')
+    size = size or ACCESSION_PAGE_SIZE
+    page = list(queryset[:size])
+    while page:
+        yield page
+        if len(page) < size:
+            break
+        page = list(queryset.filter(itemnumber__gt=page[-1].itemnumber)[:size])
@@ -0,0 +1,138 @@
+from django.db.models import F, Func, Value
+from django.db import connections, router
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+import xml.etree.ElementTree as ET
+from .metrics import timed
+from .models import BiblioMetadata
+from .ranges import batched, BARCODE_BATCH_SIZE
+import io
+
+
+# Namespace of the MARCXML records stored in biblio_metadata.metadata
+MARC_NAMESPACE = "{http://www.loc.gov/MARC21/slim}"
+
+# XPath of the Added Entry Personal Name understood by the ExtractValue() function of MySQL: the first subfield
+# of the first 700 field whose first subfield is a non-empty $a, as read by marc_author()
+MARC_AUTHOR_XPATH = '//datafield[@tag="700"][subfield[1][@code="a"][text()]][1]/subfield[1]'
+
+# Name of the author extractor to use, either 'python' or 'sql'
+AUTHOR_EXTRACTOR = getattr(settings, 'AUTHOR_EXTRACTOR', 'python')
+
+
+def marc_author(metadata):
+    """
+        This definition reads the Added Entry Personal Name (tag 700, subfield a) from a MARCXML record. The
+        record is streamed with `iterparse` and the parsing stops at the first match instead of building the
+        whole document tree.
+
+        :param metadata: *A MARCXML document from the Koha table biblio_metadata*
+
+        :return: *The $a of the first 700 field whose first subfield is a non-empty $a, if any. Otherwise None*
+
+    """
+    if not metadata:
+        return None
+
+    field, first = None, False
+    for event, elem in ET.iterparse(io.BytesIO(metadata.encode('utf-8')), events=('start', 'end')):
+        if event == 'start':
+            if elem.tag == MARC_NAMESPACE + "datafield":
+                field, first = elem.attrib.get('tag'), True
+            continue
+
+        if elem.tag == MARC_NAMESPACE + "subfield":
+            # Only the first subfield of a 700 field is considered
+            if field == '700' and first and elem.attrib.get('code') == "a" and elem.text:
+                return elem.text
+            first = False
+        elif elem.tag == MARC_NAMESPACE + "datafield":
+            field = None
+
+        elem.clear()
+
+    return None
+
+
+def python_authors(biblionumbers):
+    """
+        This definition fetches the MARC records of the given Biblios in batches and extracts their authors
+        in Python.
+
+        :param biblionumbers: *An iterable of biblionumbers*
+
+        :return: *A dictionary mapping every biblionumber to its author or None*
+
+    """
+    authors = dict()
+    for batch in batched(biblionumbers, BARCODE_BATCH_SIZE):
+        metadata = dict()
+        records = BiblioMetadata.objects.filter(biblionumber__in=batch).order_by('-id').values_list('biblionumber', 'metadata')
+        for biblionumber, record in records.iterator():
+            # The records are read in descending order, so the first record of every Biblio is kept
+            metadata[biblionumber] = record
+
+        for biblionumber in batch:
+            authors[biblionumber] = marc_author(metadata.get(biblionumber))
+
+    return authors
+
+
+def sql_authors(biblionumbers):
+    """
+        This definition extracts the authors of the given Biblios in batches with the ExtractValue() function of
+        MySQL, so only the 700$a values travel from the Koha Database rather than the whole MARC records. It
+        falls back to :func:`python_authors` on other databases.
+
+        :param biblionumbers: *An iterable of biblionumbers*
+
+        :return: *A dictionary mapping every biblionumber to its author or None*
+
+    """
+    if connections[router.db_for_read(BiblioMetadata)].vendor != 'mysql':
+        return python_authors(biblionumbers)
+
+    authors = dict()
+    extract = Func(F('metadata'), Value(MARC_AUTHOR_XPATH), function='ExtractValue')
+    for batch in batched(biblionumbers, BARCODE_BATCH_SIZE):
+        records = BiblioMetadata.objects.filter(biblionumber__in=batch).order_by('-id').annotate(author=extract).values_list('biblionumber', 'author')
+        for biblionumber, author in records:
+            authors[biblionumber] = author or None
+
+    return authors
+
+
+# Available author extractors by name, see AUTHOR_EXTRACTOR
+AUTHOR_EXTRACTORS = {
+    'python': python_authors,
+    'sql': sql_authors,
+}
+
+# A misspelt extractor fails when the Barcode App is loaded rather than on every search
+if AUTHOR_EXTRACTOR not in AUTHOR_EXTRACTORS:
+    raise ImproperlyConfigured("AUTHOR_EXTRACTOR must be one of %s, not %r"
+                               % (', '.join(sorted(AUTHOR_EXTRACTORS)), AUTHOR_EXTRACTOR))
+
+
+def load_authors(items):
+    """
+        This definition fills in the missing authors of a list of Items from their MARC records. The authors of
+        every Biblio without an author are extracted in batches by the extractor named in AUTHOR_EXTRACTOR, so
+        the number of round trips does not grow with the size of the list.
+
+        :param items: *A list of LabelItem, see items.get_items(), or of Items preferably fetched with select_related('biblionumber')*
+
+        :return: *The same list of Items*
+
+    """
+    missing = {item.biblionumber_id for item in items if not item.biblionumber.author}
+    if not missing:
+        return items
+
+    with timed('marc'):
+        authors = AUTHOR_EXTRACTORS[AUTHOR_EXTRACTOR](missing)
+    for item in items:
+        if not item.biblionumber.author:
+            item.biblionumber.author = authors.get(item.biblionumber_id)
+
+    return items
@@ -0,0 +1,17 @@
+from django.db.backends.mysql import base
+from barcode.backends.pool import PooledDatabaseWrapperMixin
+
+
+class DatabaseWrapper(PooledDatabaseWrapperMixin, base.DatabaseWrapper):
+    """
+        A class representing the MySQL backend of Django with a pool of connections, see backends.pool. It is
+        enabled for the **Koha Database** with the ENGINE 'barcode.backends.mysql'.
+    """
+
+    def ping(self, connection):
+        # The MySQL protocol checks a connection without running any query
+        try:
+            connection.ping()
+            return True
+        except Exception:
+            return False
@@ -0,0 +1,178 @@
+from collections import deque
+from django.db.utils import OperationalError
+import threading, time
+
+
+# Defaults of the POOL options of a Database using a pooled engine
+POOL_DEFAULTS = {
+    'SIZE': 10,             # Maximum number of connections opened at once by a process
+    'MAX_LIFETIME': 3600,   # Seconds after which a connection is closed rather than reused
+    'TIMEOUT': 10,          # Seconds a request waits for a free connection when SIZE connections are in use
+    'PING_AFTER': 30,       # Seconds a connection may stay idle before it is checked again before reuse
+}
+
+_pools = dict()
+_pools_lock = threading.Lock()
+
+
+class ConnectionPool:
+    """
+        A class representing a pool of connections to a Database shared by every thread of a process. At most
+        SIZE connections are open at once, the idle ones are reused latest first, checked after PING_AFTER
+        seconds of idleness and closed once older than MAX_LIFETIME.
+    """
+
+    def __init__(self, alias, options):
+        self.alias = alias
+        self.size = options['SIZE']
+        self.max_lifetime = options['MAX_LIFETIME']
+        self.timeout = options['TIMEOUT']
+        self.ping_after = options['PING_AFTER']
+        self.idle = deque()
+        self.slots = threading.BoundedSemaphore(self.size)
+        self.lock = threading.Lock()
+
+    def acquire(self, connect, ping):
+        """
+            This definition takes a connection from the pool, or opens a new one if none is idle.
+
+            :param connect: *A function opening a new connection* \n
+            :param ping: *A function checking that a connection still works*
+
+            :return: *A tuple (connection, created, reused) of the connection, the time it was opened at and
+                     whether it was taken from the pool*
+
+            :raises OperationalError: *If no connection is freed within TIMEOUT seconds*
+
+        """
+        if not self.slots.acquire(timeout=self.timeout):
+            raise OperationalError("All the %d connections of the pool of '%s' are in use" % (self.size, self.alias))
+
+        try:
+            while True:
+                with self.lock:
+                    entry = self.idle.pop() if self.idle else None
+                if entry is None:
+                    return connect(), time.monotonic(), False
+
+                connection, created, released = entry
+                now = time.monotonic()
+                if now - created < self.max_lifetime and (now - released < self.ping_after or ping(connection)):
+                    return connection, created, True
+                self.discard(connection)
+        except BaseException:
+            self.slots.release()
+            raise
+
+    def release(self, connection, created, reusable=True):
+        """
+            This definition gives a connection back to the pool, or closes it if it cannot be reused.
+
+            :param connection: *The connection* \n
+            :param created: *The time the connection was opened at* \n
+            :param reusable: *Whether the connection is in a clean state*
+
+        """
+        try:
+            if reusable and time.monotonic() - created < self.max_lifetime:
+                with self.lock:
+                    self.idle.append((connection, created, time.monotonic()))
+            else:
+                self.discard(connection)
+        finally:
+            self.slots.release()
+
+    def discard(self, connection):
+        """
+            This definition closes a connection that leaves the pool, ignoring the errors of a broken connection.
+
+            :param connection: *The connection*
+
+        """
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+    def clear(self):
+        """
+            This definition closes every idle connection of the pool.
+        """
+        with self.lock:
+            idle, self.idle = self.idle, deque()
+        for connection, created, released in idle:
+            self.discard(connection)
+
+
+def get_pool(alias, settings_dict):
+    """
+        This definition returns the pool of connections of a Database, created on its first use.
+
+        :param alias: *The alias of the Database* \n
+        :param settings_dict: *The settings of the Database, with its POOL options*
+
+        :return: *A ConnectionPool*
+
+    """
+    with _pools_lock:
+        if alias not in _pools:
+            options = dict(POOL_DEFAULTS, **(settings_dict.get('POOL') or {}))
+            _pools[alias] = ConnectionPool(alias, options)
+        return _pools[alias]
+
+
+class PooledDatabaseWrapperMixin:
+    """
+        A class adding a pool of connections to a Django database backend. Closing a connection, e.g. at the end
+        of a request, gives it back to the pool, and the next request of any thread of the process reuses it
+        instead of opening a new connection. The connection state is only initialized for new connections.
+    """
+    pool_created = None
+    pool_reused = False
+    pool_connecting = False
+
+    def ping(self, connection):
+        """
+            This definition checks that an idle connection still works.
+
+            :param connection: *A connection of the database driver*
+
+            :return: *A boolean value indicating whether the connection can be reused*
+
+        """
+        try:
+            cursor = connection.cursor()
+            cursor.execute('SELECT 1')
+            cursor.close()
+            return True
+        except Exception:
+            return False
+
+    def connect(self):
+        self.pool_connecting = True
+        try:
+            super().connect()
+        finally:
+            self.pool_connecting = False
+
+    def get_new_connection(self, conn_params):
+        pool = get_pool(self.alias, self.settings_dict)
+        connection, self.pool_created, self.pool_reused = pool.acquire(
+            lambda: super(PooledDatabaseWrapperMixin, self).get_new_connection(conn_params), self.ping)
+        return connection
+
+    def _set_autocommit(self, autocommit):
+        # The pooled connections are only given back in autocommit mode, so only the call made by connect() on a
+        # reused connection is redundant
+        if not (self.pool_connecting and self.pool_reused and autocommit):
+            super()._set_autocommit(autocommit)
+
+    def init_connection_state(self):
+        if not self.pool_reused:
+            super().init_connection_state()
+
+    def _close(self):
+        if self.connection is not None:
+            # A connection left in a transaction or after an unrecoverable error is closed, not reused
+            reusable = not self.in_atomic_block and not self.errors_occurred and self.get_autocommit()
+            get_pool(self.alias, self.settings_dict).release(self.connection, self.pool_created, reusable)
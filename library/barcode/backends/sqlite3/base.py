@@ -0,0 +1,10 @@
+from django.db.backends.sqlite3 import base
+from barcode.backends.pool import PooledDatabaseWrapperMixin
+
+
+class DatabaseWrapper(PooledDatabaseWrapperMixin, base.DatabaseWrapper):
+    """
+        A class representing the SQLite backend of Django with a pool of connections, see backends.pool. It is
+        meant for a local stand-in of the **Koha Database**, e.g. to benchmark the pool. Django never closes
+        the connections to an in-memory Database, so they are never pooled.
+    """
@@ -0,0 +1,83 @@
+from django.db.models import Q
+from django.utils import timezone
+from .models import BasketItem
+from .ranges import batched, BARCODE_BATCH_SIZE
+
+
+def add_to_basket(user, items, added=None):
+    """
+        This definition appends Items to the print basket of a user. The Items already in the basket are skipped
+        by the database itself, so a search only costs one insert per batch of Items.
+
+        :param user: *The user owning the basket* \n
+        :param items: *An iterable of Items or ItemMirror* \n
+        :param added: *The time the Items are added at, defaults to now*
+
+        :return: *The number of Items in the basket*
+
+    """
+    # The Items of a search share the time they were added at and keep their order within the search
+    now = added or timezone.now()
+    for batch in batched(items, BARCODE_BATCH_SIZE):
+        entries = [BasketItem(user=user, itemnumber=item.itemnumber, barcode=item.barcode, added=now) for item in batch]
+        BasketItem.objects.bulk_create(entries, ignore_conflicts=True)
+
+    return BasketItem.objects.filter(user=user).count()
+
+
+def remove_from_basket(user, barcodes=None):
+    """
+        This definition removes barcodes from the print basket of a user.
+
+        :param user: *The user owning the basket* \n
+        :param barcodes: *An iterable of barcodes, or None to empty the basket*
+
+        :return: *The number of Items in the basket*
+
+    """
+    basket = BasketItem.objects.filter(user=user)
+    if barcodes is None:
+        basket.delete()
+    else:
+        for batch in batched(barcodes, BARCODE_BATCH_SIZE):
+            basket.filter(barcode__in=batch).delete()
+
+    return basket.count()
+
+
+def basket_barcodes(user):
+    """
+        This definition lists the barcodes of the print basket of a user, the latest searches first.
+
+        :param user: *The user owning the basket*
+
+        :return: *A generator of barcodes*
+
+    """
+    return basket_items(user).values_list('barcode', flat=True).iterator()
+
+
+def basket_items(user):
+    """
+        This definition returns the print basket of a user, the latest searches first.
+
+        :param user: *The user owning the basket*
+
+        :return: *A queryset of BasketItem*
+
+    """
+    return BasketItem.objects.filter(user=user).order_by('-added', 'id')
+
+
+def after_basket(added, id):
+    """
+        This definition builds a filter matching the entries of a basket listed after a given entry, i.e. added
+        before it, ties on the time they were added at being broken by their id.
+
+        :param added: *The time the entry was added at* \n
+        :param id: *The id of the entry*
+
+        :return: `Q object <https://docs.djangoproject.com/en/2.2/topics/db/queries/#complex-lookups-with-q-objects>`_ - *A filter on the added and id fields*
+
+    """
+    return Q(added__lt=added) | Q(added=added, id__gt=id)
@@ -0,0 +1,109 @@
+from django.utils import timezone
+from django.conf import settings
+from .authors import load_authors
+from .callnumbers import parse_callnumber
+from .models import LabelRecord
+from .ranges import batched, BARCODE_BATCH_SIZE
+
+
+# Maximum number of labels kept in the cache, the least recently used ones are evicted first. 0 disables the cache.
+LABEL_CACHE_SIZE = getattr(settings, 'LABEL_CACHE_SIZE', 100000)
+
+# Counters of the label cache since the start of the process
+LABEL_CACHE_STATS = {'hits': 0, 'misses': 0, 'evictions': 0}
+
+
+def build_label(item):
+    """
+        This definition resolves the label of an Item whose Biblio author has already been loaded.
+
+        :param item: *An Items or LabelItem object*
+
+        :return: *An unsaved LabelRecord object*
+
+    """
+    callnumber = parse_callnumber(item.itemcallnumber)
+    return LabelRecord(itemnumber=item.itemnumber,
+                       barcode=item.barcode,
+                       title=item.biblionumber.title,
+                       author=item.biblionumber.get_author(),
+                       callnumber=callnumber.callnumber,
+                       author_mark=callnumber.author_mark,
+                       item_timestamp=item.timestamp,
+                       biblio_timestamp=item.biblionumber.timestamp)
+
+
+def evict_labels():
+    """
+        This definition deletes the least recently used labels once the cache holds more than LABEL_CACHE_SIZE labels.
+
+        :return: *The number of evicted labels*
+
+    """
+    excess = LabelRecord.objects.count() - LABEL_CACHE_SIZE
+    if excess <= 0:
+        return 0
+
+    stale = list(LabelRecord.objects.order_by('last_used').values_list('id', flat=True)[:excess])
+    for batch in batched(stale, BARCODE_BATCH_SIZE):
+        LabelRecord.objects.filter(id__in=batch).delete()
+
+    LABEL_CACHE_STATS['evictions'] += len(stale)
+    return len(stale)
+
+
+def load_labels(items):
+    """
+        This definition attaches the resolved label to every Item of a list as *item.label*. The labels are read
+        from the cache when neither the Item nor its Biblio changed in Koha since they were cached. Otherwise,
+        the authors are loaded from the MARC records and the fresh labels are written back to the cache.
+
+        :param items: *A list of LabelItem, see items.get_items(), or of Items preferably fetched with select_related('biblionumber')*
+
+        :return: *The same list of Items*
+
+    """
+    if LABEL_CACHE_SIZE <= 0:
+        for item in load_authors(items):
+            item.label = build_label(item)
+        return items
+
+    cached = dict()
+    for batch in batched([item.itemnumber for item in items], BARCODE_BATCH_SIZE):
+        cached.update(LabelRecord.objects.in_bulk(batch, field_name='itemnumber'))
+
+    hits, misses = [], []
+    for item in items:
+        label = cached.get(item.itemnumber)
+        if label and label.is_fresh(item):
+            item.label = label
+            hits.append(label.id)
+        else:
+            misses.append(item)
+
+    LABEL_CACHE_STATS['hits'] += len(hits)
+    LABEL_CACHE_STATS['misses'] += len(misses)
+
+    now = timezone.now()
+    for batch in batched(hits, BARCODE_BATCH_SIZE):
+        LabelRecord.objects.filter(id__in=batch).update(last_used=now)
+
+    if misses:
+        load_authors(misses)
+        labels = dict()
+        for item in misses:
+            item.label = build_label(item)
+            item.label.last_used = now
+            labels[item.itemnumber] = item.label
+
+        # Stale labels are replaced rather than updated one by one
+        stale = [itemnumber for itemnumber in labels if itemnumber in cached]
+        for batch in batched(stale, BARCODE_BATCH_SIZE):
+            LabelRecord.objects.filter(itemnumber__in=batch).delete()
+
+        # Another thread, e.g. of a print job or of a lookup, may have cached the same labels meanwhile
+        LabelRecord.objects.bulk_create(labels.values(), ignore_conflicts=True)
+
+        evict_labels()
+
+    return items
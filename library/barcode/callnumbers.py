@@ -0,0 +1,107 @@
+from django.conf import settings
+from functools import lru_cache
+import re
+
+
+# Matches the last run of letters of a call number, at most its last 3 letters, and whatever follows it,
+# e.g. 'ROW' in '823.914ROW' or 'ERS2' in '823PETERS2'. [^\W\d] - not of (non-alphabetic or numeric characters)
+AUTHOR_MARK_REGEX = re.compile(r"[^\W\d]{1,3}[\W\d]*\Z")
+
+# Letters starting the author mark of a call number made of several words, e.g. 'ROW' in '823.914 ROW'
+AUTHOR_MARK_LETTERS = frozenset('abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ')
+
+# Separators of the tokens of a call number in its sort key, see callnumber_sort_key()
+SORT_TOKEN_REGEX = re.compile(r"\.|\s+")
+
+# Leading letters of a call number, set apart from the class number in its sort key, e.g. 'FIC' in 'FIC823'
+SORT_PREFIX_REGEX = re.compile(r"^([^\W\d_]+)")
+
+# Maximum number of parsed call numbers kept in memory, call numbers repeat heavily within a shelf
+CALLNUMBER_CACHE_SIZE = getattr(settings, 'CALLNUMBER_CACHE_SIZE', 10000)
+
+
+class CallNumber:
+    """
+        A class representing a call number split into the parts printed on the spine labels.
+
+            callnumber - *The class part of the call number, e.g. 823.914*
+            author_mark - *The author mark of the call number, e.g. ROW*
+    """
+    __slots__ = ('callnumber', 'author_mark')
+
+    def __init__(self, callnumber='', author_mark=''):
+        self.callnumber = callnumber
+        self.author_mark = author_mark
+
+    def __eq__(self, other):
+        return (isinstance(other, CallNumber) and self.callnumber == other.callnumber
+                and self.author_mark == other.author_mark)
+
+    def __repr__(self):
+        return 'CallNumber(%r, %r)' % (self.callnumber, self.author_mark)
+
+
+# The parts of a missing call number
+EMPTY_CALLNUMBER = CallNumber()
+
+
+@lru_cache(maxsize=CALLNUMBER_CACHE_SIZE)
+def parse_callnumber(itemcallnumber):
+    """
+        This definition splits an itemcallnumber into its class part and its author mark in a single pass.
+
+            A call number of a single word is split before the last 3 letters of its last run of letters,
+            e.g. 823.914ROWLING into 823.914ROWL and ING. Without any letter, it is all class part.
+
+            A call number of several words is split before its last word if this word starts with a letter,
+            e.g. 823.914 ROW into 823.914 and ROW. Otherwise, it is all class part.
+
+        The parsed call numbers are cached, so the result must not be modified.
+
+        :param itemcallnumber: *The itemcallnumber of an Item, may be None*
+
+        :return: *A CallNumber object*
+
+    """
+    if not itemcallnumber:
+        return EMPTY_CALLNUMBER
+
+    words = itemcallnumber.split()
+    if len(words) == 1:
+        match = AUTHOR_MARK_REGEX.search(itemcallnumber)
+        if match:
+            return CallNumber(itemcallnumber[:match.start()], itemcallnumber[match.start():])
+        return CallNumber(words[0])
+
+    if not words:
+        return EMPTY_CALLNUMBER
+
+    if words[-1][0] in AUTHOR_MARK_LETTERS:
+        return CallNumber(' '.join(words[:-1]), words[-1])
+    return CallNumber(' '.join(words))
+
+
+def callnumber_sort_key(callnumber):
+    """
+        This definition normalizes a call number the way Koha fills in the **cn_sort** column of the Items with its
+        default Dewey routine (C4::ClassSortRoutine::Dewey), so that the call numbers typed by a user can be
+        compared with those of the Items, e.g. 823.914 ROW becomes 823_914000000000000_ROW.
+
+        :param callnumber: *A call number, may be None*
+
+        :return: *The sort key of the call number, blank for a missing call number*
+
+    """
+    key = SORT_PREFIX_REGEX.sub(r"\1 ", (callnumber or '').strip().upper().replace('/', ''))
+    tokens = SORT_TOKEN_REGEX.split(key)
+    while tokens and not tokens[-1]:
+        tokens.pop()
+
+    # The decimals of the class number are padded, and a class number without any decimal gets blank ones
+    groups = [index for index, token in enumerate(tokens) if token.isdecimal()]
+    if len(groups) > 1:
+        tokens[groups[1]] = tokens[groups[1]][:15].ljust(15, '0')
+    elif groups:
+        tokens[groups[0]] += '_000000000000000'
+
+    return ''.join(char for char in '_'.join(tokens) if char.isalnum() or char == '_')
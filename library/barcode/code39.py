@@ -0,0 +1,132 @@
+from django.conf import settings
+from functools import lru_cache
+
+
+# Code 39 patterns of every character as the widths of its 5 bars and 4 spaces, n - narrow and w - wide
+CODE39_PATTERNS = {
+    '0': 'nnnwwnwnn', '1': 'wnnwnnnnw', '2': 'nnwwnnnnw', '3': 'wnwwnnnnn', '4': 'nnnwwnnnw', '5': 'wnnwwnnnn',
+    '6': 'nnwwwnnnn', '7': 'nnnwnnwnw', '8': 'wnnwnnwnn', '9': 'nnwwnnwnn', 'A': 'wnnnnwnnw', 'B': 'nnwnnwnnw',
+    'C': 'wnwnnwnnn', 'D': 'nnnnwwnnw', 'E': 'wnnnwwnnn', 'F': 'nnwnwwnnn', 'G': 'nnnnnwwnw', 'H': 'wnnnnwwnn',
+    'I': 'nnwnnwwnn', 'J': 'nnnnwwwnn', 'K': 'wnnnnnnww', 'L': 'nnwnnnnww', 'M': 'wnwnnnnwn', 'N': 'nnnnwnnww',
+    'O': 'wnnnwnnwn', 'P': 'nnwnwnnwn', 'Q': 'nnnnnnwww', 'R': 'wnnnnnwwn', 'S': 'nnwnnnwwn', 'T': 'nnnnwnwwn',
+    'U': 'wwnnnnnnw', 'V': 'nwwnnnnnw', 'W': 'wwwnnnnnn', 'X': 'nwnnwnnnw', 'Y': 'wwnnwnnnn', 'Z': 'nwwnwnnnn',
+    '-': 'nwnnnnwnw', '.': 'wwnnnnwnn', ' ': 'nwwnnnwnn', '$': 'nwnwnwnnn', '/': 'nwnwnnnwn', '+': 'nwnnnwnwn',
+    '%': 'nnnwnwnwn', '*': 'nwnnwnwnn',
+}
+
+# Width of a wide element in modules, i.e. in narrow elements. JsBarcode uses the same ratio.
+CODE39_WIDE = 3
+
+# Width of the quiet zone on each side of the bars in modules
+CODE39_QUIET = 5
+
+# Maximum number of rendered barcodes kept in memory by every renderer
+CODE39_CACHE_SIZE = getattr(settings, 'BARCODE_CACHE_SIZE', 4096)
+
+
+def character_bars(pattern):
+    """
+        This definition converts the pattern of a character into its bars.
+
+        :param pattern: *A pattern from CODE39_PATTERNS*
+
+        :return: *A tuple (bars, modules) where bars is a tuple of (start, width) of every bar in modules and
+                 modules is the width of the character*
+
+    """
+    bars = []
+    position = 0
+    for index, element in enumerate(pattern):
+        width = CODE39_WIDE if element == 'w' else 1
+        if index % 2 == 0:
+            bars.append((position, width))
+        position += width
+    return tuple(bars), position
+
+
+# Bars of every character, computed once
+CODE39_BARS = {char: character_bars(pattern) for char, pattern in CODE39_PATTERNS.items()}
+
+
+@lru_cache(maxsize=CODE39_CACHE_SIZE)
+def code39_bars(value):
+    """
+        This definition encodes a value in Code 39 with its start and stop characters (*).
+
+        :param value: *The value to encode, lower case letters are encoded in upper case*
+
+        :return: *A tuple (bars, modules) where bars is a tuple of (start, width) of every bar in modules and
+                 modules is the total width of the symbol without its quiet zones*
+
+        :raises ValueError: *If the value holds a character that cannot be encoded in Code 39*
+
+    """
+    value = value.upper()
+    for char in value:
+        if char not in CODE39_PATTERNS or char == '*':
+            raise ValueError("Character %r cannot be encoded in Code 39" % char)
+
+    bars = []
+    position = 0
+    for char in '*' + value + '*':
+        char_bars, modules = CODE39_BARS[char]
+        bars.extend((position + start, width) for start, width in char_bars)
+
+        # Narrow gap between two characters
+        position += modules + 1
+
+    return tuple(bars), position - 1
+
+
+def code39_layout(value, width, height):
+    """
+        This definition lays the bars of a Code 39 symbol out in a box whose lower left corner is the origin,
+        quiet zones included, the way JsBarcode draws them on its canvas.
+
+        :param value: *The value to encode* \n
+        :param width: *The width of the box* \n
+        :param height: *The height of the box*
+
+        :return: *A generator of (x, y, width, height) of every bar*
+
+    """
+    bars, modules = code39_bars(value)
+    module = width / float(modules + 2 * CODE39_QUIET)
+    for start, size in bars:
+        yield (CODE39_QUIET + start) * module, 0, size * module, height
+
+
+@lru_cache(maxsize=CODE39_CACHE_SIZE)
+def code39_path(value, width, height):
+    """
+        This definition renders a Code 39 symbol as a PDF path filled in black. The path is drawn at the origin,
+        so the same rendering is placed anywhere on a page by translating it, see pdf.render_page(). Rendered
+        symbols are cached by value and size, so reprinting the same Items costs no encoding at all.
+
+        :param value: *The value to encode* \n
+        :param width: *The width of the symbol, quiet zones included* \n
+        :param height: *The height of the symbol*
+
+        :return: *The path operators as bytes*
+
+    """
+    rects = [b'%.2f %.2f %.2f %.2f re' % bar for bar in code39_layout(value, width, height)]
+    return b'\n'.join(rects) + b' f'
+
+
+@lru_cache(maxsize=CODE39_CACHE_SIZE)
+def code39_svg(value, width, height):
+    """
+        This definition renders a Code 39 symbol as an SVG document. Rendered symbols are cached by value and size.
+
+        :param value: *The value to encode* \n
+        :param width: *The width of the symbol, quiet zones included* \n
+        :param height: *The height of the symbol*
+
+        :return: *The SVG document as a string*
+
+    """
+    # SVG measures from the top of the image, which is the same for bars spanning the whole height
+    rects = ''.join('<rect x="%.2f" y="%.2f" width="%.2f" height="%.2f"/>' % bar for bar in code39_layout(value, width, height))
+    return ('<svg xmlns="http://www.w3.org/2000/svg" width="%s" height="%s" viewBox="0 0 %s %s">'
+            '<g fill="#000">%s</g></svg>' % (width, height, width, height, rects))
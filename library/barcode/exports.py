@@ -0,0 +1,185 @@
+from xml.sax.saxutils import escape
+from .authors import load_authors
+from .cache import build_label
+from .items import LabelItem
+import csv, io, re, zipfile
+
+
+# Columns of the exported Items: the attribute of their label and its heading, as in the Table
+EXPORT_COLUMNS = (
+    ('barcode', 'Barcode'),
+    ('title', 'Title'),
+    ('author', 'Author'),
+    ('callnumber', 'Call Number'),
+    ('author_mark', 'Author Mark'),
+)
+
+# Characters not allowed in the XML of a worksheet
+XML_INVALID_REGEX = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+# Parts of a workbook of a single worksheet, written before the rows of the worksheet
+XLSX_PARTS = (
+    ('[Content_Types].xml',
+     '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+     '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+     '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+     '<Default Extension="xml" ContentType="application/xml"/>'
+     '<Override PartName="/xl/workbook.xml" '
+     'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+     '<Override PartName="/xl/worksheets/sheet1.xml" '
+     'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+     '<Override PartName="/xl/styles.xml" '
+     'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+     '</Types>'),
+    ('_rels/.rels',
+     '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+     '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+     '<Relationship Id="rId1" Target="xl/workbook.xml" '
+     'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument"/>'
+     '</Relationships>'),
+    ('xl/workbook.xml',
+     '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+     '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+     'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+     '<sheets><sheet name="Items" sheetId="1" r:id="rId1"/></sheets></workbook>'),
+    ('xl/_rels/workbook.xml.rels',
+     '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+     '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+     '<Relationship Id="rId1" Target="worksheets/sheet1.xml" '
+     'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet"/>'
+     '<Relationship Id="rId2" Target="styles.xml" '
+     'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles"/>'
+     '</Relationships>'),
+    ('xl/styles.xml',
+     '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+     '<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+     '<fonts count="1"><font><sz val="11"/><name val="Calibri"/></font></fonts>'
+     '<fills count="1"><fill><patternFill patternType="none"/></fill></fills>'
+     '<borders count="1"><border/></borders>'
+     '<cellStyleXfs count="1"><xf/></cellStyleXfs>'
+     '<cellXfs count="1"><xf xfId="0"/></cellXfs>'
+     '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+     '</styleSheet>'),
+)
+
+
+def export_labels(page):
+    """
+        This definition resolves the labels of a page of Items to export. The call number and the author mark are
+        split by the same helpers as for printing and the missing authors are read from the MARC records, without
+        going through the label cache so that a large export does not evict the labels being printed.
+
+        :param page: *A list of objects from the queryset returned by items.get_items()*
+
+        :return: *A list of labels*
+
+    """
+    if page and isinstance(page[0], LabelItem):
+        return [build_label(item) for item in load_authors(page)]
+    return [item.label for item in page]
+
+
+def export_csv(pages):
+    """
+        This definition writes Items as a CSV document, page by page, so that memory does not grow with the
+        number of Items. It starts with a byte order mark so that spreadsheets read it as UTF-8.
+
+        :param pages: *An iterable of lists of Items, e.g. shelves.shelf_pages()*
+
+        :return: *A generator of the bytes of the CSV document*
+
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([heading for attribute, heading in EXPORT_COLUMNS])
+    yield ('\ufeff' + buffer.getvalue()).encode('utf-8')
+
+    for page in pages:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows([getattr(label, attribute) or '' for attribute, heading in EXPORT_COLUMNS]
+                         for label in export_labels(page))
+        yield buffer.getvalue().encode('utf-8')
+
+
+class ZipBuffer:
+    """
+        A class representing the output of a zip archive written without seeking, whose bytes are taken out
+        as soon as they are written, see export_xlsx().
+    """
+
+    def __init__(self):
+        self.chunks = []
+        self.position = 0
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        pass
+
+    def take(self):
+        """
+            This definition takes out the bytes written so far.
+
+            :return: *The bytes*
+
+        """
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def xlsx_row(values):
+    """
+        This definition writes a row of a worksheet, with its values as inline strings.
+
+        :param values: *A list of values*
+
+        :return: *The XML of the row*
+
+    """
+    cells = ''.join('<c t="inlineStr"><is><t xml:space="preserve">%s</t></is></c>'
+                    % escape(XML_INVALID_REGEX.sub('', str(value or ''))) for value in values)
+    return '<row>%s</row>' % cells
+
+
+def export_xlsx(pages):
+    """
+        This definition writes Items as an XLSX workbook of a single worksheet, page by page. The archive is
+        written without seeking back, the sizes of its files following their data, so its bytes are yielded as
+        soon as every page is compressed and memory does not grow with the number of Items.
+
+        :param pages: *An iterable of lists of Items, e.g. shelves.shelf_pages()*
+
+        :return: *A generator of the bytes of the XLSX workbook*
+
+    """
+    output = ZipBuffer()
+    with zipfile.ZipFile(output, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for name, content in XLSX_PARTS:
+            archive.writestr(name, content)
+        yield output.take()
+
+        with archive.open('xl/worksheets/sheet1.xml', 'w') as sheet:
+            sheet.write(b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+                        b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>')
+            sheet.write(xlsx_row([heading for attribute, heading in EXPORT_COLUMNS]).encode('utf-8'))
+            for page in pages:
+                sheet.write(''.join(xlsx_row([getattr(label, attribute) for attribute, heading in EXPORT_COLUMNS])
+                                    for label in export_labels(page)).encode('utf-8'))
+                yield output.take()
+            sheet.write(b'</sheetData></worksheet>')
+    yield output.take()
+
+
+# Formats of the exports: their writer and content type
+EXPORT_FORMATS = {
+    'csv': (export_csv, 'text/csv; charset=utf-8'),
+    'xlsx': (export_xlsx, 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'),
+}
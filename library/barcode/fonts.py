@@ -0,0 +1,54 @@
+from django.conf import settings
+from functools import lru_cache
+import base64, hashlib, json, os
+
+
+# Fonts that may be served to pdfMake, as paths relative to the first folder of STATICFILES_DIRS
+LABEL_FONTS = getattr(settings, 'LABEL_FONTS', (
+    'fonts/Roboto-Regular.ttf',
+    'fonts/Roboto-Bold.ttf',
+    'fonts/Roboto-Italics.ttf',
+    'fonts/Roboto-BoldItalics.ttf',
+))
+
+
+@lru_cache(maxsize=None)
+def encoded_font(fileName):
+    """
+        This definition reads a font file and encodes it to a Base64 string. Every font is read and encoded
+        only once, on its first use, and then kept in memory.
+
+        :param fileName: *The path of the font, one of LABEL_FONTS*
+
+        :return: *The Base64 encoded font*
+
+        :raises KeyError: *If the font is not one of LABEL_FONTS*
+        :raises OSError: *If the font file cannot be read*
+
+    """
+    if fileName not in LABEL_FONTS:
+        raise KeyError(fileName)
+
+    with open(os.path.join(settings.STATICFILES_DIRS[0], fileName), 'rb') as file:
+        return base64.b64encode(file.read()).decode('ascii')
+
+
+@lru_cache(maxsize=None)
+def font_bundle():
+    """
+        This definition bundles every available font of LABEL_FONTS in a single JSON document, keyed by the
+        names under which pdfMake looks them up in its virtual file system. The fonts that cannot be read are
+        left out, so pdfMake falls back to its own fonts.
+
+        :return: *A tuple (content, etag) of the JSON document and its ETag*
+
+    """
+    fonts = dict()
+    for fileName in LABEL_FONTS:
+        try:
+            fonts[os.path.basename(fileName)] = encoded_font(fileName)
+        except OSError:
+            continue
+
+    content = json.dumps(fonts)
+    return content, hashlib.sha1(content.encode('ascii')).hexdigest()
@@ -0,0 +1,79 @@
+from codecs import iterdecode
+from django.conf import settings
+from django.utils import timezone
+from .basket import add_to_basket
+from .ranges import BARCODE_BATCH_SIZE, barcode_list, batched, folds_case
+import re
+
+
+# Separators of the cells of a CSV line, the barcode being the first cell
+CELL_REGEX = re.compile(r"[,;\t]")
+
+# Matches the first cell of a header line of a CSV file, e.g. Barcode or item_barcode
+HEADER_REGEX = re.compile(r"^(item[ _]?)?barcodes?$", re.IGNORECASE)
+
+# Maximum number of unmatched barcodes listed back after an import, the others are only counted
+IMPORT_REPORT_SIZE = getattr(settings, 'IMPORT_REPORT_SIZE', 1000)
+
+
+def read_barcodes(file):
+    """
+        This definition reads the barcodes of a text or CSV file line by line, e.g. the dump of a handheld
+        scanner, without loading the whole file. The barcode is the first cell of every line, blank lines and a
+        header line, see HEADER_REGEX, are skipped.
+
+        :param file: *An uploaded file, or any iterable of lines as bytes*
+
+        :return: *A generator of barcodes*
+
+    """
+    first = True
+    for line in iterdecode(file, 'utf-8-sig', errors='replace'):
+        barcode = CELL_REGEX.split(line, 1)[0].strip().strip('"').strip()
+        if not barcode:
+            continue
+        if first:
+            first = False
+            if HEADER_REGEX.match(barcode):
+                continue
+        yield barcode
+
+
+def import_barcodes(user, queryset, barcodes, batch_size=None):
+    """
+        This definition appends the Items of a list of arbitrary barcodes to the print basket of a user. The
+        barcodes are resolved in batches of *batch_size* with one `barcode IN (...)` query each, so memory
+        is bounded by the size of a batch however long the list is.
+
+        :param user: *The user owning the basket* \n
+        :param queryset: *A queryset of the printable Items, see items.get_items()* \n
+        :param barcodes: *An iterable of barcodes, see read_barcodes()* \n
+        :param batch_size: *Number of barcodes per query, defaults to BARCODE_BATCH_SIZE*
+
+        :return: *A dictionary with the number of barcodes read, of Items found and of barcodes unmatched, and
+                 the first IMPORT_REPORT_SIZE unmatched barcodes*
+
+    """
+    report = {'read': 0, 'found': 0, 'unmatched': 0, 'unmatched_barcodes': []}
+
+    # The basket only needs the itemnumber and barcode of the Items, their Biblios are left in Koha
+    queryset = queryset.values_list('itemnumber', 'barcode', named=True)
+
+    # A barcode typed in another case than in Koha is only found where the Database compares them case-insensitively
+    fold = str.upper if folds_case(queryset) else str
+
+    # The Items of the file share the time they were added at and keep their order in the basket
+    added = timezone.now()
+    for batch in batched(barcodes, batch_size or BARCODE_BATCH_SIZE):
+        data = barcode_list(queryset, batch, len(batch))
+        add_to_basket(user, data, added)
+
+        found = {fold(item.barcode) for item in data}
+        unmatched = [barcode for barcode in batch if fold(barcode) not in found]
+
+        report['read'] += len(batch)
+        report['found'] += len(data)
+        report['unmatched'] += len(unmatched)
+        report['unmatched_barcodes'].extend(unmatched[:IMPORT_REPORT_SIZE - len(report['unmatched_barcodes'])])
+
+    return report
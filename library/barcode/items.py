@@ -0,0 +1,130 @@
+from django.conf import settings
+from django.db.models.query import QuerySet, ValuesListIterable
+from .cache import load_labels
+from .models import Biblio, Items, ItemMirror
+
+
+# Columns of the items and biblio tables a label is resolved from, in the order of LabelItem and LabelBiblio
+LABEL_FIELDS = ('itemnumber', 'barcode', 'itemcallnumber', 'cn_sort', 'timestamp', 'biblionumber',
+                'biblionumber__title', 'biblionumber__author', 'biblionumber__timestamp')
+
+
+class LabelBiblio:
+    """
+        A class representing the columns of a Koha Biblio a label needs, see LabelItem.
+    """
+    __slots__ = ('title', 'author', 'timestamp')
+
+    def __init__(self, title, author, timestamp):
+        self.title = title
+        self.author = author
+        self.timestamp = timestamp
+
+    get_author = Biblio.get_author
+
+
+class LabelItem:
+    """
+        A class representing the columns of a Koha Item a label needs, read with its Biblio in a single query
+        instead of the whole rows of both tables. It stands in for an Items object with its Biblio fetched along:
+        the label cache, the author loaders and the basket use the same attributes.
+
+            biblionumber - *A LabelBiblio, its biblionumber being biblionumber_id*
+            label - *The resolved label, see get_labels()*
+    """
+    __slots__ = ('itemnumber', 'barcode', 'itemcallnumber', 'cn_sort', 'timestamp', 'biblionumber_id', 'biblionumber',
+                 'label')
+
+    def __init__(self, itemnumber, barcode, itemcallnumber, cn_sort, timestamp, biblionumber, title, author,
+                 biblio_timestamp):
+        self.itemnumber = itemnumber
+        self.barcode = barcode
+        self.itemcallnumber = itemcallnumber
+        self.cn_sort = cn_sort
+        self.timestamp = timestamp
+        self.biblionumber_id = biblionumber
+        self.biblionumber = LabelBiblio(title, author, biblio_timestamp)
+
+
+class LabelItemIterable(ValuesListIterable):
+    """
+        A class iterating over a queryset of LABEL_FIELDS as LabelItem objects, see LabelItemQuerySet.
+    """
+
+    def __iter__(self):
+        for row in super().__iter__():
+            yield LabelItem(*row)
+
+
+class LabelItemQuerySet(QuerySet):
+    """
+        A class representing a queryset of Items read as LabelItem objects. It can still be filtered, ordered,
+        counted and sliced like any queryset, its clones reading LabelItem objects too, and values() or
+        values_list() read plain values from it.
+
+        .. note:: Django has no public way to change the objects a queryset yields. The iterable class is only
+                  set here, and copied by Django to the clones of the queryset.
+    """
+
+    def __init__(self, model=None, query=None, using=None, hints=None):
+        super().__init__(model, query, using, hints)
+        self._iterable_class = LabelItemIterable
+
+
+def label_items(queryset):
+    """
+        This definition turns a queryset of Items into a queryset of LabelItem objects, selecting only the
+        LABEL_FIELDS. The Database is chosen by the router when the queryset is read.
+
+        :param queryset: *A queryset of Items*
+
+        :return: *A LabelItemQuerySet*
+
+    """
+    labels = LabelItemQuerySet(queryset.model)
+    labels.query = queryset.values_list(*LABEL_FIELDS).query
+    return labels
+
+
+def get_items():
+    """
+        This definition returns the printable Items, i.e. those not withdrawn, from the local mirror of Koha
+        (see the sync_items command) if KOHA_MIRROR is enabled, else from the **Koha Database**. Only the columns
+        of the Items and of their Biblios a label needs are read, see LabelItem.
+
+        :return: *A queryset of LabelItem or ItemMirror*
+
+    """
+    if getattr(settings, 'KOHA_MIRROR', False):
+        return ItemMirror.objects.filter(withdrawn=0)
+    return label_items(Items.objects.filter(withdrawn=0))
+
+
+def count_items(query):
+    """
+        This definition counts the printable Items matching a filter before they are read. Only the items table
+        is counted, without the join to the Biblios of get_items().
+
+        :param query: *A filter on the Items, e.g. a Q object*
+
+        :return: *The number of Items*
+
+    """
+    if getattr(settings, 'KOHA_MIRROR', False):
+        return ItemMirror.objects.filter(withdrawn=0).filter(query).count()
+    return Items.objects.filter(withdrawn=0).filter(query).count()
+
+
+def get_labels(data):
+    """
+        This definition attaches the label of every Item as *item.label*, from the label cache or else from Koha
+        and the MARC records. The mirrored Items already hold their labels.
+
+        :param data: *A list of objects from the queryset returned by get_items()*
+
+        :return: *The same list*
+
+    """
+    if data and isinstance(data[0], (Items, LabelItem)):
+        load_labels(data)
+    return data
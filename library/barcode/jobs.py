@@ -0,0 +1,248 @@
+from collections import deque, namedtuple
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from django.conf import settings
+from django.db import connections
+from django.utils import timezone
+from datetime import timedelta
+from .items import get_items, get_labels
+from .labels import LABEL_HEIGHT, LABEL_WIDTH, pair_labels, pdf_page
+from .models import PrintJob
+from .pdf import compress_page, write_pdf
+from .printers import print_labels
+from .ranges import BARCODE_BATCH_SIZE, barcode_list, batched
+from .sheets import LABEL_SHEETS, pack_labels, sheet_capacity
+import django, os, re, threading
+
+
+# Folder where the print jobs leave their rendered labels
+PRINT_JOB_DIRECTORY = getattr(settings, 'PRINT_JOB_DIRECTORY', os.path.join(settings.BASE_DIR, 'print_jobs'))
+
+# Number of processes rendering the labels of a print job in parallel, 0 renders them in the job thread itself
+PRINT_JOB_PROCESSES = getattr(settings, 'PRINT_JOB_PROCESSES', os.cpu_count() or 1)
+
+# Number of print jobs run at once by the web server, 0 leaves the queued jobs to the command run_print_jobs
+PRINT_JOB_THREADS = getattr(settings, 'PRINT_JOB_THREADS', 1)
+
+# Number of labels from which the whole print basket is printed by a print job instead of a request
+PRINT_JOB_THRESHOLD = getattr(settings, 'PRINT_JOB_THRESHOLD', 5000)
+
+# Seconds the print jobs and their labels are kept once finished
+PRINT_JOB_EXPIRY = getattr(settings, 'PRINT_JOB_EXPIRY', 7 * 24 * 3600)
+
+# Matches the files of the print jobs in PRINT_JOB_DIRECTORY, e.g. job-12.pdf or job-12.zpl.part
+JOB_FILE_REGEX = re.compile(r"job-[0-9]+\.[a-z]+(\.part)?$")
+
+# Number of barcodes resolved and rendered at once
+PRINT_JOB_CHUNK_SIZE = BARCODE_BATCH_SIZE
+
+# A label as sent to the rendering processes, which do not use the Databases
+Label = namedtuple('Label', ('barcode', 'title', 'author', 'callnumber', 'author_mark'))
+
+_executors = dict()
+_executors_lock = threading.Lock()
+
+
+def executor(kind):
+    """
+        This definition returns the pool of the web server running the print jobs ('threads') or rendering their
+        labels ('processes'). The pools are created on their first use and shared by every request.
+
+        :param kind: *Either threads or processes*
+
+        :return: *A ThreadPoolExecutor or a ProcessPoolExecutor*
+
+    """
+    with _executors_lock:
+        if kind not in _executors:
+            if kind == 'threads':
+                _executors[kind] = ThreadPoolExecutor(PRINT_JOB_THREADS)
+            else:
+                # The processes set Django up themselves when they are spawned rather than forked
+                _executors[kind] = ProcessPoolExecutor(PRINT_JOB_PROCESSES, initializer=django.setup)
+        return _executors[kind]
+
+
+def submit_job(user, barcodes, layout, output, sheet=''):
+    """
+        This definition queues a print job. It is run by the threads of the web server if PRINT_JOB_THREADS is
+        set, else by the command run_print_jobs.
+
+        :param user: *The user requesting the labels* \n
+        :param barcodes: *An iterable of barcodes* \n
+        :param layout: *The type of label, one of labels.LABEL_LAYOUTS* \n
+        :param output: *The format of the labels: pdf or one of printers.PRINTER_LANGUAGES* \n
+        :param sheet: *The sheet the labels are packed on, one of sheets.LABEL_SHEETS, or blank for label rolls*
+
+        :return: *The PrintJob created*
+
+    """
+    barcodes = [barcode for barcode in barcodes if barcode]
+    job = PrintJob.objects.create(user=user, layout=layout, output=output, sheet=sheet,
+                                  barcodes='\n'.join(barcodes), total=len(barcodes))
+    if PRINT_JOB_THREADS:
+        executor('threads').submit(run_job, job.pk)
+    return job
+
+
+def resolve_chunks(job):
+    """
+        This definition resolves the labels of a print job chunk by chunk. The labels left at the end of a chunk
+        without filling their page, a pair of labels or a sheet, are carried over to the next chunk so that the
+        labels are laid out the same way as when printed at once.
+
+        :param job: *The PrintJob*
+
+        :return: *A generator of tuples (count, labels) of the number of barcodes processed and their Labels*
+
+    """
+    page = sheet_capacity(job.sheet, job.layout) if job.sheet else 2
+    pending = []
+    barcodes = job.barcodes.split('\n') if job.barcodes else []
+    for chunk in batched(barcodes, PRINT_JOB_CHUNK_SIZE):
+        data = get_labels(barcode_list(get_items(), chunk))
+        pending.extend(Label(item.label.barcode, item.label.title, item.label.author, item.label.callnumber,
+                             item.label.author_mark) for item in data)
+        full = len(pending) - len(pending) % page
+        yield len(chunk), pending[:full]
+        pending = pending[full:]
+    if pending:
+        yield 0, pending
+
+
+def render_chunk(labels, layout, output, sheet=''):
+    """
+        This definition renders a chunk of labels. It is run by the rendering processes.
+
+        :param labels: *A list of Labels* \n
+        :param layout: *The type of label, one of labels.LABEL_LAYOUTS* \n
+        :param output: *The format of the labels: pdf or one of printers.PRINTER_LANGUAGES* \n
+        :param sheet: *The sheet the labels are packed on, one of sheets.LABEL_SHEETS, or blank for label rolls*
+
+        :return: *A list of the compressed content streams of the pages for a PDF, else a list of the printer
+                 commands encoded in UTF-8*
+
+    """
+    if sheet:
+        return [compress_page(pdf_page(ops)) for ops in pack_labels(labels, layout, sheet)]
+    if output == 'pdf':
+        return [compress_page(pdf_page(ops)) for ops in pair_labels(labels, layout)]
+    return [''.join(print_labels(labels, layout, output)).encode('utf-8')]
+
+
+def render_chunks(job):
+    """
+        This definition renders the labels of a print job, its chunks in parallel across PRINT_JOB_PROCESSES
+        processes, and records its progress. Only a few chunks are resolved ahead of the rendering, so memory
+        does not grow with the size of the job.
+
+        :param job: *The PrintJob*
+
+        :return: *A generator of the rendered pages, in order, see render_chunk()*
+
+    """
+    window = deque()
+
+    def collect():
+        count, result = window.popleft()
+        result = result.result() if PRINT_JOB_PROCESSES else result
+        job.done += count
+        PrintJob.objects.filter(pk=job.pk).update(done=job.done)
+        return result
+
+    for count, labels in resolve_chunks(job):
+        if PRINT_JOB_PROCESSES:
+            future = executor('processes').submit(render_chunk, labels, job.layout, job.output, job.sheet)
+            window.append((count, future))
+        else:
+            window.append((count, render_chunk(labels, job.layout, job.output, job.sheet)))
+        if len(window) > 2 * max(1, PRINT_JOB_PROCESSES):
+            yield from collect()
+    while window:
+        yield from collect()
+
+
+def run_job(pk):
+    """
+        This definition runs a queued print job and leaves its labels on disk. A job already taken by another
+        thread or process is left alone, and the failures are recorded in the job.
+
+        :param pk: *The id of the PrintJob*
+
+        :return: *A boolean value indicating whether the job was run*
+
+    """
+    try:
+        if not PrintJob.objects.filter(pk=pk, status=PrintJob.QUEUED).update(status=PrintJob.RUNNING):
+            return False
+
+        # Any failure of a job taken, even before its labels are rendered, is recorded rather than leaving it running
+        path = None
+        try:
+            job = PrintJob.objects.get(pk=pk)
+            os.makedirs(PRINT_JOB_DIRECTORY, exist_ok=True)
+            artifact = 'job-%d.%s' % (job.pk, job.output)
+            path = os.path.join(PRINT_JOB_DIRECTORY, artifact)
+
+            pages = render_chunks(job)
+            if job.sheet:
+                pages = write_pdf(pages, *LABEL_SHEETS[job.sheet]['page'])
+            elif job.output == 'pdf':
+                pages = write_pdf(pages, LABEL_WIDTH, LABEL_HEIGHT)
+
+            # The labels are written aside first, so that a job is never downloaded half written
+            with open(path + '.part', 'wb') as file:
+                file.writelines(pages)
+            os.replace(path + '.part', path)
+        except Exception as error:
+            PrintJob.objects.filter(pk=pk).update(status=PrintJob.FAILED, error=repr(error), finished=timezone.now())
+            if path and os.path.exists(path + '.part'):
+                os.remove(path + '.part')
+        else:
+            PrintJob.objects.filter(pk=pk).update(status=PrintJob.DONE, done=job.total, artifact=artifact,
+                                                  finished=timezone.now())
+
+        expire_jobs()
+        return True
+    finally:
+        # The threads of the pool outlive the job, so they give their connections back
+        connections.close_all()
+
+
+def expire_jobs():
+    """
+        This definition deletes the print jobs finished more than PRINT_JOB_EXPIRY seconds ago, and the files
+        left in PRINT_JOB_DIRECTORY for that long, e.g. their labels or those of a job whose worker was stopped.
+
+        :return: *A tuple of the numbers of jobs and of files deleted*
+
+    """
+    cutoff = timezone.now() - timedelta(seconds=PRINT_JOB_EXPIRY)
+    jobs, _ = PrintJob.objects.filter(status__in=(PrintJob.DONE, PrintJob.FAILED), finished__lt=cutoff).delete()
+
+    files = 0
+    try:
+        names = os.listdir(PRINT_JOB_DIRECTORY)
+    except FileNotFoundError:
+        names = []
+    for name in names:
+        path = os.path.join(PRINT_JOB_DIRECTORY, name)
+        try:
+            if JOB_FILE_REGEX.match(name) and os.path.getmtime(path) < cutoff.timestamp():
+                os.remove(path)
+                files += 1
+        except FileNotFoundError:
+            # Another worker deleted it meanwhile
+            pass
+    return jobs, files
+
+
+def job_path(job):
+    """
+        This definition returns the path of the labels rendered by a print job.
+
+        :param job: *A PrintJob that is done*
+
+        :return: *The absolute path of the labels*
+
+    """
+    return os.path.join(PRINT_JOB_DIRECTORY, job.artifact)
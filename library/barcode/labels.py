@@ -0,0 +1,238 @@
+from .code39 import code39_path
+from .pdf import stream_pdf, text_width
+
+
+# Size of a label page (3.9" x 0.71") and its margins [left, top, right, bottom] in points, as printed by pdfMake
+LABEL_WIDTH = 3.897633858 * 72
+LABEL_HEIGHT = 0.708661 * 72
+LABEL_MARGINS = (3, 2, 2, 1)
+
+# Height of a line of text relative to its font size and position of its baseline below the top of the line
+LINE_HEIGHT = 1.17
+BASELINE = 0.93
+
+
+def format_text(text):
+    """
+        This definition formats a title or an author for a label. A text in upper case is capitalized word by word.
+
+        :param text: *The text to format*
+
+        :return: *The formatted text, or an empty string if the text is blank*
+
+    """
+    if not text or not text.strip():
+        return ''
+
+    if text == text.upper():
+        text = ' '.join(word[:1].upper() + word[1:].lower() for word in text.split(' '))
+
+    return text
+
+
+def fit_text(text, width, size, bold=False):
+    """
+        This definition truncates a text so that it fits in the given width.
+
+        :param text: *The text to fit* \n
+        :param width: *The available width in points* \n
+        :param size: *The font size in points* \n
+        :param bold: *Whether the text is set in bold*
+
+        :return: *The longest prefix of the text that fits in the width*
+
+    """
+    while text and text_width(text, size, bold) > width:
+        text = text[:-1]
+    return text
+
+
+def wrap_text(text, width, size, bold=False):
+    """
+        This definition breaks a text into lines at its spaces so that every line fits in the given width.
+        A word longer than the width is kept on its own line.
+
+        :param text: *The text to wrap* \n
+        :param width: *The available width in points* \n
+        :param size: *The font size in points* \n
+        :param bold: *Whether the text is set in bold*
+
+        :return: *A list of lines*
+
+    """
+    lines = []
+    for word in text.split():
+        if lines and text_width(lines[-1] + ' ' + word, size, bold) <= width:
+            lines[-1] += ' ' + word
+        else:
+            lines.append(word)
+    return lines or ['']
+
+
+def centered(lines, left, width, top, size, bold=False):
+    """
+        This definition centers lines of text horizontally in a cell, the first line starting at the top of the cell.
+
+        :param lines: *A list of lines* \n
+        :param left: *The left edge of the cell* \n
+        :param width: *The width of the cell* \n
+        :param top: *The top edge of the first line* \n
+        :param size: *The font size in points* \n
+        :param bold: *Whether the text is set in bold*
+
+        :return: *A tuple (ops, bottom) of the drawing operations and the bottom edge of the last line*
+
+    """
+    ops = []
+    for line in lines:
+        if line:
+            x = left + (width - text_width(line, size, bold)) / 2.0
+            ops.append(('text', x, top - size * BASELINE, size, bold, line))
+        top -= size * LINE_HEIGHT
+    return ops, top
+
+
+def barcode_page(labels):
+    """
+        This definition lays out a page of barcode labels: a pair of labels side by side, each with its barcode
+        number and author, its Code 39 barcode and the beginning of its title.
+
+        :param labels: *A list of one or two labels*
+
+        :return: *A list of drawing operations, see pdf.render_page(), and ('barcode', x, y, width, height, value)
+                 operations for the Code 39 barcodes*
+
+    """
+    left, top, right, bottom = LABEL_MARGINS
+    width = LABEL_WIDTH - left - right
+    top = LABEL_HEIGHT - top
+    ops = []
+
+    # Row 1: barcode number (20%) and author (30%) of every label, cells are padded by 4pt on their left
+    for index, label in enumerate(labels):
+        x = left + index * 0.5 * width + 4
+        shift = 10 if index else 0
+        ops.extend(centered([label.barcode], x + shift, 0.2 * width - 4 - shift, top, 12, True)[0])
+        author = fit_text(format_text(label.author), 0.3 * width - 4, 8)
+        ops.extend(centered([author], x + 0.2 * width, 0.3 * width - 4, top - 2, 8)[0])
+    top -= 12 * LINE_HEIGHT
+
+    # Row 2: the barcodes, 100pt x 20pt, in cells of 53% and 47%
+    for index, label in enumerate(labels):
+        x = left + (0.53 * width if index else 0) + 4 + 12
+        ops.append(('barcode', x, top - 2 - 20, 100, 20, label.barcode))
+    top -= 2 + 20 + 2
+
+    # Row 3: the beginning of the titles
+    for index, label in enumerate(labels):
+        title = format_text((label.title or '')[:30 if index else 32])
+        x = left + index * 0.5 * width + 4 + (3 if index else 0)
+        ops.extend(centered([fit_text(title, 0.5 * width - 8, 8)], x, 0.5 * width - 8, top - 2, 8)[0])
+
+    return ops
+
+
+def spine_page(labels):
+    """
+        This definition lays out a page of spine labels: a pair of labels side by side, each with its call number,
+        author mark and barcode number. A call number of 22 characters or more may span two lines, so the rest
+        of the pair is then moved up.
+
+        :param labels: *A list of one or two labels*
+
+        :return: *A list of drawing operations, see pdf.render_page()*
+
+    """
+    left, top, right, bottom = LABEL_MARGINS
+    width = LABEL_WIDTH - left - right
+    top = LABEL_HEIGHT - top
+    margins = ((8, 8), (19, 3))
+    ops = []
+
+    lowest = top
+    for index, label in enumerate(labels):
+        x = left + index * 0.5 * width + margins[index][0]
+        cell_width = 0.5 * width - sum(margins[index])
+        lines = wrap_text(label.callnumber, cell_width, 12, True)
+        cell, bottom = centered(lines, x, cell_width, top, 12, True)
+        ops.extend(cell)
+        lowest = min(lowest, bottom)
+
+    space = 0 if any(len(label.callnumber) >= 22 for label in labels) else 5
+    for row in ('author_mark', 'barcode'):
+        lowest -= space
+        for index, label in enumerate(labels):
+            shift = 16 if index else 0
+            text = getattr(label, row)
+            text = format_text(text) if row == 'author_mark' else text
+            ops.extend(centered([text], left + index * 0.5 * width + shift, 0.5 * width - shift, lowest, 12, True)[0])
+        lowest -= 12 * LINE_HEIGHT
+
+    return ops
+
+
+# Layouts of the label pages by the type of print requested from the Table
+LABEL_LAYOUTS = {
+    'barcode_data': barcode_page,
+    'spine_data': spine_page,
+}
+
+
+def pair_labels(labels, layout):
+    """
+        This definition lays out labels two by two, the way they are printed side by side on the label rolls.
+
+        :param labels: *An iterable of labels, i.e. objects with barcode, title, author, callnumber and
+                       author_mark attributes such as LabelRecord* \n
+        :param layout: *The type of label, one of LABEL_LAYOUTS*
+
+        :return: *A generator of the drawing operations of every page*
+
+    """
+    page = LABEL_LAYOUTS[layout]
+    pair = []
+    for label in labels:
+        pair.append(label)
+        if len(pair) == 2:
+            yield page(pair)
+            pair = []
+    if pair:
+        yield page(pair)
+
+
+def pdf_page(ops):
+    """
+        This definition replaces the barcode operations of a page by the cached PDF paths of the barcodes. The
+        barcodes whose characters have no Code 39 pattern are left out, their number is still printed.
+
+        :param ops: *The drawing operations of a page*
+
+        :return: *The drawing operations understood by pdf.render_page()*
+
+    """
+    result = []
+    for op in ops:
+        if op[0] == 'barcode':
+            x, y, width, height, value = op[1:]
+            try:
+                result.append(('path', x, y, code39_path(value, width, height)))
+            except ValueError:
+                pass
+        else:
+            result.append(op)
+    return result
+
+
+def render_labels(labels, layout):
+    """
+        This definition renders labels as a PDF document of 3.9" x 0.71" pages, two labels per page.
+
+        :param labels: *An iterable of labels, i.e. objects with barcode, title, author, callnumber and
+                       author_mark attributes such as LabelRecord* \n
+        :param layout: *The type of label, one of LABEL_LAYOUTS*
+
+        :return: *A generator of the bytes of the PDF document*
+
+    """
+    pages = (pdf_page(ops) for ops in pair_labels(labels, layout))
+    return stream_pdf(pages, LABEL_WIDTH, LABEL_HEIGHT)
@@ -0,0 +1,179 @@
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.db import close_old_connections
+from .items import get_labels
+from .metrics import current_metrics, measured
+from .ranges import BARCODE_BATCH_SIZE, SUFFIX_REGEX, barcode_list, batched, range_filter, sort_range
+import threading
+
+
+# Number of chunks of Items looked up in the Koha Database at once by the threads of the web server, shared by
+# every request. 0 looks the chunks up one after the other in the request thread.
+KOHA_LOOKUP_THREADS = getattr(settings, 'KOHA_LOOKUP_THREADS', 4)
+
+# Number of barcodes looked up per chunk, or of Items read per page of a range
+KOHA_LOOKUP_CHUNK_SIZE = getattr(settings, 'KOHA_LOOKUP_CHUNK_SIZE', BARCODE_BATCH_SIZE)
+
+# Maximum number of chunks of a lookup, the chunks of larger lookups are made larger
+KOHA_LOOKUP_MAX_CHUNKS = getattr(settings, 'KOHA_LOOKUP_MAX_CHUNKS', 100)
+
+# Number of chunks of a single request looked up at once, so that a large range does not hold every thread
+KOHA_LOOKUP_REQUEST_THREADS = getattr(settings, 'KOHA_LOOKUP_REQUEST_THREADS', KOHA_LOOKUP_THREADS)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def lookup_executor():
+    """
+        This definition returns the pool of threads looking up chunks of Items, created on its first use and
+        shared by every request. Its size bounds the number of concurrent lookups a process sends to the Koha
+        Database and its replicas.
+
+        :return: *A ThreadPoolExecutor*
+
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(KOHA_LOOKUP_THREADS, thread_name_prefix='koha-lookup')
+        return _executor
+
+
+def lookup_chunk(metrics, lookup, chunk):
+    """
+        This definition looks up a chunk of Items in a thread of the pool. Its connections are handled as those
+        of a request, kept up to CONN_MAX_AGE, and its queries are measured with those of the request.
+
+        :param metrics: *The RequestMetrics of the request, or None* \n
+        :param lookup: *A function of the chunk returning a list of Items* \n
+        :param chunk: *The chunk, e.g. a list of barcodes*
+
+        :return: *The list of Items*
+
+    """
+    close_old_connections()
+    try:
+        with measured(metrics):
+            return lookup(chunk)
+    finally:
+        close_old_connections()
+
+
+def lookup_chunks(lookup, chunks):
+    """
+        This definition looks up chunks of Items concurrently in the threads of lookup_executor(), at most
+        KOHA_LOOKUP_REQUEST_THREADS at once, and merges their Items in the order of the chunks.
+
+        :param lookup: *A function of a chunk returning a list of Items, run in the threads* \n
+        :param chunks: *An iterable of chunks*
+
+        :return: *A list of Items*
+
+    """
+    items = []
+    if KOHA_LOOKUP_THREADS <= 0:
+        for chunk in chunks:
+            items.extend(lookup(chunk))
+        return items
+
+    metrics = current_metrics()
+    window = deque()
+    for chunk in chunks:
+        window.append(lookup_executor().submit(lookup_chunk, metrics, lookup, chunk))
+        if len(window) >= max(1, KOHA_LOOKUP_REQUEST_THREADS):
+            items.extend(window.popleft().result())
+    while window:
+        items.extend(window.popleft().result())
+    return items
+
+
+def lookup_chunk_size(count):
+    """
+        This definition returns the size of the chunks a lookup of *count* barcodes is split into: at least
+        KOHA_LOOKUP_CHUNK_SIZE, and larger for large lookups so that they make at most KOHA_LOOKUP_MAX_CHUNKS chunks.
+
+        :param count: *The number of barcodes, or of numbers of a range*
+
+        :return: *The number of barcodes per chunk*
+
+    """
+    return max(KOHA_LOOKUP_CHUNK_SIZE, -(-count // max(1, KOHA_LOOKUP_MAX_CHUNKS)))
+
+
+def lookup_barcodes(queryset, barcodes, labels=False):
+    """
+        This definition resolves a list of barcodes in chunks looked up concurrently, see lookup_chunk_size(). With
+        their labels, the authors are extracted from the MARC records in the same threads.
+
+        :param queryset: *A queryset of the Items returned by items.get_items()* \n
+        :param barcodes: *An iterable of barcodes* \n
+        :param labels: *Whether to attach the labels of the Items, see items.get_labels()*
+
+        :return: *A list of matching Items in the order of the given barcodes*
+
+    """
+    # The barcodes are deduplicated first and queried as typed, see ranges.barcode_list()
+    position = dict.fromkeys(barcodes)
+
+    def lookup(chunk):
+        items = barcode_list(queryset, chunk)
+        return get_labels(items) if labels else items
+
+    # Backends comparing barcodes case-insensitively may find the same Item in two chunks, e.g. for lib1 and LIB1
+    items, found = [], set()
+    for item in lookup_chunks(lookup, batched(position, lookup_chunk_size(len(position)))):
+        if item.itemnumber not in found:
+            found.add(item.itemnumber)
+            items.append(item)
+    return items
+
+
+def range_pages(queryset, size):
+    """
+        This definition reads the Items of a range page by page in the order of their barcodes. Every page starts
+        right after the last barcode of the previous one, so the number of queries follows the Items found and
+        not the width of the range, e.g. a single query for a sparse range of millions of numbers.
+
+        :param queryset: *A queryset of Items filtered by ranges.range_filter()* \n
+        :param size: *Number of Items per page*
+
+        :return: *A generator of lists of Items*
+
+    """
+    queryset = queryset.order_by('barcode')
+    page = list(queryset[:size])
+    while page:
+        yield page
+        if len(page) < size:
+            break
+        page = list(queryset.filter(barcode__gt=page[-1].barcode)[:size])
+
+
+def lookup_range(queryset, start, end, labels=False):
+    """
+        This definition resolves a range of barcodes with the indexed filter of ranges.range_filter(), read page
+        by page in the request thread, see range_pages(). With their labels, every page is handed to the threads
+        as soon as it is read, so the authors of a page are extracted from the MARC records while the next page
+        is read. The pages hold lookup_chunk_size() Items for the width of the range.
+
+        :param queryset: *A queryset of the Items returned by items.get_items()* \n
+        :param start: *The first barcode of the range* \n
+        :param end: *The last barcode of the range* \n
+        :param labels: *Whether to attach the labels of the Items, see items.get_labels()*
+
+        :return: *A list of matching Items in the order of the range, or None if the range is invalid*
+
+    """
+    query = range_filter(start, end)
+    if query is None:
+        return None
+
+    width = int(SUFFIX_REGEX.search(end).group()) - int(SUFFIX_REGEX.search(start).group()) + 1
+    pages = range_pages(queryset.filter(query), lookup_chunk_size(max(0, width)))
+    if labels:
+        items = lookup_chunks(get_labels, pages)
+    else:
+        items = [item for page in pages for item in page]
+    return sort_range(items)
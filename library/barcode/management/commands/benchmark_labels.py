@@ -0,0 +1,278 @@
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test.utils import override_settings
+from django.utils import timezone
+from barcode.authors import AUTHOR_EXTRACTOR, AUTHOR_EXTRACTORS
+from barcode.cache import LABEL_CACHE_SIZE
+from barcode.callnumbers import parse_callnumber
+from barcode.items import get_items, get_labels
+from barcode.labels import render_labels
+from barcode.lookups import lookup_range
+from barcode.metrics import percentiles
+from barcode.models import Items, LabelRecord
+from barcode.printers import print_labels
+from barcode.ranges import alphanumeric_range, numeric_range_filter
+from barcode.router import replicas
+from barcode.sheets import render_sheets
+from barcode.synthetic import ALPHANUMERIC_PREFIX, create_koha_tables, drop_koha_tables, koha_tables, seed_koha
+import django, json, os, platform, random, shutil, tempfile, time, tracemalloc
+
+
+class Command(BaseCommand):
+    """
+        This class benchmarks the lookups and the rendering of the labels against a synthetic Koha Database. The
+        Koha tables are created from the unmanaged models and seeded with the given volumes of Items, Biblios and
+        MARC records, in a local SQLite file or in an empty schema of a configured Database, e.g. a MySQL stand-in.
+        The default Database, i.e. the label cache, is replaced by a local SQLite file for the run.
+
+            python manage.py benchmark_labels [--items N] [--biblios N] [--marc-ratio R] [--seed N]
+                                              [--repeats N] [--range N] [--koha ALIAS] [--directory DIR]
+                                              [--output FILE] [--compare FILE]
+
+        The percentiles of every benchmark, in milliseconds, are saved as JSON so that runs can be compared, with
+        the bytes read and the memory taken by every row of a range, read as Items or as LabelItem.
+
+    """
+    help = "Benchmarks the label lookups and rendering against a synthetic Koha Database."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--items', type=int, default=10000, help="Number of synthetic Items.")
+        parser.add_argument('--biblios', type=int, help="Number of synthetic Biblios, half the Items by default.")
+        parser.add_argument('--marc-ratio', type=float, default=0.5,
+                            help="Share of the Biblios whose author is only found in their MARC record.")
+        parser.add_argument('--seed', type=int, default=0, help="Seed of the synthetic data and of the lookups.")
+        parser.add_argument('--repeats', type=int, default=20, help="Number of runs of every benchmark.")
+        parser.add_argument('--range', type=int, default=1000, help="Number of barcodes of the ranges looked up.")
+        parser.add_argument('--koha', help="Alias of an empty Database to create the Koha tables in, instead of "
+                                           "a local SQLite file. The tables are dropped after the run.")
+        parser.add_argument('--directory', help="Folder of the SQLite files, kept after the run. A temporary "
+                                                "folder by default.")
+        parser.add_argument('--output', help="File the results are saved to as JSON.")
+        parser.add_argument('--compare', help="Results of a previous run to compare the medians with.")
+
+    def handle(self, *args, **options):
+        if options['items'] < 2 or options['repeats'] < 1 or options['range'] < 1:
+            raise CommandError("At least 2 Items, 1 repeat and a range of 1 barcode are needed")
+
+        directory = options['directory'] or tempfile.mkdtemp(prefix='barcode-benchmark-')
+        os.makedirs(directory, exist_ok=True)
+        for name in ('default.sqlite3', 'koha.sqlite3'):
+            if os.path.exists(os.path.join(directory, name)):
+                os.remove(os.path.join(directory, name))
+
+        if options['koha']:
+            if options['koha'] not in connections.databases:
+                raise CommandError("Unknown Database %s" % options['koha'])
+            koha = dict(connections.databases[options['koha']])
+        else:
+            koha = {'ENGINE': 'django.db.backends.sqlite3', 'NAME': os.path.join(directory, 'koha.sqlite3')}
+
+        self.use_database('default', {'ENGINE': 'django.db.backends.sqlite3',
+                                      'NAME': os.path.join(directory, 'default.sqlite3')})
+        self.use_database('koha_db', koha)
+        # Every read of the Koha tables goes to the stand-in rather than to the replicas
+        replicas.aliases = []
+
+        if koha_tables('koha_db'):
+            raise CommandError("The Database already holds Koha tables: %s" % ', '.join(koha_tables('koha_db')))
+
+        try:
+            call_command('migrate', database='default', verbosity=0)
+            create_koha_tables('koha_db')
+
+            start = time.perf_counter()
+            biblios = options['biblios'] or max(1, options['items'] // 2)
+            fixture = seed_koha('koha_db', options['items'], biblios, options['marc_ratio'], options['seed'])
+            self.stdout.write("Seeded %d Items and %d Biblios in %.1f s" % (
+                options['items'], biblios, time.perf_counter() - start))
+
+            with override_settings(KOHA_MIRROR=False):
+                results, projection = self.run(fixture, options)
+        finally:
+            if options['koha']:
+                drop_koha_tables('koha_db')
+            connections.close_all()
+            if not options['directory']:
+                shutil.rmtree(directory, ignore_errors=True)
+
+        report = {
+            'meta': {
+                'created': timezone.now().isoformat(),
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'koha': koha['ENGINE'],
+                'items': options['items'],
+                'biblios': biblios,
+                'marc_ratio': options['marc_ratio'],
+                'seed': options['seed'],
+                'repeats': options['repeats'],
+                'range': options['range'],
+                'author_extractor': AUTHOR_EXTRACTOR,
+                'label_cache_size': LABEL_CACHE_SIZE,
+            },
+            'results': results,
+            'projection': projection,
+        }
+
+        previous = dict()
+        if options['compare']:
+            with open(options['compare']) as file:
+                previous = json.load(file)['results']
+
+        for name, summary in results.items():
+            line = "%-22s p50 %9.3f ms  p90 %9.3f ms  max %9.3f ms" % (name, summary['p50'], summary['p90'],
+                                                                      summary['max'])
+            if previous.get(name, {}).get('p50'):
+                line += "  %+6.1f%%" % ((summary['p50'] / previous[name]['p50'] - 1) * 100)
+            self.stdout.write(line)
+
+        for name, footprint in projection.items():
+            self.stdout.write("%-22s %d rows  %.1f bytes per row read  %.1f bytes per row in memory" % (
+                name, footprint['rows'], footprint['bytes_per_row'], footprint['memory_per_row']))
+
+        if options['output']:
+            with open(options['output'], 'w') as file:
+                json.dump(report, file, indent=2)
+
+    def use_database(self, alias, settings_dict):
+        """
+            This definition points a Database alias to another Database for the rest of the process.
+
+            :param alias: *The alias of the Database, e.g. koha_db* \n
+            :param settings_dict: *The settings of the other Database*
+
+        """
+        connections[alias].close()
+        connections.databases[alias] = dict(settings_dict)
+        connections.ensure_defaults(alias)
+        connections.prepare_test_settings(alias)
+        del connections[alias]
+
+    def time(self, function, arguments):
+        """
+            This definition times a function once per set of arguments.
+
+            :param function: *The function measured* \n
+            :param arguments: *A list of tuples of arguments*
+
+            :return: *A dictionary of the percentiles of the durations, see metrics.percentiles()*
+
+        """
+        timings = []
+        for args in arguments:
+            start = time.perf_counter()
+            function(*args)
+            timings.append(time.perf_counter() - start)
+        return percentiles(timings)
+
+    def footprint(self, queryset):
+        """
+            This definition measures what the rows of a queryset cost: the bytes of their values as sent by the
+            Database, counted as text, and the Python memory held by the objects built from them.
+
+            :param queryset: *A queryset*
+
+            :return: *A dictionary with the number of rows and the bytes and memory per row*
+
+        """
+        sql, params = queryset.query.get_compiler(queryset.db).as_sql()
+        with connections[queryset.db].cursor() as cursor:
+            cursor.execute(sql, params)
+            wire = sum(len(value) if isinstance(value, (bytes, str)) else len(str(value))
+                       for row in cursor.fetchall() for value in row if value is not None)
+
+        tracemalloc.start()
+        rows = list(queryset)
+        memory = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+
+        count = max(1, len(rows))
+        return {'rows': len(rows), 'bytes_per_row': round(wire / count, 1), 'memory_per_row': round(memory / count, 1)}
+
+    def run(self, fixture, options):
+        """
+            This definition runs the benchmarks on the synthetic Koha Database.
+
+            :param fixture: *The bounds of the synthetic data, see synthetic.seed_koha()* \n
+            :param options: *The options of the command*
+
+            :return: *A tuple of the percentiles of every benchmark and of the cost of the rows of a range read
+                     as Items or as LabelItem, see footprint()*
+
+        """
+        rng = random.Random(options['seed'])
+        repeats, span = options['repeats'], options['range']
+        items = get_items()
+        results = dict()
+
+        def draw_range(bounds):
+            low, high = bounds
+            start = rng.randint(low, max(low, high - span + 1))
+            return start, min(high, start + span - 1)
+
+        first, last = fixture['numeric']
+        results['single_lookup'] = self.time(
+            lambda barcode: list(items.filter(barcode=barcode)),
+            [(str(rng.randint(first, last)),) for _ in range(repeats)])
+
+        numeric = [draw_range(fixture['numeric']) for _ in range(repeats)]
+        results['numeric_range'] = self.time(
+            lambda start, end: list(items.filter(numeric_range_filter(str(start), str(end)))), numeric)
+
+        # The same ranges read page by page as by the form, see lookups.lookup_range()
+        results['numeric_range_lookup'] = self.time(
+            lambda start, end: lookup_range(items, str(start), str(end)), numeric)
+
+        # The same ranges read as whole Items rows with their Biblios, as before the LabelItem projection
+        models = Items.objects.select_related('biblionumber').filter(withdrawn=0)
+        results['numeric_range_models'] = self.time(
+            lambda start, end: list(models.filter(numeric_range_filter(str(start), str(end)))), numeric)
+        query = numeric_range_filter(*map(str, numeric[0]))
+        projection = {'models': self.footprint(models.filter(query)),
+                      'label_items': self.footprint(items.filter(query))}
+
+        if fixture['alphanumeric']:
+            alphanumeric = [draw_range(fixture['alphanumeric']) for _ in range(repeats)]
+            results['alphanumeric_range'] = self.time(
+                lambda start, end: alphanumeric_range(items, '%s%06d' % (ALPHANUMERIC_PREFIX, start),
+                                                      '%s%06d' % (ALPHANUMERIC_PREFIX, end)), alphanumeric)
+            results['alphanumeric_range_lookup'] = self.time(
+                lambda start, end: lookup_range(items, '%s%06d' % (ALPHANUMERIC_PREFIX, start),
+                                                '%s%06d' % (ALPHANUMERIC_PREFIX, end)), alphanumeric)
+
+        if fixture['marc_only']:
+            extractor = AUTHOR_EXTRACTORS[AUTHOR_EXTRACTOR]
+            results['marc_authors'] = self.time(
+                extractor, [(rng.sample(fixture['marc_only'], min(span, len(fixture['marc_only']))),)
+                            for _ in range(repeats)])
+
+        # The same ranges are labelled with an empty cache, then once every label is cached
+        def numeric_ranges():
+            return [list(items.filter(numeric_range_filter(str(start), str(end)))) for start, end in numeric]
+
+        def cold_labels(data):
+            LabelRecord.objects.all().delete()
+            get_labels(data)
+
+        results['labels_cold'] = self.time(cold_labels, [(data,) for data in numeric_ranges()])
+        for data in numeric_ranges():
+            get_labels(data)
+        ranges = numeric_ranges()
+        results['labels_warm'] = self.time(get_labels, [(data,) for data in ranges])
+
+        def callnumbers(data):
+            parse_callnumber.cache_clear()
+            for item in data:
+                parse_callnumber(item.itemcallnumber)
+
+        results['callnumbers'] = self.time(callnumbers, [(data,) for data in ranges])
+
+        labels = [[item.label for item in data] for data in ranges]
+        for name, render in (('render_barcode_pdf', lambda data: b''.join(render_labels(data, 'barcode_data'))),
+                             ('render_spine_pdf', lambda data: b''.join(render_labels(data, 'spine_data'))),
+                             ('render_spine_a4', lambda data: b''.join(render_sheets(data, 'spine_data', 'a4'))),
+                             ('render_barcode_zpl', lambda data: ''.join(print_labels(data, 'barcode_data', 'zpl')))):
+            results[name] = self.time(render, [(data,) for data in labels])
+
+        return results, projection
@@ -0,0 +1,75 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.db.utils import load_backend
+import time
+
+
+# Engines of Django and their pooled counterparts, by the vendor of the Database
+ENGINES = {
+    'mysql': ('django.db.backends.mysql', 'barcode.backends.mysql'),
+    'sqlite': ('django.db.backends.sqlite3', 'barcode.backends.sqlite3'),
+}
+
+
+class Command(BaseCommand):
+    """
+        This class measures the latency of a request to the **Koha Database** with and without the pool of
+        connections. Every simulated request connects, looks an Item up by its barcode and closes its connection,
+        as Django does at the end of a request. A local SQLite copy of the items table can stand in for Koha.
+
+            python manage.py benchmark_pool [--database koha_db] [--requests N] [--connect-latency MS]
+
+    """
+    help = "Compares the latency of requests to the Koha Database with and without the pool of connections."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default='koha_db', help="Alias of the Database.")
+        parser.add_argument('--requests', type=int, default=200, help="Number of requests per run.")
+        parser.add_argument('--connect-latency', type=float, default=0,
+                            help="Milliseconds added to every new connection, e.g. to simulate a WAN round trip.")
+
+    def handle(self, *args, **options):
+        settings_dict = dict(connections[options['database']].settings_dict)
+        vendor = connections[options['database']].vendor
+        if vendor not in ENGINES:
+            raise CommandError("No pooled engine for the %s backend" % vendor)
+
+        direct, pooled = (load_backend(engine).DatabaseWrapper for engine in ENGINES[vendor])
+        latency = options['connect_latency'] / 1000.0
+
+        class DirectWrapper(direct):
+            def get_new_connection(self, conn_params):
+                # Only the connections actually opened pay the latency, not those taken from the pool
+                time.sleep(latency)
+                return super().get_new_connection(conn_params)
+
+        class PooledWrapper(pooled, DirectWrapper):
+            pass
+
+        for name, wrapper_class in (('direct', DirectWrapper), ('pooled', PooledWrapper)):
+            # The pooled connections of the benchmark are kept apart from those of the application
+            wrapper = wrapper_class(dict(settings_dict), options['database'] + '_benchmark')
+            timings = sorted(self.run(wrapper, options['requests']))
+            self.stdout.write("%-6s  mean %.3f ms  p50 %.3f ms  p95 %.3f ms" % (
+                name, sum(timings) / len(timings) * 1000, timings[len(timings) // 2] * 1000,
+                timings[int(len(timings) * 0.95)] * 1000))
+
+    def run(self, wrapper, requests):
+        """
+            This definition runs the simulated requests.
+
+            :param wrapper: *A DatabaseWrapper* \n
+            :param requests: *The number of requests*
+
+            :return: *A list of the duration of every request in seconds*
+
+        """
+        timings = []
+        for index in range(requests):
+            start = time.perf_counter()
+            with wrapper.cursor() as cursor:
+                cursor.execute("SELECT itemnumber FROM items WHERE barcode = %s", [str(index)])
+                cursor.fetchall()
+            wrapper.close()
+            timings.append(time.perf_counter() - start)
+        return timings
@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand
+from barcode.jobs import expire_jobs, run_job
+from barcode.models import PrintJob
+import time
+
+
+class Command(BaseCommand):
+    """
+        This class runs the queued print jobs, oldest first, when they are not run by the web server itself
+        (PRINT_JOB_THREADS = 0). With --poll it keeps waiting for new jobs, e.g. as a service next to the web
+        server. Several instances may run at once, a job is only taken by one of them. The jobs finished more
+        than PRINT_JOB_EXPIRY seconds ago are deleted with their labels on every pass.
+
+            python manage.py run_print_jobs [--poll SECONDS] [--requeue]
+
+    """
+    help = "Runs the queued print jobs of the Barcode App."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--poll', type=float, default=0,
+                            help="Keep polling for new jobs every given number of seconds.")
+        parser.add_argument('--requeue', action='store_true',
+                            help="Queue again the jobs left running by a worker that was stopped.")
+
+    def handle(self, *args, **options):
+        if options['requeue']:
+            count = PrintJob.objects.filter(status=PrintJob.RUNNING).update(status=PrintJob.QUEUED, done=0)
+            self.stdout.write("Requeued %d jobs" % count)
+
+        while True:
+            for pk in PrintJob.objects.filter(status=PrintJob.QUEUED).order_by('created', 'id').values_list('id', flat=True):
+                if run_job(pk):
+                    job = PrintJob.objects.get(pk=pk)
+                    self.stdout.write("Job %d: %s, %d labels" % (job.pk, job.status, job.total))
+
+            jobs, files = expire_jobs()
+            if jobs or files:
+                self.stdout.write("Expired %d jobs and %d files" % (jobs, files))
+
+            if not options['poll']:
+                break
+            time.sleep(options['poll'])
@@ -0,0 +1,149 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Max
+from django.db import transaction
+from barcode.authors import load_authors
+from barcode.callnumbers import parse_callnumber
+from barcode.models import Biblio, Items, ItemMirror, MirrorState
+from barcode.ranges import BARCODE_BATCH_SIZE, batched
+
+
+class Command(BaseCommand):
+    """
+        This class mirrors the printable data of the Koha Items (barcode, title, author, call number, author mark,
+        home branch, location, cn_sort, item type and date of accession) into the local table
+        **barcode_itemmirror**. Only the Items or Biblios modified since the previous run are synced, in chunks of
+        itemnumbers, and an interrupted run resumes from its last chunk. The Items deleted in Koha are then
+        deleted from the mirror.
+
+            python manage.py sync_items [--chunk-size N] [--full]
+
+    """
+    help = "Incrementally mirrors the printable data of the Koha Items into the default Database."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=BARCODE_BATCH_SIZE,
+                            help="Number of Items fetched from Koha per chunk.")
+        parser.add_argument('--full', action='store_true',
+                            help="Sync every Item again, ignoring the timestamps of the previous run.")
+
+    def handle(self, *args, **options):
+        state, created = MirrorState.objects.get_or_create(pk=1)
+
+        if options['full']:
+            state.item_mark = state.biblio_mark = None
+            state.cursor = 0
+
+        # A new run remembers the latest timestamps of Koha, so changes made while it runs are synced next time
+        if state.cursor == 0:
+            state.next_item_mark = Items.objects.aggregate(mark=Max('timestamp'))['mark']
+            state.next_biblio_mark = Biblio.objects.aggregate(mark=Max('timestamp'))['mark']
+            state.save()
+        else:
+            self.stdout.write("Resuming after itemnumber %d" % state.cursor)
+
+        items = Items.objects.select_related('biblionumber').order_by('itemnumber')
+        synced = 0
+
+        for chunk in self.chunks(state, items, options['chunk_size']):
+            load_authors(chunk)
+            mirrors = [self.mirror(item) for item in chunk]
+
+            with transaction.atomic(using='default'):
+                ItemMirror.objects.filter(itemnumber__in=[item.itemnumber for item in chunk]).delete()
+                ItemMirror.objects.bulk_create(mirrors)
+                state.cursor = chunk[-1].itemnumber
+                state.save()
+
+            synced += len(chunk)
+            self.stdout.write("Synced %d Items up to itemnumber %d" % (synced, state.cursor))
+
+        deleted = self.delete_missing(options['chunk_size'])
+
+        state.item_mark, state.biblio_mark = state.next_item_mark, state.next_biblio_mark
+        state.cursor = 0
+        state.save()
+
+        self.stdout.write(self.style.SUCCESS("Mirror is up to date, %d Items synced and %d deleted."
+                                             % (synced, deleted)))
+
+    def chunks(self, state, items, chunk_size):
+        """
+            This definition reads the Items to sync after the cursor of the run, chunk by chunk in the order of
+            their itemnumbers: every Item on the first run or with --full, else the Items modified since the marks
+            of the previous run. These are found with two indexed queries, on items.timestamp and on
+            biblio.timestamp, rather than one condition on both tables that neither index can serve.
+
+            :param state: *The MirrorState of the run* \n
+            :param items: *A queryset of Items with their Biblios, ordered by itemnumber* \n
+            :param chunk_size: *Number of Items per chunk*
+
+            :return: *A generator of lists of Items*
+
+        """
+        if state.item_mark is None or state.biblio_mark is None:
+            while True:
+                chunk = list(items.filter(itemnumber__gt=state.cursor)[:chunk_size])
+                if not chunk:
+                    return
+                yield chunk
+
+        changed = set(Items.objects.filter(timestamp__gte=state.item_mark, itemnumber__gt=state.cursor)
+                      .values_list('itemnumber', flat=True))
+        biblios = list(Biblio.objects.filter(timestamp__gte=state.biblio_mark).values_list('biblionumber', flat=True))
+        for batch in batched(biblios, BARCODE_BATCH_SIZE):
+            changed.update(Items.objects.filter(biblionumber__in=batch, itemnumber__gt=state.cursor)
+                           .values_list('itemnumber', flat=True))
+
+        for batch in batched(sorted(changed), chunk_size):
+            chunk = list(items.filter(itemnumber__in=batch))
+            if chunk:
+                yield chunk
+
+    def delete_missing(self, chunk_size):
+        """
+            This definition deletes from the mirror the Items deleted in Koha. The mirrored itemnumbers are read
+            chunk by chunk and looked up by primary key in Koha, since both tables are in different Databases.
+
+            :param chunk_size: *Number of itemnumbers per chunk*
+
+            :return: *The number of mirrored Items deleted*
+
+        """
+        deleted, last = 0, 0
+        mirrored = ItemMirror.objects.order_by('itemnumber').values_list('itemnumber', flat=True)
+        while True:
+            chunk = list(mirrored.filter(itemnumber__gt=last)[:chunk_size])
+            if not chunk:
+                return deleted
+
+            existing = set(Items.objects.filter(itemnumber__in=chunk).values_list('itemnumber', flat=True))
+            missing = [itemnumber for itemnumber in chunk if itemnumber not in existing]
+            if missing:
+                deleted += ItemMirror.objects.filter(itemnumber__in=missing).delete()[0]
+            last = chunk[-1]
+
+    def mirror(self, item):
+        """
+            This definition builds the mirrored row of an Item whose Biblio author has already been loaded.
+
+            :param item: *An Items object*
+
+            :return: *An unsaved ItemMirror object*
+
+        """
+        callnumber = parse_callnumber(item.itemcallnumber)
+        return ItemMirror(itemnumber=item.itemnumber,
+                          biblionumber=item.biblionumber_id,
+                          barcode=item.barcode,
+                          title=item.biblionumber.title,
+                          author=item.biblionumber.get_author(),
+                          callnumber=callnumber.callnumber,
+                          author_mark=callnumber.author_mark,
+                          homebranch=item.homebranch_id,
+                          location=item.location,
+                          cn_sort=item.cn_sort,
+                          itype=item.itype,
+                          dateaccessioned=item.dateaccessioned,
+                          withdrawn=item.withdrawn,
+                          item_timestamp=item.timestamp,
+                          biblio_timestamp=item.biblionumber.timestamp)
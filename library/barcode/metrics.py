@@ -0,0 +1,215 @@
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from django.conf import settings
+from django.db import connections
+import heapq, threading, time
+
+
+# Record the queries and timings of every request, see middleware.MetricsMiddleware
+BARCODE_METRICS = getattr(settings, 'BARCODE_METRICS', False)
+
+# Number of latest requests per view the percentiles are computed over
+METRICS_SAMPLES = getattr(settings, 'METRICS_SAMPLES', 1000)
+
+# Number of slowest statements kept per request and per view
+METRICS_SLOWEST = 5
+
+_local = threading.local()
+
+
+class RequestMetrics:
+    """
+        A class representing the measures of a request: the number and duration of its queries per database
+        alias, its slowest statements and the time spent in named sections, e.g. the MARC author extraction.
+        It wraps the queries of the request, see `execute wrappers... <https://docs.djangoproject.com/en/2.2/topics/db/instrumentation/>`_
+    """
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.queries = defaultdict(lambda: [0, 0.0])
+        self.slowest = []
+        self.sections = defaultdict(float)
+        # The queries of a request may run in the threads of lookups.lookup_executor() too
+        self.lock = threading.Lock()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - start
+            alias = context['connection'].alias
+            with self.lock:
+                self.queries[alias][0] += 1
+                self.queries[alias][1] += duration
+
+                # Only the slowest statements are kept, in a heap whose smallest one is replaced
+                entry = (duration, alias, sql)
+                if len(self.slowest) < METRICS_SLOWEST:
+                    heapq.heappush(self.slowest, entry)
+                elif duration > self.slowest[0][0]:
+                    heapq.heapreplace(self.slowest, entry)
+
+    def server_timing(self):
+        """
+            This definition formats the measures of the request as the value of a Server-Timing header.
+
+            :return: *The header value, e.g. db-koha_db;desc="2 queries";dur=12.5, marc;dur=3.1, total;dur=20.4*
+
+        """
+        timings = ['db-%s;desc="%d queries";dur=%.1f' % (alias, count, seconds * 1000)
+                   for alias, (count, seconds) in self.queries.items()]
+        timings.extend('%s;dur=%.1f' % (name, seconds * 1000) for name, seconds in self.sections.items())
+        timings.append('total;dur=%.1f' % ((time.perf_counter() - self.start) * 1000))
+        return ', '.join(timings)
+
+
+def current_metrics():
+    """
+        This definition returns the measures of the request handled by the current thread.
+
+        :return: *A RequestMetrics object, or None if the metrics are disabled or outside of a request*
+
+    """
+    return getattr(_local, 'metrics', None)
+
+
+def set_metrics(metrics):
+    """
+        This definition attaches the measures of a request to the current thread.
+
+        :param metrics: *A RequestMetrics object, or None at the end of the request*
+
+    """
+    _local.metrics = metrics
+
+
+@contextmanager
+def measured(metrics):
+    """
+        This definition measures the queries and sections run by the current thread for a request, e.g. in a
+        thread looking up Items for it. Without measures, it does nothing.
+
+        :param metrics: *A RequestMetrics object, or None*
+
+    """
+    if metrics is None:
+        yield
+        return
+
+    # The wrapper is removed by identity rather than popped, since wrappers such as router.replicas are appended
+    # above it when a connection is created during the request
+    wrapped = []
+    set_metrics(metrics)
+    try:
+        for alias in connections:
+            connections[alias].execute_wrappers.append(metrics)
+            wrapped.append(connections[alias])
+        yield
+    finally:
+        for connection in wrapped:
+            connection.execute_wrappers.remove(metrics)
+        set_metrics(None)
+
+
+@contextmanager
+def timed(section):
+    """
+        This definition measures the time spent in a section of code for the metrics of the current request.
+        Outside of a measured request, it does nothing.
+
+        :param section: *The name of the section, e.g. marc or render*
+
+    """
+    metrics = getattr(_local, 'metrics', None)
+    if metrics is None:
+        yield
+        return
+
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        with metrics.lock:
+            metrics.sections[section] += time.perf_counter() - start
+
+
+def percentiles(values, scale=1000):
+    """
+        This definition summarizes measures with their percentiles.
+
+        :param values: *A list of measures, e.g. durations in seconds* \n
+        :param scale: *The factor applied to the measures, 1000 turns seconds into milliseconds*
+
+        :return: *A dictionary with the count and the mean, p50, p90, p99 and max of the scaled measures*
+
+    """
+    values = sorted(values)
+    count = len(values)
+    summary = {'count': count}
+    if count:
+        summary['mean'] = round(sum(values) / count * scale, 3)
+        for name, rank in (('p50', 0.5), ('p90', 0.9), ('p99', 0.99)):
+            summary[name] = round(values[min(count - 1, int(count * rank))] * scale, 3)
+        summary['max'] = round(values[-1] * scale, 3)
+    return summary
+
+
+class MetricsStore:
+    """
+        A class representing the measures aggregated by view over the latest METRICS_SAMPLES requests of the
+        process, with the slowest statements seen by every view.
+    """
+
+    def __init__(self, size):
+        self.samples = defaultdict(lambda: defaultdict(lambda: deque(maxlen=size)))
+        self.slowest = defaultdict(list)
+        self.lock = threading.Lock()
+
+    def add(self, view, metrics, total):
+        """
+            This definition adds the measures of a request.
+
+            :param view: *The name of the view* \n
+            :param metrics: *The RequestMetrics of the request* \n
+            :param total: *The duration of the request in seconds*
+
+        """
+        with self.lock:
+            samples = self.samples[view]
+            samples['total'].append(total)
+            for alias, (count, seconds) in metrics.queries.items():
+                samples['db-%s' % alias].append(seconds)
+                samples['queries-%s' % alias].append(count)
+            for section, seconds in metrics.sections.items():
+                samples[section].append(seconds)
+
+            slowest = self.slowest[view]
+            for entry in metrics.slowest:
+                if len(slowest) < METRICS_SLOWEST:
+                    heapq.heappush(slowest, entry)
+                elif entry[0] > slowest[0][0]:
+                    heapq.heapreplace(slowest, entry)
+
+    def report(self):
+        """
+            This definition summarizes the measures of every view, the durations in milliseconds.
+
+            :return: *A dictionary of the percentiles of every measure and the slowest statements, by view*
+
+        """
+        with self.lock:
+            samples = {view: {name: list(values) for name, values in measures.items()}
+                       for view, measures in self.samples.items()}
+            slowest = {view: sorted(entries, reverse=True) for view, entries in self.slowest.items()}
+
+        report = dict()
+        for view, measures in samples.items():
+            report[view] = {name: percentiles(values, 1 if name.startswith('queries-') else 1000)
+                            for name, values in measures.items()}
+            report[view]['slowest'] = [{'alias': alias, 'ms': round(seconds * 1000, 3), 'sql': sql}
+                                       for seconds, alias, sql in slowest.get(view, [])]
+        return report
+
+
+store = MetricsStore(METRICS_SAMPLES)
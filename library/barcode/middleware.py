@@ -0,0 +1,55 @@
+from django.core.exceptions import MiddlewareNotUsed
+from .metrics import BARCODE_METRICS, RequestMetrics, measured, store, timed
+import time
+
+
+class MetricsMiddleware:
+    """
+        This class measures every request: the number and duration of its queries per database alias, its
+        slowest statements and the time spent in the sections timed with metrics.timed(), e.g. the MARC author
+        extraction and the rendering. The measures are sent back in a Server-Timing header and aggregated by
+        view for the metrics endpoint, once the content of a streamed response is consumed. Django leaves the
+        middleware out unless BARCODE_METRICS is set, so it costs nothing when disabled.
+        `See more on middleware... <https://docs.djangoproject.com/en/2.2/topics/http/middleware/>`_
+    """
+
+    def __init__(self, get_response):
+        if not BARCODE_METRICS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        metrics = RequestMetrics()
+        with measured(metrics):
+            response = self.get_response(request)
+
+        view = request.resolver_match.url_name if request.resolver_match else 'other'
+        # The header leaves before a streamed response is consumed, so it only covers the view itself
+        response['Server-Timing'] = metrics.server_timing()
+
+        # The labels and exports are rendered, and most of their Items read, while they are streamed, after the
+        # response has left the middleware
+        if response.streaming:
+            response.streaming_content = self.stream(view, metrics, response.streaming_content)
+        else:
+            store.add(view, metrics, time.perf_counter() - metrics.start)
+        return response
+
+    def stream(self, view, metrics, content):
+        """
+            This definition measures the streaming of a response, e.g. rendering a PDF of labels or reading the
+            pages of an export. Its queries and its duration, as the stream section, are added to the measures of
+            the request, which are aggregated once the response is consumed.
+
+            :param view: *The name of the view* \n
+            :param metrics: *The RequestMetrics of the request* \n
+            :param content: *The content of the response*
+
+            :return: *A generator of the same content*
+
+        """
+        try:
+            with measured(metrics), timed('stream'):
+                yield from content
+        finally:
+            store.add(view, metrics, time.perf_counter() - metrics.start)
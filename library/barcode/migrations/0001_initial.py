@@ -0,0 +1,30 @@
+# Generated by Django 2.2.28 on 2026-10-17 17:37
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LabelRecord',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('itemnumber', models.IntegerField(unique=True)),
+                ('barcode', models.CharField(blank=True, default=None, max_length=20, null=True)),
+                ('title', models.TextField(blank=True, default=None, null=True)),
+                ('author', models.TextField(blank=True, default='')),
+                ('callnumber', models.CharField(blank=True, default='', max_length=255)),
+                ('author_mark', models.CharField(blank=True, default='', max_length=255)),
+                ('item_timestamp', models.DateTimeField(blank=True, default=None, null=True)),
+                ('biblio_timestamp', models.DateTimeField(blank=True, default=None, null=True)),
+                ('last_used', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+            ],
+        ),
+    ]
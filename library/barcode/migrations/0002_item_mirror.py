@@ -0,0 +1,41 @@
+# Generated by Django 2.2.28 on 2026-10-17 17:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('barcode', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ItemMirror',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('itemnumber', models.IntegerField(unique=True)),
+                ('biblionumber', models.IntegerField(db_index=True)),
+                ('barcode', models.CharField(blank=True, db_index=True, default=None, max_length=20, null=True)),
+                ('title', models.TextField(blank=True, default=None, null=True)),
+                ('author', models.TextField(blank=True, default='')),
+                ('callnumber', models.CharField(blank=True, default='', max_length=255)),
+                ('author_mark', models.CharField(blank=True, default='', max_length=255)),
+                ('homebranch', models.CharField(blank=True, default=None, max_length=10, null=True)),
+                ('withdrawn', models.IntegerField(default=0)),
+                ('item_timestamp', models.DateTimeField(blank=True, default=None, null=True)),
+                ('biblio_timestamp', models.DateTimeField(blank=True, default=None, null=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='MirrorState',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('item_mark', models.DateTimeField(blank=True, default=None, null=True)),
+                ('biblio_mark', models.DateTimeField(blank=True, default=None, null=True)),
+                ('cursor', models.IntegerField(default=0)),
+                ('next_item_mark', models.DateTimeField(blank=True, default=None, null=True)),
+                ('next_biblio_mark', models.DateTimeField(blank=True, default=None, null=True)),
+            ],
+        ),
+    ]
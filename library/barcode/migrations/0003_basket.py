@@ -0,0 +1,30 @@
+# Generated by Django 2.2.28 on 2026-10-17 17:45
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('barcode', '0002_item_mirror'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BasketItem',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('itemnumber', models.IntegerField()),
+                ('barcode', models.CharField(max_length=20)),
+                ('added', models.DateTimeField(default=django.utils.timezone.now)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='basket', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'unique_together': {('user', 'barcode')},
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 2.2.28 on 2026-10-17 17:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('barcode', '0004_print_job'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='printjob',
+            name='sheet',
+            field=models.CharField(blank=True, default='', max_length=20),
+        ),
+    ]
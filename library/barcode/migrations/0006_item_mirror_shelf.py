@@ -0,0 +1,27 @@
+# Generated by Django 2.2.28 on 2026-10-17 18:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('barcode', '0005_print_job_sheet'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='itemmirror',
+            name='cn_sort',
+            field=models.CharField(blank=True, default=None, max_length=255, null=True),
+        ),
+        migrations.AddField(
+            model_name='itemmirror',
+            name='location',
+            field=models.CharField(blank=True, default=None, max_length=80, null=True),
+        ),
+        migrations.AlterIndexTogether(
+            name='itemmirror',
+            index_together={('cn_sort', 'itemnumber')},
+        ),
+    ]
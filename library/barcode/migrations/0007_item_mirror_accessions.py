@@ -0,0 +1,23 @@
+# Generated by Django 2.2.28 on 2026-10-17 18:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('barcode', '0006_item_mirror_shelf'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='itemmirror',
+            name='dateaccessioned',
+            field=models.DateField(blank=True, db_index=True, default=None, null=True),
+        ),
+        migrations.AddField(
+            model_name='itemmirror',
+            name='itype',
+            field=models.CharField(blank=True, default=None, max_length=10, null=True),
+        ),
+    ]
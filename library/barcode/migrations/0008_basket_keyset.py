@@ -0,0 +1,19 @@
+# Generated by Django 2.2.28 on 2026-10-17 18:49
+
+from django.conf import settings
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('barcode', '0007_item_mirror_accessions'),
+    ]
+
+    operations = [
+        migrations.AlterIndexTogether(
+            name='basketitem',
+            index_together={('user', 'added', 'id')},
+        ),
+    ]
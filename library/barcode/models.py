@@ -1,7 +1,9 @@
 from django.core.validators import MaxValueValidator
 from django.db import models
+from django.conf import settings
 from django.utils import timezone
 from django_mysql import models as sqlModel
+from .callnumbers import parse_callnumber
 from datetime import datetime
 from time import strftime
 import re
@@ -35,7 +37,8 @@ class UnixTimestampField(models.DateTimeField):
         typ=['TIMESTAMP']
         if self.isnull:
             typ += ['NULL']
-        if self.auto_created:
+        # ON UPDATE is MySQL only, e.g. the synthetic Koha tables of the benchmarks may be created in SQLite
+        if self.auto_created and connection.vendor == 'mysql':
             typ += ['default CURRENT_TIMESTAMP on update CURRENT_TIMESTAMP']
         return ' '.join(typ)
 
@@ -263,71 +266,17 @@ class Items(models.Model):
 
     def get_item_callnumber(self):
         """
-            This definition splits the itemcallnumber, if exists, and returns the entire substring from the
-            start till the first match of the Alphabetic character.
+            This definition returns the class part of the itemcallnumber, if exists, i.e. the entire substring
+            from the start till the author mark. See callnumbers.parse_callnumber().
         """
-
-        if self.itemcallnumber:
-            '''
-                \W - non-alphabetic characters
-                \d - non-numeric characters
-                [^\W\d] - not of (non-alphabetic or non-numeric characters)
-            '''
-
-            callList = self.itemcallnumber.split()
-            if len(callList) == 1:
-                match = re.compile("[^\W\d]+").search(self.itemcallnumber[::-1])
-                if match:
-                    matchLen = match.end() - match.start()
-                    if matchLen <= 3:
-                        return self.itemcallnumber[:-match.end()]
-                    else:
-                        return self.itemcallnumber[:-(match.end()-(matchLen-3))]
-                else:
-                    return callList[0]
-            else:
-                callNum = ""
-                for i in range(len(callList)-1):
-                    callNum += callList[i] + " "
-
-                match = re.search('[a-zA-Z]', callList[-1])
-                if not (match and match.start() == 0) :
-                    callNum += callList[-1] + " "
-
-                return callNum.rstrip()
-
-
-        return ''
+        return parse_callnumber(self.itemcallnumber).callnumber
 
     def get_author_mark(self):
         """
-            This definition splits the itemcallnumber, if exists, and returns the entire substring from the
-            first match of the Alphabetic character till the end.
+            This definition returns the author mark of the itemcallnumber, if exists, i.e. the entire substring
+            from the author mark till the end. See callnumbers.parse_callnumber().
         """
-
-        if self.itemcallnumber:
-            '''
-                \W - non-alphabetic characters
-                \d - non-numeric characters
-                [^\W\d] - not of (non-alphabetic or non-numeric characters)
-            '''
-            callList = self.itemcallnumber.split()
-            if len(callList) == 1:
-                match = re.compile("[^\W\d]+").search(self.itemcallnumber[::-1])
-                if match:
-                    matchLen = match.end() - match.start()
-                    if matchLen <= 3:
-                        return self.itemcallnumber[-match.end():]
-                    else:
-                        return self.itemcallnumber[-(match.end()-(matchLen-3)):]
-                else:
-                    return ''
-            else:
-                match = re.search('[a-zA-Z]', callList[-1])
-                if match and match.start() == 0 :
-                    return callList[-1]
-
-        return ''
+        return parse_callnumber(self.itemcallnumber).author_mark
 
     class Meta:
         """
@@ -341,3 +290,130 @@ class Items(models.Model):
         managed = False
         db_table = 'items'
         app_label = 'koha_data'
+
+
+class LabelRecord(models.Model):
+    """
+        A class representing a Django Model of the local table **barcode_labelrecord** which caches the resolved
+        label of a Koha Item. It is stored in the **default** Database and is invalidated by the timestamps of
+        the Koha tables **items** and **biblio**.
+    """
+    itemnumber = models.IntegerField(unique=True)
+    barcode = models.CharField(max_length=20, blank=True, null=True, default=None)
+    title = models.TextField(blank=True, null=True, default=None)
+    author = models.TextField(blank=True, default='')
+    callnumber = models.CharField(max_length=255, blank=True, default='')
+    author_mark = models.CharField(max_length=255, blank=True, default='')
+    item_timestamp = models.DateTimeField(blank=True, null=True, default=None)
+    biblio_timestamp = models.DateTimeField(blank=True, null=True, default=None)
+    last_used = models.DateTimeField(default=timezone.now, db_index=True)
+
+    def is_fresh(self, item):
+        """
+            This definition checks whether the cached label is still valid for the given Item, i.e. neither
+            the Item nor its Biblio has been modified in Koha since the label was cached.
+
+            :param item: *The Items object the label was resolved from*
+
+            :return: *A boolean value indicating whether the label can be used as it is.*
+
+        """
+        return self.item_timestamp == item.timestamp and self.biblio_timestamp == item.biblionumber.timestamp
+
+
+class ItemMirror(models.Model):
+    """
+        A class representing a Django Model of the local table **barcode_itemmirror** which mirrors the printable
+        data of the Koha Items. It is stored in the **default** Database and kept up to date by the management
+        command *sync_items*.
+    """
+    itemnumber = models.IntegerField(unique=True)
+    biblionumber = models.IntegerField(db_index=True)
+    barcode = models.CharField(max_length=20, blank=True, null=True, default=None, db_index=True)
+    title = models.TextField(blank=True, null=True, default=None)
+    author = models.TextField(blank=True, default='')
+    callnumber = models.CharField(max_length=255, blank=True, default='')
+    author_mark = models.CharField(max_length=255, blank=True, default='')
+    homebranch = models.CharField(max_length=10, blank=True, null=True, default=None)
+    location = models.CharField(max_length=80, blank=True, null=True, default=None)
+    cn_sort = models.CharField(max_length=255, blank=True, null=True, default=None)
+    itype = models.CharField(max_length=10, blank=True, null=True, default=None)
+    dateaccessioned = models.DateField(blank=True, null=True, default=None, db_index=True)
+    withdrawn = models.IntegerField(default=0)
+    item_timestamp = models.DateTimeField(blank=True, null=True, default=None)
+    biblio_timestamp = models.DateTimeField(blank=True, null=True, default=None)
+
+    @property
+    def label(self):
+        """
+            A mirrored Item is its own label, so it can be rendered like the Items with a resolved label.
+        """
+        return self
+
+    class Meta:
+        # The shelf order, see shelves.shelf_pages()
+        index_together = (('cn_sort', 'itemnumber'),)
+
+
+class MirrorState(models.Model):
+    """
+        A class representing a Django Model of the local table **barcode_mirrorstate** which holds the progress of
+        the management command *sync_items*. A single row is used.
+
+            item_mark - *Items modified at or after this timestamp are synced*
+            biblio_mark - *Items whose Biblio is modified at or after this timestamp are synced*
+            cursor - *The last itemnumber synced by an unfinished run, 0 when no run is pending*
+            next_item_mark - *The latest items timestamp seen by the current run*
+            next_biblio_mark - *The latest biblio timestamp seen by the current run*
+    """
+    item_mark = models.DateTimeField(blank=True, null=True, default=None)
+    biblio_mark = models.DateTimeField(blank=True, null=True, default=None)
+    cursor = models.IntegerField(default=0)
+    next_item_mark = models.DateTimeField(blank=True, null=True, default=None)
+    next_biblio_mark = models.DateTimeField(blank=True, null=True, default=None)
+
+
+class BasketItem(models.Model):
+    """
+        A class representing a Django Model of the local table **barcode_basketitem** which holds the print basket
+        of every user, i.e. the Items found by their searches and waiting to be printed. It is stored in the
+        **default** Database and a barcode is held only once per basket.
+    """
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, models.CASCADE, related_name='basket')
+    itemnumber = models.IntegerField()
+    barcode = models.CharField(max_length=20)
+    added = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        unique_together = (('user', 'barcode'),)
+        # The order of the basket, see views.basketItems()
+        index_together = (('user', 'added', 'id'),)
+
+
+class PrintJob(models.Model):
+    """
+        A class representing a Django Model of the local table **barcode_printjob** which holds the print jobs run
+        in the background for large batches of labels. It is stored in the **default** Database, the rendered
+        labels are left on disk in PRINT_JOB_DIRECTORY.
+
+            sheet - *The sheet the labels are packed on, see sheets.LABEL_SHEETS, or blank for label rolls*
+            status - *queued, running, done or failed*
+            total - *The number of barcodes to print*
+            done - *The number of barcodes processed so far*
+            artifact - *The path of the rendered labels, relative to PRINT_JOB_DIRECTORY*
+    """
+    QUEUED, RUNNING, DONE, FAILED = 'queued', 'running', 'done', 'failed'
+    STATUSES = ((QUEUED, 'Queued'), (RUNNING, 'Running'), (DONE, 'Done'), (FAILED, 'Failed'))
+
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, models.CASCADE, related_name='print_jobs')
+    layout = models.CharField(max_length=20)
+    output = models.CharField(max_length=3)
+    sheet = models.CharField(max_length=20, blank=True, default='')
+    barcodes = models.TextField()
+    status = models.CharField(max_length=7, choices=STATUSES, default=QUEUED, db_index=True)
+    total = models.IntegerField(default=0)
+    done = models.IntegerField(default=0)
+    artifact = models.CharField(max_length=255, blank=True, default='')
+    error = models.TextField(blank=True, default='')
+    created = models.DateTimeField(default=timezone.now)
+    finished = models.DateTimeField(blank=True, null=True, default=None)
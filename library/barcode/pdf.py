@@ -0,0 +1,166 @@
+import zlib
+
+
+# Widths (per 1000 units of font size) of the printable ASCII characters, from the AFM metrics of the PDF core fonts.
+# The core fonts are built into every PDF reader, so no font file has to be embedded in the documents.
+HELVETICA_WIDTHS = [
+    278, 278, 355, 556, 556, 889, 667, 191, 333, 333, 389, 584, 278, 333, 278, 278, 556, 556, 556, 556, 556, 556,
+    556, 556, 556, 556, 278, 278, 584, 584, 584, 556, 1015, 667, 667, 722, 722, 667, 611, 778, 722, 278, 500, 667,
+    556, 833, 722, 778, 667, 778, 722, 667, 611, 722, 667, 944, 667, 667, 611, 278, 278, 278, 469, 556, 333, 556,
+    556, 500, 556, 556, 278, 556, 556, 222, 222, 500, 222, 833, 556, 556, 556, 556, 333, 500, 278, 556, 500, 722,
+    500, 500, 500, 334, 260, 334, 584,
+]
+
+HELVETICA_BOLD_WIDTHS = [
+    278, 333, 474, 556, 556, 889, 722, 238, 333, 333, 389, 584, 278, 333, 278, 278, 556, 556, 556, 556, 556, 556,
+    556, 556, 556, 556, 333, 333, 584, 584, 584, 611, 975, 722, 722, 722, 722, 667, 611, 778, 722, 278, 556, 722,
+    611, 833, 722, 778, 667, 778, 722, 667, 611, 722, 667, 944, 667, 667, 611, 333, 278, 333, 584, 556, 333, 556,
+    611, 556, 611, 556, 333, 611, 611, 278, 278, 556, 278, 889, 611, 611, 611, 611, 389, 556, 333, 611, 556, 778,
+    556, 556, 500, 389, 280, 389, 584,
+]
+
+# Resource names of the fonts used in the page content streams
+FONTS = {False: ('F1', 'Helvetica', HELVETICA_WIDTHS), True: ('F2', 'Helvetica-Bold', HELVETICA_BOLD_WIDTHS)}
+
+# Width of the characters outside the printable ASCII range
+DEFAULT_WIDTH = 556
+
+
+def text_width(text, size, bold=False):
+    """
+        This definition measures the width of a text set in Helvetica.
+
+        :param text: *The text to measure* \n
+        :param size: *The font size in points* \n
+        :param bold: *Whether the text is set in Helvetica-Bold*
+
+        :return: *The width of the text in points*
+
+    """
+    widths = FONTS[bold][2]
+    total = 0
+    for char in text:
+        code = ord(char) - 32
+        total += widths[code] if 0 <= code < len(widths) else DEFAULT_WIDTH
+    return total * size / 1000.0
+
+
+def escape(text):
+    """
+        This definition encodes a text as a PDF string literal in the WinAnsi encoding of the core fonts.
+
+        :param text: *The text to encode*
+
+        :return: *The encoded bytes, without the enclosing parentheses*
+
+    """
+    data = text.encode('cp1252', 'replace')
+    return data.replace(b'\\', b'\\\\').replace(b'(', b'\\(').replace(b')', b'\\)')
+
+
+def render_page(ops):
+    """
+        This definition builds the content stream of a page from a list of drawing operations:
+
+            ('text', x, y, size, bold, text) - *draws a text with its baseline starting at (x, y)*
+            ('rect', x, y, width, height) - *fills a black rectangle whose lower left corner is (x, y)*
+            ('path', x, y, path) - *draws path operators, e.g. a rendered barcode, with their origin moved to (x, y)*
+
+        :param ops: *A list of drawing operations, in points from the lower left corner of the page*
+
+        :return: *The content stream of the page as bytes*
+
+    """
+    content = []
+    rects = []
+    for op in ops:
+        if op[0] == 'text':
+            x, y, size, bold, text = op[1:]
+            content.append(b'BT /%s %.2f Tf %.2f %.2f Td (%s) Tj ET' % (FONTS[bold][0].encode(), size, x, y, escape(text)))
+        elif op[0] == 'rect':
+            rects.append(b'%.2f %.2f %.2f %.2f re' % op[1:])
+        elif op[0] == 'path':
+            x, y, path = op[1:]
+            content.append(b'q 1 0 0 1 %.2f %.2f cm %s Q' % (x, y, path))
+
+    # All the rectangles of a page are filled at once
+    if rects:
+        content.append(b'\n'.join(rects) + b' f')
+
+    return b'\n'.join(content)
+
+
+def compress_page(ops):
+    """
+        This definition renders a page and compresses its content stream, ready to be written by write_pdf().
+
+        :param ops: *A list of drawing operations, see render_page()*
+
+        :return: *The compressed content stream of the page*
+
+    """
+    return zlib.compress(render_page(ops))
+
+
+def stream_pdf(pages, width, height):
+    """
+        This definition writes a PDF document page by page. Every page is yielded as soon as it is rendered, so a
+        document of thousands of pages can be streamed to the client without being held in memory.
+
+        :param pages: *An iterable of lists of drawing operations, one list per page, see render_page()* \n
+        :param width: *The width of the pages in points* \n
+        :param height: *The height of the pages in points*
+
+        :return: *A generator of the bytes of the PDF document*
+
+    """
+    return write_pdf((compress_page(ops) for ops in pages), width, height)
+
+
+def write_pdf(contents, width, height):
+    """
+        This definition writes a PDF document from the compressed content streams of its pages, which may have
+        been rendered elsewhere, e.g. in parallel by the print jobs.
+
+        :param contents: *An iterable of compressed content streams, one per page, see compress_page()* \n
+        :param width: *The width of the pages in points* \n
+        :param height: *The height of the pages in points*
+
+        :return: *A generator of the bytes of the PDF document*
+
+    """
+    offsets = dict()
+    position = 0
+
+    def write(number, body):
+        nonlocal position
+        offsets[number] = position
+        chunk = b'%d 0 obj\n%s\nendobj\n' % (number, body)
+        position += len(chunk)
+        return chunk
+
+    header = b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n'
+    position += len(header)
+    yield header
+
+    # Objects 1 and 2 are the catalog and the page tree, the fonts follow and the pages start at object 5
+    yield write(1, b'<< /Type /Catalog /Pages 2 0 R >>')
+    for number, (name, font, widths) in zip((3, 4), FONTS.values()):
+        yield write(number, b'<< /Type /Font /Subtype /Type1 /BaseFont /%s /Encoding /WinAnsiEncoding >>' % font.encode())
+
+    kids = []
+    number = 5
+    for content in contents:
+        yield write(number, b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %.2f %.2f] /Contents %d 0 R '
+                            b'/Resources << /Font << /F1 3 0 R /F2 4 0 R >> >> >>' % (width, height, number + 1))
+        yield write(number + 1, b'<< /Length %d /Filter /FlateDecode >>\nstream\n%s\nendstream' % (len(content), content))
+        kids.append(b'%d 0 R' % number)
+        number += 2
+
+    yield write(2, b'<< /Type /Pages /Kids [%s] /Count %d >>' % (b' '.join(kids), len(kids)))
+
+    xref = [b'xref\n0 %d\n0000000000 65535 f \n' % number]
+    for obj in range(1, number):
+        xref.append(b'%010d 00000 n \n' % offsets[obj])
+    xref.append(b'trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%EOF\n' % (number, position))
+    yield b''.join(xref)
@@ -0,0 +1,156 @@
+from django.conf import settings
+from .code39 import CODE39_QUIET, CODE39_WIDE, code39_bars
+from .labels import LABEL_HEIGHT, LABEL_WIDTH, BASELINE, pair_labels
+from .pdf import text_width
+
+
+# Resolution of the thermal label printers in dots per inch
+PRINTER_DPI = getattr(settings, 'PRINTER_DPI', 203)
+
+# Height and width in dots of the EPL resident fonts 1 to 5 at 203 dpi
+EPL_FONTS = {1: (12, 8), 2: (16, 10), 3: (20, 12), 4: (24, 14), 5: (48, 32)}
+
+
+def dots(points, dpi):
+    """
+        This definition converts a length in points into printer dots.
+
+        :param points: *A length in points* \n
+        :param dpi: *The resolution of the printer*
+
+        :return: *The length in dots, rounded*
+
+    """
+    return int(round(points * dpi / 72.0))
+
+
+def barcode_module(value, width, dpi):
+    """
+        This definition computes the narrow bar width, in dots, of a Code 39 barcode that fits in a box.
+
+        :param value: *The value to encode* \n
+        :param width: *The width of the box in points* \n
+        :param dpi: *The resolution of the printer*
+
+        :return: *A tuple (module, quiet) of the narrow bar width and the width of the quiet zone in dots*
+
+    """
+    bars, modules = code39_bars(value)
+    module = max(1, int(width * dpi / 72.0 / (modules + 2 * CODE39_QUIET)))
+    return module, module * CODE39_QUIET
+
+
+def zpl_text(text):
+    """
+        This definition escapes the field data of a ZPL field. The control characters of ZPL are written in
+        hexadecimal, which the ^FH command prefixed to the field turns back into characters.
+
+        :param text: *The text of the field*
+
+        :return: *The field data, prefixed with ^FH if needed*
+
+    """
+    if not any(char in text for char in '^~_'):
+        return '^FD%s' % text
+    return '^FH^FD%s' % text.replace('_', '_5F').replace('^', '_5E').replace('~', '_7E')
+
+
+def zpl_page(ops, dpi):
+    """
+        This definition converts the drawing operations of a page into a ZPL label. The barcodes are printed
+        with the native Code 39 command of the printer (^B3).
+
+        :param ops: *The drawing operations of a page, see labels.pair_labels()* \n
+        :param dpi: *The resolution of the printer*
+
+        :return: *The ZPL commands of the label*
+
+    """
+    commands = ['^XA^CI28^PW%d^LL%d' % (dots(LABEL_WIDTH, dpi), dots(LABEL_HEIGHT, dpi))]
+    for op in ops:
+        if op[0] == 'text':
+            x, y, size, bold, text = op[1:]
+            top = LABEL_HEIGHT - y - size * BASELINE
+            commands.append('^FO%d,%d^A0N,%d%s^FS' % (dots(x, dpi), dots(top, dpi), dots(size, dpi), zpl_text(text)))
+        elif op[0] == 'barcode':
+            x, y, width, height, value = op[1:]
+            try:
+                module, quiet = barcode_module(value, width, dpi)
+            except ValueError:
+                continue
+            commands.append('^FO%d,%d^BY%d,%.1f^B3N,N,%d,N,N%s^FS' % (dots(x, dpi) + quiet, dots(LABEL_HEIGHT - y - height, dpi),
+                                                                    module, CODE39_WIDE, dots(height, dpi), zpl_text(value.upper())))
+    commands.append('^XZ\n')
+    return ''.join(commands)
+
+
+def epl_text(text):
+    """
+        This definition quotes the data of an EPL command.
+
+        :param text: *The data of the command*
+
+        :return: *The quoted data*
+
+    """
+    return '"%s"' % text.replace('\\', '\\\\').replace('"', '\\"')
+
+
+def epl_page(ops, dpi):
+    """
+        This definition converts the drawing operations of a page into an EPL2 label. The texts are set in the
+        closest resident font of the printer and kept centered on the same point. The barcodes are printed with
+        the native Code 39 command of the printer.
+
+        :param ops: *The drawing operations of a page, see labels.pair_labels()* \n
+        :param dpi: *The resolution of the printer*
+
+        :return: *The EPL2 commands of the label*
+
+    """
+    commands = ['', 'N', 'q%d' % dots(LABEL_WIDTH, dpi), 'Q%d,24' % dots(LABEL_HEIGHT, dpi)]
+    for op in ops:
+        if op[0] == 'text':
+            x, y, size, bold, text = op[1:]
+            height = dots(size, dpi)
+            font = min(EPL_FONTS, key=lambda font: abs(EPL_FONTS[font][0] - height))
+            center = dots(x + text_width(text, size, bold) / 2.0, dpi)
+            left = max(0, center - EPL_FONTS[font][1] * len(text) // 2)
+            top = dots(LABEL_HEIGHT - y - size * BASELINE, dpi)
+            commands.append('A%d,%d,0,%d,1,1,N,%s' % (left, top, font, epl_text(text)))
+        elif op[0] == 'barcode':
+            x, y, width, height, value = op[1:]
+            try:
+                module, quiet = barcode_module(value, width, dpi)
+            except ValueError:
+                continue
+            commands.append('B%d,%d,0,3,%d,%d,%d,N,%s' % (dots(x, dpi) + quiet, dots(LABEL_HEIGHT - y - height, dpi),
+                                                         module, module * CODE39_WIDE, dots(height, dpi), epl_text(value.upper())))
+    commands.append('P1\n')
+    return '\n'.join(commands)
+
+
+# Printer languages by the output requested from the Table
+PRINTER_LANGUAGES = {
+    'zpl': zpl_page,
+    'epl': epl_page,
+}
+
+
+def print_labels(labels, layout, language, dpi=None):
+    """
+        This definition renders labels as raw commands for a thermal label printer, one printer label per pair
+        of labels, so that the printer draws the texts and barcodes itself at full speed.
+
+        :param labels: *An iterable of labels, i.e. objects with barcode, title, author, callnumber and
+                       author_mark attributes such as LabelRecord* \n
+        :param layout: *The type of label, one of labels.LABEL_LAYOUTS* \n
+        :param language: *The printer language, one of PRINTER_LANGUAGES* \n
+        :param dpi: *The resolution of the printer, defaults to PRINTER_DPI*
+
+        :return: *A generator of the printer commands*
+
+    """
+    page = PRINTER_LANGUAGES[language]
+    for ops in pair_labels(labels, layout):
+        yield page(ops, dpi or PRINTER_DPI)
@@ -0,0 +1,238 @@
+from django.db import connections
+from django.db.models import Q
+from django.conf import settings
+import re
+
+
+# Matches the alphabetic prefix of a barcode such as 'LIB' in 'LIB10001'
+PREFIX_REGEX = re.compile(r"[^\W\d]+")
+
+# Matches the numeric suffix of a barcode such as '10001' in 'LIB10001'
+SUFFIX_REGEX = re.compile(r"[0-9]+$")
+
+# Maximum number of barcodes sent to the Koha Database in a single IN (...) query
+BARCODE_BATCH_SIZE = getattr(settings, 'BARCODE_BATCH_SIZE', 1000)
+
+# Width up to which numeric barcodes may be zero-padded in Koha, e.g. 6 for 000123. 0 disables padding.
+BARCODE_PAD_WIDTH = getattr(settings, 'BARCODE_PAD_WIDTH', 0)
+
+# Whether the barcode column of a table compares case-insensitively, by Database alias and table
+_folds_case = dict()
+
+
+def split_barcode(barcode):
+    """
+        This definition splits an alphanumeric barcode into its alphabetic prefix and its numeric suffix.
+
+        :param barcode: *An alphanumeric barcode, e.g. LIB10001*
+
+        :return: *A tuple (prefix, suffix) or None if the barcode has no prefix or a non-numeric suffix*
+
+    """
+    match = PREFIX_REGEX.search(barcode)
+    if not match:
+        return None
+
+    prefix, suffix = barcode[match.start():match.end()], barcode[match.end():]
+    if not suffix.isdecimal():
+        return None
+
+    return prefix, suffix
+
+
+def folds_case(queryset):
+    """
+        This definition tells whether the Database of a queryset compares barcodes case-insensitively, i.e. the
+        barcode column of a MySQL table with a collation neither binary nor case-sensitive. SQLite, e.g. the
+        local mirror of Koha, compares them case-sensitively. The collation is read once per table.
+
+        :param queryset: *A queryset of Items or ItemMirror*
+
+        :return: *True if lib1 matches LIB1*
+
+    """
+    connection = connections[queryset.db]
+    table = queryset.model._meta.db_table
+    key = (connection.alias, table)
+    if key not in _folds_case:
+        collation = None
+        if connection.vendor == 'mysql':
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT COLLATION_NAME FROM information_schema.COLUMNS WHERE TABLE_SCHEMA = DATABASE() "
+                               "AND TABLE_NAME = %s AND COLUMN_NAME = 'barcode'", [table])
+                row = cursor.fetchone()
+                collation = row[0] if row else None
+        _folds_case[key] = bool(collation) and not collation.endswith(('_bin', '_cs'))
+    return _folds_case[key]
+
+
+def batched(iterable, size):
+    """
+        This definition groups the values of an iterable into lists of at most *size* values.
+
+        :param iterable: *Any iterable* \n
+        :param size: *Maximum length of every yielded list*
+
+        :return: *A generator of lists*
+
+    """
+    batch = []
+    for value in iterable:
+        batch.append(value)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def barcode_list(queryset, barcodes, batch_size=None):
+    """
+        This definition resolves a list of arbitrary barcodes with a bounded number of indexed `barcode IN (...)`
+        queries, one per batch of *batch_size* barcodes.
+
+        :param queryset: *A queryset of Items to which the barcode filter is applied* \n
+        :param barcodes: *An iterable of barcodes* \n
+        :param batch_size: *Number of barcodes per query, defaults to BARCODE_BATCH_SIZE*
+
+        :return: *A list of matching Items in the order of the given barcodes*
+
+    """
+    # The barcodes are queried as typed, since SQLite and the binary collations of MySQL compare them
+    # case-sensitively
+    position = dict()
+    for barcode in barcodes:
+        position.setdefault(barcode, len(position))
+
+    # The default collations of MySQL compare them case-insensitively, so an Item may be found by another case
+    folded = dict()
+    for barcode, index in position.items():
+        folded.setdefault(barcode.upper(), index)
+
+    items, found = [], set()
+    for batch in batched(position, batch_size or BARCODE_BATCH_SIZE):
+        for item in queryset.filter(barcode__in=batch):
+            if item.itemnumber not in found:
+                found.add(item.itemnumber)
+                items.append(item)
+
+    items.sort(key=lambda item: position.get(item.barcode, folded.get(item.barcode.upper(), len(position))))
+    return items
+
+
+def range_pad_width(start, end):
+    """
+        This definition returns the width up to which the numeric barcodes of a range may be zero-padded: the
+        widest bound typed with leading zeros, or BARCODE_PAD_WIDTH.
+
+        :param start: *The first barcode of the range* \n
+        :param end: *The last barcode of the range*
+
+        :return: *The width, 0 if the barcodes are not padded*
+
+    """
+    pad_width = BARCODE_PAD_WIDTH
+    for bound in (start, end):
+        if len(bound) > 1 and bound.startswith('0'):
+            pad_width = max(pad_width, len(bound))
+    return pad_width
+
+
+def numeric_range_filter(start, end, pad_width=None, prefix='', min_width=1):
+    """
+        This definition builds a filter matching every numeric barcode between *start* and *end* without casting
+        the barcode column. The range is split into one string range per barcode width, e.g. 95 - 1200 becomes
+        '95' - '99', '100' - '999' and '1000' - '1200', so that each part can be served by the unique index on
+        **items.barcode**. A pattern on the width keeps longer barcodes such as '1000A' or '10000' out of a range.
+
+        :param start: *The first barcode of the range* \n
+        :param end: *The last barcode of the range* \n
+        :param pad_width: *Width up to which barcodes may be zero-padded, defaults to the widest bound typed with
+                          leading zeros or BARCODE_PAD_WIDTH* \n
+        :param prefix: *An alphabetic prefix common to the barcodes, their numeric suffixes being the range* \n
+        :param min_width: *Width of the narrowest barcodes matched, e.g. pad_width when every number is written
+                          zero-padded to pad_width*
+
+        :return: `Q object <https://docs.djangoproject.com/en/2.2/topics/db/queries/#complex-lookups-with-q-objects>`_ - *A filter on the barcode field*
+
+    """
+    low, high = int(start), int(end)
+
+    if pad_width is None:
+        pad_width = range_pad_width(start, end)
+
+    query = Q(pk__in=[])
+    for width in range(max(1, min_width), max(len(str(high)), pad_width) + 1):
+        top = min(high, 10 ** width - 1)
+
+        # Only the widths up to pad_width may hold numbers with leading zeros
+        if width <= pad_width:
+            bottom = low
+        else:
+            bottom = max(low, 10 ** (width - 1) if width > 1 else 0)
+
+        if bottom > top:
+            continue
+
+        query |= Q(barcode__range=(prefix + str(bottom).zfill(width), prefix + str(top).zfill(width)),
+                   barcode__regex=r'^%s[0-9]{%d}$' % (re.escape(prefix), width))
+
+    return query
+
+
+def range_filter(start, end):
+    """
+        This definition builds a filter matching every barcode between *start* and *end*, either numeric barcodes
+        or barcodes made of the same alphabetic prefix and a numeric suffix, see numeric_range_filter(). The
+        filter can be combined with other filters, ordered and paginated.
+
+        :param start: *The first barcode of the range* \n
+        :param end: *The last barcode of the range*
+
+        :return: `Q object <https://docs.djangoproject.com/en/2.2/topics/db/queries/#complex-lookups-with-q-objects>`_ - *A filter on the barcode field, or None if the range is invalid*
+
+    """
+    if start.isdecimal() and end.isdecimal():
+        return numeric_range_filter(start, end)
+
+    split_start, split_end = split_barcode(start), split_barcode(end)
+    if not (split_start and split_end) or split_start[0] != split_end[0]:
+        return None
+
+    # Every suffix is written at the width of a zero-padded first suffix, e.g. LIB0995 - LIB1005 holds LIB0999
+    # but not LIB999
+    width = len(split_start[1]) if split_start[1].startswith('0') else 0
+    return numeric_range_filter(split_start[1], split_end[1], width, split_start[0], width)
+
+
+def alphanumeric_range(queryset, start, end):
+    """
+        This definition resolves a range of barcodes, e.g. LIB10001 - LIB15000, with the single indexed query of
+        range_filter() rather than one query per barcode, so the cost of a range follows the Items found and not
+        the width of the range.
+
+        :param queryset: *A queryset of Items to which the range filter is applied* \n
+        :param start: *The first barcode of the range* \n
+        :param end: *The last barcode of the range*
+
+        :return: *A list of matching Items in the order of the range, or None if the range is invalid*
+
+    """
+    query = range_filter(start, end)
+    if query is None:
+        return None
+    return sort_range(list(queryset.filter(query)))
+
+
+def sort_range(items):
+    """
+        This definition sorts the Items of a range by the number of their barcodes rather than as strings,
+        e.g. LIB999 before LIB1000.
+
+        :param items: *A list of Items matched by range_filter()*
+
+        :return: *The same list, sorted*
+
+    """
+    items.sort(key=lambda item: int(SUFFIX_REGEX.search(item.barcode).group()))
+    return items
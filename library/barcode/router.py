@@ -1,3 +1,121 @@
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.db.utils import DatabaseError, InterfaceError, OperationalError
+import random, threading, time
+
+
+# Aliases of the read replicas of the Koha Database, the reads of the Koha tables are spread across them
+KOHA_REPLICAS = getattr(settings, 'KOHA_REPLICAS', [])
+
+# Seconds a replica is left out after a connection error before it is tried again
+KOHA_REPLICA_RETRY = getattr(settings, 'KOHA_REPLICA_RETRY', 30)
+
+# Weight of the latest query in the moving average of the latency of a replica
+KOHA_LATENCY_WEIGHT = 0.2
+
+
+class ReplicaSet:
+    """
+        A class representing the read replicas of the Koha Database, with the moving average of the latency of
+        their queries and the time until which the replicas found down are left out. It is shared by every
+        thread of the process.
+    """
+
+    def __init__(self, aliases, retry):
+        self.aliases = list(aliases)
+        self.retry = retry
+        self.latency = dict.fromkeys(self.aliases, 0.0)
+        self.down_until = dict.fromkeys(self.aliases, 0.0)
+        self.lock = threading.Lock()
+
+    def choose(self, exclude=()):
+        """
+            This definition chooses a replica for a read. Of two replicas taken at random among those up, the
+            faster one is chosen, so the load follows the latency without every read going to the same replica.
+
+            :param exclude: *Replicas not to choose, e.g. those already tried*
+
+            :return: *The alias of the replica, or None if none is up*
+
+        """
+        now = time.monotonic()
+        available = [alias for alias in self.aliases if alias not in exclude and self.down_until[alias] <= now]
+        if len(available) > 2:
+            available = random.sample(available, 2)
+        return min(available, key=self.latency.get) if available else None
+
+    def record(self, alias, seconds):
+        """
+            This definition adds the duration of a query to the moving average of the latency of a replica.
+
+            :param alias: *The alias of the replica* \n
+            :param seconds: *The duration of the query*
+
+        """
+        with self.lock:
+            previous = self.latency[alias]
+            self.latency[alias] = seconds if not previous else previous + KOHA_LATENCY_WEIGHT * (seconds - previous)
+
+    def mark_down(self, alias):
+        """
+            This definition leaves a replica out for KOHA_REPLICA_RETRY seconds after a connection error.
+
+            :param alias: *The alias of the replica*
+
+        """
+        with self.lock:
+            self.down_until[alias] = time.monotonic() + self.retry
+
+    def is_up(self, alias):
+        """
+            This definition checks whether a replica is not left out.
+
+            :param alias: *The alias of the replica*
+
+            :return: *A boolean value*
+
+        """
+        return self.down_until[alias] <= time.monotonic()
+
+    def __call__(self, execute, sql, params, many, context):
+        """
+            This definition wraps the queries run on the replicas to measure their latency and to leave a replica
+            out as soon as its connection fails. `See more on execute wrappers... <https://docs.djangoproject.com/en/2.2/topics/db/instrumentation/>`_
+
+            .. note:: The failed query is not retried on another replica. Its rows are fetched by the ORM from the
+                      cursor of the failed connection, which a wrapper cannot hand over to another connection, and
+                      the query may belong to a transaction. The next reads are routed to another replica.
+        """
+        alias = context['connection'].alias
+        start = time.monotonic()
+        try:
+            result = execute(sql, params, many, context)
+        except (InterfaceError, OperationalError):
+            self.mark_down(alias)
+            raise
+        self.record(alias, time.monotonic() - start)
+        return result
+
+
+replicas = ReplicaSet(KOHA_REPLICAS, KOHA_REPLICA_RETRY)
+
+
+def watch_replica(sender, connection, **kwargs):
+    """
+        This definition wraps the queries of every new connection to a replica, see ReplicaSet.__call__().
+
+        :param sender: *The class of the database backend* \n
+        :param connection: *The new connection*
+
+    """
+    if connection.alias in replicas.aliases and replicas not in connection.execute_wrappers:
+        connection.execute_wrappers.append(replicas)
+
+
+connection_created.connect(watch_replica)
+
+
 class KohaRouter:
     """
         This class handles the routing of the queries for the Koha Database. It is a router 
@@ -8,19 +126,37 @@ class KohaRouter:
     def db_for_read(self, model, **hints):
         """
             It suggests the database that should be used for read operations for objects of type model. 
-            If the *app_label* of the model indicates a Koha table *koha_data*, then the name of Koha Database 
-            **koha_db** is returned. Otherwise, **default** Database is returned.
+            If the *app_label* of the model indicates a Koha table *koha_data*, then one of the read replicas of
+            KOHA_REPLICAS is returned, see ReplicaSet.choose(). A replica that cannot be connected to is left out
+            and another one is tried, and the name of Koha Database **koha_db** is returned if none is up. A
+            replica failing once connected is left out too, see ReplicaSet.__call__(), but the failed query is
+            not retried. Otherwise, **default** Database is returned. The related objects of a Koha object are
+            read from the same Database as the object, if still up.
             
             :param model: *A model schema of one of the Koha Tables* \n
             :param hints: *Used by certain operations to communicate additional info to the router.*
             :return: *The name of the database to chose for read operation*
 
-            .. note:: - `hints` is not required here.
+            .. note:: - `hints` may hold the *instance* the related objects are read for.
                       - `See more on hints... <https://docs.djangoproject.com/en/2.1/topics/db/multi-db/#hints>`_
 
         """ 
         if model._meta.app_label == 'koha_data':
-            return 'koha_db'
+            instance = hints.get('instance')
+            if instance is not None and instance._state.db in replicas.aliases and replicas.is_up(instance._state.db):
+                return instance._state.db
+
+            tried = []
+            while True:
+                alias = replicas.choose(exclude=tried)
+                if alias is None:
+                    return 'koha_db'
+                try:
+                    connections[alias].ensure_connection()
+                    return alias
+                except DatabaseError:
+                    replicas.mark_down(alias)
+                    tried.append(alias)
         return 'default'
 
     def db_for_write(self, model, **hints):
@@ -75,7 +211,25 @@ class KohaRouter:
             :return: *A boolean value indicating whether to sync db or not.*
 
         """ 
-        if db == 'koha_db' or model._meta.app_label == "koha_data":
+        if db == 'koha_db' or db in replicas.aliases or model._meta.app_label == "koha_data":
             return False # do not syncdb on koha database
         else: # but all other models/databases are fine
-            return True
\ No newline at end of file
+            return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        """
+            This definition allows whether the migration operation should be run on the database *db*. The Koha
+            tables are never migrated and the tables of the Barcode App, e.g. its label cache, are only created
+            on the **default** Database.
+
+            :param db: *The alias of the database for which the migration is requested* \n
+            :param app_label: *The label of the application being migrated* \n
+            :param model_name: *The name of the model being migrated, if any* \n
+            :param hints: *Used by certain operations to communicate additional info to the router.*
+
+            :return: *A boolean value indicating whether to migrate db or not.*
+
+        """
+        if db == 'koha_db' or db in replicas.aliases or app_label == 'koha_data':
+            return False
+        return db == 'default'
@@ -0,0 +1,192 @@
+from django.conf import settings
+from functools import lru_cache
+from .labels import BASELINE, LINE_HEIGHT, fit_text, format_text, pdf_page, wrap_text
+from .pdf import compress_page, text_width, write_pdf
+
+
+# Templates of the labels printed on sheets, by the type of label, declared as data. Sizes are in points and
+# margins are [left, top, right, bottom]. The fields are stacked from the top of the label, each one centered:
+#     text - *The attribute of the label printed, with its font size, bold, the maximum number of lines and
+#            whether it is formatted, see labels.format_text()*
+#     barcode - *The attribute of the label encoded in Code 39, with the width and height of the barcode*
+#     space - *A blank space of the given height*
+LABEL_TEMPLATES = getattr(settings, 'LABEL_TEMPLATES', {
+    'barcode_data': {
+        'size': (2.625 * 72, 1 * 72),
+        'margins': (6, 5, 6, 4),
+        'fields': (
+            {'text': 'barcode', 'size': 11, 'bold': True},
+            {'space': 1},
+            {'barcode': 'barcode', 'width': 150, 'height': 24},
+            {'space': 2},
+            {'text': 'title', 'size': 8, 'format': True},
+            {'text': 'author', 'size': 8, 'format': True},
+        ),
+    },
+    'spine_data': {
+        'size': (1.5 * 72, 1 * 72),
+        'margins': (4, 5, 4, 4),
+        'fields': (
+            {'text': 'callnumber', 'size': 12, 'bold': True, 'lines': 2},
+            {'text': 'author_mark', 'size': 12, 'bold': True, 'format': True},
+            {'text': 'barcode', 'size': 12, 'bold': True},
+        ),
+    },
+})
+
+# Sheets the labels are packed on, as many as fit: page size, margins [left, top, right, bottom] and gaps
+# [horizontal, vertical] between the labels, in points. The grid of labels is centered between the margins.
+LABEL_SHEETS = getattr(settings, 'LABEL_SHEETS', {
+    'a4': {'page': (595.28, 841.89), 'margins': (12, 36, 12, 36), 'gap': (0, 0)},
+    'letter': {'page': (612, 792), 'margins': (13.5, 36, 13.5, 36), 'gap': (9, 0)},
+})
+
+
+@lru_cache(maxsize=None)
+def compile_template(layout):
+    """
+        This definition computes once the position of every field of a label template, relative to the top left
+        corner of the label, so that only the texts themselves are measured for every label.
+
+        :param layout: *The type of label, one of LABEL_TEMPLATES*
+
+        :return: *A tuple of ('text', attribute, top, size, bold, lines, format) and ('barcode', attribute,
+                 top, width, height) slots*
+
+    """
+    template = LABEL_TEMPLATES[layout]
+    left, top, right, bottom = template['margins']
+    slots = []
+    for field in template['fields']:
+        if 'text' in field:
+            size = field['size']
+            lines = field.get('lines', 1)
+            slots.append(('text', field['text'], top, size, field.get('bold', False), lines, field.get('format', False)))
+            top += lines * size * LINE_HEIGHT
+        elif 'barcode' in field:
+            slots.append(('barcode', field['barcode'], top, field['width'], field['height']))
+            top += field['height']
+        else:
+            top += field['space']
+    return tuple(slots)
+
+
+@lru_cache(maxsize=None)
+def sheet_grid(sheet, layout):
+    """
+        This definition computes once the position of every label on a sheet, row by row. The grid holds as
+        many labels as fit between the margins and is centered between them.
+
+        :param sheet: *The sheet, one of LABEL_SHEETS* \n
+        :param layout: *The type of label, one of LABEL_TEMPLATES*
+
+        :return: *A tuple of (x, y) of the lower left corner of every label, in points from the lower left
+                 corner of the page*
+
+    """
+    page_width, page_height = LABEL_SHEETS[sheet]['page']
+    left, top, right, bottom = LABEL_SHEETS[sheet]['margins']
+    gap_x, gap_y = LABEL_SHEETS[sheet].get('gap', (0, 0))
+    width, height = LABEL_TEMPLATES[layout]['size']
+
+    columns = max(1, int((page_width - left - right + gap_x) // (width + gap_x)))
+    rows = max(1, int((page_height - top - bottom + gap_y) // (height + gap_y)))
+    left += (page_width - left - right - columns * (width + gap_x) + gap_x) / 2.0
+    top += (page_height - top - bottom - rows * (height + gap_y) + gap_y) / 2.0
+
+    return tuple((left + column * (width + gap_x), page_height - top - row * (height + gap_y) - height)
+                 for row in range(rows) for column in range(columns))
+
+
+def label_ops(layout, label, x, y):
+    """
+        This definition lays out a label of a template at the given position.
+
+        :param layout: *The type of label, one of LABEL_TEMPLATES* \n
+        :param label: *A label, i.e. an object with barcode, title, author, callnumber and author_mark attributes* \n
+        :param x: *The left edge of the label* \n
+        :param y: *The bottom edge of the label*
+
+        :return: *A list of drawing operations, see labels.barcode_page()*
+
+    """
+    width, height = LABEL_TEMPLATES[layout]['size']
+    left, top, right, bottom = LABEL_TEMPLATES[layout]['margins']
+    inner = width - left - right
+    top = y + height
+    ops = []
+    for slot in compile_template(layout):
+        if slot[0] == 'text':
+            attribute, offset, size, bold, lines, formatted = slot[1:]
+            text = getattr(label, attribute) or ''
+            text = format_text(text) if formatted else text
+            if lines > 1:
+                text_lines = wrap_text(text, inner, size, bold)[:lines]
+            else:
+                text_lines = [text]
+            line_top = top - offset
+            for line in text_lines:
+                line = fit_text(line, inner, size, bold)
+                if line:
+                    ops.append(('text', x + left + (inner - text_width(line, size, bold)) / 2.0,
+                                line_top - size * BASELINE, size, bold, line))
+                line_top -= size * LINE_HEIGHT
+        else:
+            attribute, offset, barcode_width, barcode_height = slot[1:]
+            barcode_width = min(barcode_width, inner)
+            ops.append(('barcode', x + left + (inner - barcode_width) / 2.0, top - offset - barcode_height,
+                        barcode_width, barcode_height, getattr(label, attribute)))
+    return ops
+
+
+def pack_labels(labels, layout, sheet):
+    """
+        This definition packs labels on sheets, as many per sheet as fit, instead of one pair per page.
+
+        :param labels: *An iterable of labels* \n
+        :param layout: *The type of label, one of LABEL_TEMPLATES* \n
+        :param sheet: *The sheet, one of LABEL_SHEETS*
+
+        :return: *A generator of the drawing operations of every sheet*
+
+    """
+    grid = sheet_grid(sheet, layout)
+    ops = []
+    index = 0
+    for label in labels:
+        ops.extend(label_ops(layout, label, *grid[index]))
+        index += 1
+        if index == len(grid):
+            yield ops
+            ops = []
+            index = 0
+    if ops:
+        yield ops
+
+
+def sheet_capacity(sheet, layout):
+    """
+        This definition returns the number of labels packed on a sheet.
+
+        :param sheet: *The sheet, one of LABEL_SHEETS* \n
+        :param layout: *The type of label, one of LABEL_TEMPLATES*
+
+        :return: *The number of labels per sheet*
+
+    """
+    return len(sheet_grid(sheet, layout))
+
+
+def render_sheets(labels, layout, sheet):
+    """
+        This definition renders labels as a PDF document of sheets, e.g. A4 or Letter, for sheet-fed printers.
+
+        :param labels: *An iterable of labels* \n
+        :param layout: *The type of label, one of LABEL_TEMPLATES* \n
+        :param sheet: *The sheet, one of LABEL_SHEETS*
+
+        :return: *A generator of the bytes of the PDF document*
+
+    """
+    pages = (compress_page(pdf_page(ops)) for ops in pack_labels(labels, layout, sheet))
+    return write_pdf(pages, *LABEL_SHEETS[sheet]['page'])
@@ -0,0 +1,85 @@
+from django.conf import settings
+from django.db.models import Q
+from .callnumbers import callnumber_sort_key
+from .items import get_labels
+
+
+# Number of Items read per query when walking the shelves in call number order
+SHELF_PAGE_SIZE = getattr(settings, 'SHELF_PAGE_SIZE', 1000)
+
+
+def shelf_filter(start, end, location='', homebranch=''):
+    """
+        This definition builds a filter matching the Items shelved between two call numbers, compared by their
+        **cn_sort** keys so that the span follows the shelf order rather than the order of the strings. The
+        last call number takes along every Item filed under it, e.g. 823.914 ROW v.2 for 823.914 ROW.
+
+        :param start: *The call number the span starts at, e.g. 823* \n
+        :param end: *The call number the span ends at, e.g. 823.914 ROW* \n
+        :param location: *The shelving location of the Items, if any, e.g. GEN* \n
+        :param homebranch: *The home branch of the Items, if any*
+
+        :return: `Q object <https://docs.djangoproject.com/en/2.2/topics/db/queries/#complex-lookups-with-q-objects>`_ - *A filter on the cn_sort field, or None if the span is invalid*
+
+    """
+    low, high = callnumber_sort_key(start), callnumber_sort_key(end)
+    if not low or not high or low > high:
+        return None
+
+    query = Q(cn_sort__range=(low, high)) | Q(cn_sort__startswith=high)
+    if location:
+        query &= Q(location=location)
+    if homebranch:
+        query &= Q(homebranch=homebranch)
+    return query
+
+
+def after_shelf(cn_sort, itemnumber):
+    """
+        This definition builds a filter matching the Items shelved after a given Item, ties on the call number
+        being broken by the itemnumber.
+
+        :param cn_sort: *The cn_sort of the Item* \n
+        :param itemnumber: *The itemnumber of the Item*
+
+        :return: `Q object <https://docs.djangoproject.com/en/2.2/topics/db/queries/#complex-lookups-with-q-objects>`_ - *A filter on the cn_sort and itemnumber fields*
+
+    """
+    return Q(cn_sort__gt=cn_sort) | Q(cn_sort=cn_sort, itemnumber__gt=itemnumber)
+
+
+def shelf_pages(queryset, size=None):
+    """
+        This definition reads Items in shelf order, page by page. Every page starts right after the last Item
+        of the previous one on (cn_sort, itemnumber) instead of skipping rows, so a whole floor can be walked
+        with a bounded amount of memory and without the cost of the offsets growing along the way.
+
+        :param queryset: *A queryset of the Items returned by items.get_items(), e.g. filtered by shelf_filter()* \n
+        :param size: *Number of Items per page, defaults to SHELF_PAGE_SIZE*
+
+        :return: *A generator of lists of Items*
+
+    """
+    queryset = queryset.order_by('cn_sort', 'itemnumber')
+    size = size or SHELF_PAGE_SIZE
+    page = list(queryset[:size])
+    while page:
+        yield page
+        if len(page) < size:
+            break
+        page = list(queryset.filter(after_shelf(page[-1].cn_sort, page[-1].itemnumber))[:size])
+
+
+def shelf_labels(queryset, size=None):
+    """
+        This definition resolves the labels of Items in shelf order, page by page, see shelf_pages().
+
+        :param queryset: *A queryset of the Items returned by items.get_items(), e.g. filtered by shelf_filter()* \n
+        :param size: *Number of Items per page, defaults to SHELF_PAGE_SIZE*
+
+        :return: *A generator of labels*
+
+    """
+    for page in shelf_pages(queryset, size):
+        for item in get_labels(page):
+            yield item.label
@@ -0,0 +1,191 @@
+from django.db import connections, transaction
+from django.utils import timezone
+from .callnumbers import callnumber_sort_key
+from .models import Biblio, BiblioMetadata, Biblioitems, Branches, Items
+from .ranges import batched, BARCODE_BATCH_SIZE
+from datetime import timedelta
+import random
+
+
+# Koha tables of the synthetic fixture, in the order they are created
+KOHA_MODELS = (Branches, Biblio, Biblioitems, BiblioMetadata, Items)
+
+# Values spread over the synthetic Items
+SYNTHETIC_BRANCHES = ('MAIN', 'EAST', 'WEST', 'SCI')
+SYNTHETIC_ITYPES = ('BOOK', 'REF', 'THESIS', 'CD')
+SYNTHETIC_LOCATIONS = ('GEN', 'REF', 'STACK', 'NEW')
+SYNTHETIC_WORDS = ('history', 'modern', 'theory', 'introduction', 'principles', 'systems', 'language', 'world',
+                   'science', 'practice', 'analysis', 'design', 'methods', 'advanced', 'handbook', 'studies')
+SYNTHETIC_SURNAMES = ('Rowling', 'Peters', 'Knuth', 'Tagore', 'Austen', 'Narayan', 'Orwell', 'Hopper', 'Dijkstra',
+                      'Lovelace', 'Ramanujan', 'Turing', 'Woolf', 'Achebe', 'Murakami', 'Borges')
+
+# Prefix of the alphanumeric barcodes, the first half of the Items have numeric barcodes from NUMERIC_BARCODE_START
+ALPHANUMERIC_PREFIX = 'LIB'
+NUMERIC_BARCODE_START = 100000
+
+# A MARCXML record of a Biblio, of the size of a typical Koha record, with its author in 700$a
+MARC_RECORD = (
+    '<?xml version="1.0" encoding="UTF-8"?>\n'
+    '<record xmlns="http://www.loc.gov/MARC21/slim">'
+    '<leader>00000nam a22000007a 4500</leader>'
+    '<controlfield tag="001">{biblionumber}</controlfield>'
+    '<controlfield tag="008">190101s2019    ii            000 0 eng d</controlfield>'
+    '<datafield tag="020" ind1=" " ind2=" "><subfield code="a">978{biblionumber:010d}</subfield></datafield>'
+    '<datafield tag="082" ind1="0" ind2="4"><subfield code="a">{classification}</subfield></datafield>'
+    '<datafield tag="245" ind1="1" ind2="0"><subfield code="a">{title}</subfield>'
+    '<subfield code="c">{author}</subfield></datafield>'
+    '<datafield tag="260" ind1=" " ind2=" "><subfield code="a">New Delhi</subfield>'
+    '<subfield code="b">Synthetic Press</subfield><subfield code="c">2019</subfield></datafield>'
+    '<datafield tag="300" ind1=" " ind2=" "><subfield code="a">xii, 348 p.</subfield>'
+    '<subfield code="c">24 cm</subfield></datafield>'
+    '<datafield tag="650" ind1=" " ind2="0"><subfield code="a">{subject}</subfield></datafield>'
+    '<datafield tag="700" ind1="1" ind2=" "><subfield code="a">{author}</subfield>'
+    '<subfield code="e">author</subfield></datafield>'
+    '<datafield tag="942" ind1=" " ind2=" "><subfield code="c">BOOK</subfield></datafield>'
+    '<datafield tag="999" ind1=" " ind2=" "><subfield code="c">{biblionumber}</subfield></datafield>'
+    '</record>'
+)
+
+
+def synthetic_barcode(itemnumber, items):
+    """
+        This definition returns the barcode of a synthetic Item. The first half of the Items have numeric
+        barcodes and the second half alphanumeric ones, e.g. 100001 and LIB005001 for 10000 Items.
+
+        :param itemnumber: *The itemnumber of the Item, from 1* \n
+        :param items: *The number of synthetic Items*
+
+        :return: *The barcode*
+
+    """
+    if itemnumber <= items // 2:
+        return str(NUMERIC_BARCODE_START + itemnumber)
+    return '%s%06d' % (ALPHANUMERIC_PREFIX, itemnumber)
+
+
+def synthetic_callnumber(rng):
+    """
+        This definition draws the itemcallnumber of a synthetic Item, mostly Dewey numbers followed by an
+        author mark, some of them written as a single word and a few missing.
+
+        :param rng: *A random.Random object*
+
+        :return: *A tuple (itemcallnumber, cn_sort)*
+
+    """
+    draw = rng.random()
+    if draw < 0.02:
+        return None, None
+
+    classification = '%03d.%d' % (rng.randint(0, 999), rng.randint(0, 999))
+    mark = rng.choice(SYNTHETIC_SURNAMES)[:3].upper()
+    separator = '' if draw < 0.2 else ' '
+    itemcallnumber = classification + separator + mark
+    return itemcallnumber, callnumber_sort_key(itemcallnumber)
+
+
+def koha_tables(alias):
+    """
+        This definition lists the Koha tables of the fixture already present in a Database.
+
+        :param alias: *The alias of the Database*
+
+        :return: *A list of table names*
+
+    """
+    existing = set(connections[alias].introspection.table_names())
+    return [model._meta.db_table for model in KOHA_MODELS if model._meta.db_table in existing]
+
+
+def create_koha_tables(alias):
+    """
+        This definition creates the tables of the unmanaged Koha models in a Database standing in for Koha, e.g.
+        a local SQLite file or an empty MySQL schema.
+
+        :param alias: *The alias of the Database*
+
+    """
+    with connections[alias].schema_editor() as editor:
+        for model in KOHA_MODELS:
+            editor.create_model(model)
+
+
+def drop_koha_tables(alias):
+    """
+        This definition drops the tables created by create_koha_tables().
+
+        :param alias: *The alias of the Database*
+
+    """
+    with connections[alias].schema_editor() as editor:
+        for model in reversed(KOHA_MODELS):
+            editor.delete_model(model)
+
+
+def seed_koha(alias, items, biblios, marc_ratio=0.5, seed=0):
+    """
+        This definition fills the Koha tables of a Database with synthetic Biblios, their MARC records and their
+        Items. The same arguments always give the same data, so runs of the benchmarks can be compared.
+
+        :param alias: *The alias of the Database, see create_koha_tables()* \n
+        :param items: *The number of Items* \n
+        :param biblios: *The number of Biblios the Items are spread over* \n
+        :param marc_ratio: *The share of the Biblios whose author is only found in their MARC record* \n
+        :param seed: *The seed of the random values*
+
+        :return: *A dictionary of the bounds of the numeric and alphanumeric barcodes and the biblionumbers of
+                 the Biblios without an author*
+
+    """
+    rng = random.Random(seed)
+    now = timezone.now()
+    biblios = max(1, min(biblios, items))
+    marc_only = []
+
+    with transaction.atomic(using=alias):
+        Branches.objects.using(alias).bulk_create(
+            Branches(branchcode=code, branchname=code.title()) for code in SYNTHETIC_BRANCHES)
+
+        for batch in batched(range(1, biblios + 1), BARCODE_BATCH_SIZE):
+            records, metadata, biblioitems = [], [], []
+            for biblionumber in batch:
+                title = ' '.join(rng.choice(SYNTHETIC_WORDS) for _ in range(rng.randint(2, 8))).capitalize()
+                author = '%s, %s.' % (rng.choice(SYNTHETIC_SURNAMES), rng.choice('ABCDEFGHJKLMNPRS'))
+                if rng.random() < marc_ratio:
+                    marc_only.append(biblionumber)
+                    record_author = None
+                else:
+                    record_author = author
+                records.append(Biblio(biblionumber=biblionumber, frameworkcode='', title=title,
+                                      author=record_author, datecreated=now.date(), timestamp=now))
+                metadata.append(BiblioMetadata(biblionumber_id=biblionumber, format='marcxml', marcflavour='MARC21',
+                                               metadata=MARC_RECORD.format(biblionumber=biblionumber, title=title,
+                                                                           author=author, subject=title.split()[0],
+                                                                           classification=rng.randint(0, 999))))
+                biblioitems.append(Biblioitems(biblioitemnumber=biblionumber, biblionumber_id=biblionumber,
+                                               itemtype='BOOK', timestamp=now))
+            Biblio.objects.using(alias).bulk_create(records)
+            BiblioMetadata.objects.using(alias).bulk_create(metadata)
+            Biblioitems.objects.using(alias).bulk_create(biblioitems)
+
+        for batch in batched(range(1, items + 1), BARCODE_BATCH_SIZE):
+            rows = []
+            for itemnumber in batch:
+                biblionumber = rng.randint(1, biblios)
+                itemcallnumber, cn_sort = synthetic_callnumber(rng)
+                branch = rng.choice(SYNTHETIC_BRANCHES)
+                rows.append(Items(itemnumber=itemnumber, biblionumber_id=biblionumber,
+                                  biblioitemnumber_id=biblionumber, barcode=synthetic_barcode(itemnumber, items),
+                                  dateaccessioned=(now - timedelta(days=rng.randint(0, 365))).date(),
+                                  homebranch_id=branch, holdingbranch_id=branch, itemcallnumber=itemcallnumber,
+                                  cn_source='ddc', cn_sort=cn_sort, itype=rng.choice(SYNTHETIC_ITYPES),
+                                  location=rng.choice(SYNTHETIC_LOCATIONS),
+                                  withdrawn=1 if rng.random() < 0.01 else 0, timestamp=now))
+            Items.objects.using(alias).bulk_create(rows)
+
+    half = items // 2
+    return {
+        'numeric': (NUMERIC_BARCODE_START + 1, NUMERIC_BARCODE_START + half) if half else None,
+        'alphanumeric': (half + 1, items) if items > half else None,
+        'marc_only': marc_only,
+    }
@@ -0,0 +1,616 @@
+from datetime import timedelta
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connections
+from django.db.utils import OperationalError
+from django.test import TestCase, SimpleTestCase
+from django.urls import reverse
+from django.test.utils import CaptureQueriesContext
+from io import StringIO
+from django.utils import timezone
+from barcode import jobs, router
+from barcode.backends import pool
+from barcode.backends.sqlite3.base import DatabaseWrapper as PooledSQLiteWrapper
+from barcode.basket import add_to_basket
+from barcode.callnumbers import callnumber_sort_key, parse_callnumber
+from barcode.imports import import_barcodes, read_barcodes
+from barcode.items import LabelItem, get_items, get_labels, label_items
+from barcode.lookups import lookup_barcodes
+from barcode.models import Biblio, ItemMirror, Items, PrintJob
+from barcode.ranges import barcode_list, folds_case, numeric_range_filter
+from barcode.synthetic import create_koha_tables, drop_koha_tables, seed_koha
+from unittest import mock
+import os, shutil, sqlite3, tempfile, time
+
+
+class KohaTestCase(TestCase):
+    """
+        A class representing tests run against a synthetic Koha Database, see synthetic.seed_koha(). The Koha
+        tables are created and seeded once for the class, before its transactions, since the Koha models are
+        not migrated.
+    """
+    databases = {'default', 'koha_db'}
+    items = 2000
+    biblios = 1000
+
+    @classmethod
+    def setUpClass(cls):
+        create_koha_tables('koha_db')
+        cls.fixture = seed_koha('koha_db', cls.items, cls.biblios, marc_ratio=0.5, seed=0)
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        drop_koha_tables('koha_db')
+
+
+class NumericRangeTests(KohaTestCase):
+    """
+        A class representing the tests of the numeric barcode ranges, see ranges.numeric_range_filter().
+    """
+
+    def test_range_uses_barcode_index(self):
+        """
+            This definition checks that the query plan of a numeric range reads the unique index on
+            items.barcode rather than scanning the whole table.
+        """
+        first, last = self.fixture['numeric']
+        queryset = Items.objects.filter(numeric_range_filter(str(first + 10), str(first + 500)))
+        plan = queryset.explain()
+
+        vendor = connections['koha_db'].vendor
+        if vendor == 'sqlite':
+            self.assertIn('USING INDEX', plan)
+            self.assertNotIn('SCAN items', plan.replace('TABLE ', ''))
+        elif vendor == 'mysql':
+            self.assertIn('range', plan)
+            self.assertIn('barcode', plan)
+        else:
+            self.skipTest("No query plan check for %s" % vendor)
+
+    def test_range_matches_cast(self):
+        """
+            This definition checks that the string ranges find the same Items as a numeric comparison.
+        """
+        first, last = self.fixture['numeric']
+        low, high = first + 95, first + 1200
+        found = set(Items.objects.filter(numeric_range_filter(str(low), str(high))).values_list('barcode', flat=True))
+        expected = {barcode for barcode in Items.objects.values_list('barcode', flat=True)
+                    if barcode.isdecimal() and low <= int(barcode) <= high}
+        self.assertEqual(found, expected)
+
+
+class LabelQueriesTests(KohaTestCase):
+    """
+        A class representing the tests of the number of round trips to the Koha Database needed to resolve the
+        labels of a range, see items.get_items() and authors.load_authors(). The label cache is disabled, so
+        every label is resolved from Koha.
+    """
+
+    def resolve_range(self, count, queries):
+        """
+            This definition resolves the labels of a numeric range with a given number of queries to Koha.
+
+            :param count: *The number of barcodes of the range* \n
+            :param queries: *The expected number of queries*
+
+            :return: *The number of Items found*
+
+        """
+        first, last = self.fixture['numeric']
+        with mock.patch('barcode.cache.LABEL_CACHE_SIZE', 0), self.assertNumQueries(queries, using='koha_db'):
+            data = get_labels(list(get_items().filter(numeric_range_filter(str(first), str(first + count - 1)))))
+            rows = [(item.label.title, item.label.author, item.label.callnumber) for item in data]
+        return len(rows)
+
+    def test_query_count_does_not_grow_with_range(self):
+        """
+            This definition checks that a range of 10 Items and a range of 500 Items take the same 2 queries:
+            the Items with their Biblios, then the MARC records of the Biblios without an author.
+        """
+        small = self.resolve_range(10, 2)
+        large = self.resolve_range(500, 2)
+        self.assertGreater(large, small)
+
+
+class BarcodeListTests(KohaTestCase):
+    """
+        A class representing the tests of the lookups of arbitrary barcodes, see ranges.barcode_list() and
+        lookups.lookup_barcodes().
+    """
+
+    def setUp(self):
+        printable = Items.objects.filter(withdrawn=0).order_by('itemnumber')
+        self.lower, self.upper = printable[0], printable[1]
+        Items.objects.filter(itemnumber=self.lower.itemnumber).update(barcode='lib-lower1')
+
+    def test_barcode_list_keeps_case(self):
+        """
+            This definition checks that a lowercase barcode is found on a backend comparing barcodes
+            case-sensitively, and that the Items keep the order of the barcodes.
+        """
+        data = barcode_list(get_items(), [self.upper.barcode, 'lib-lower1', 'missing'])
+        self.assertEqual([item.itemnumber for item in data], [self.upper.itemnumber, self.lower.itemnumber])
+
+    def test_lookup_barcodes_keeps_case(self):
+        """
+            This definition checks that the lookups in chunks find the same Items as barcode_list(). The chunks
+            are looked up in the test thread, whose transaction holds the renamed Item.
+        """
+        with mock.patch('barcode.lookups.KOHA_LOOKUP_THREADS', 0), \
+                mock.patch('barcode.lookups.KOHA_LOOKUP_CHUNK_SIZE', 1):
+            data = lookup_barcodes(get_items(), ['lib-lower1', self.upper.barcode, 'lib-lower1'])
+        self.assertEqual([item.itemnumber for item in data], [self.lower.itemnumber, self.upper.itemnumber])
+
+
+class ImportTests(KohaTestCase):
+    """
+        A class representing the tests of the imports of barcode files, see imports.import_barcodes().
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user('importer')
+        self.item = Items.objects.filter(withdrawn=0).order_by('itemnumber')[0]
+        Items.objects.filter(itemnumber=self.item.itemnumber).update(barcode='lib-lower1')
+
+    def test_read_barcodes_skips_header(self):
+        lines = [b'Barcode;Title\r\n', b'\r\n', b'"LIB000001";A title\r\n', b'barcode\r\n']
+        self.assertEqual(list(read_barcodes(lines)), ['LIB000001', 'barcode'])
+
+    def test_import_reports_unmatched_barcodes(self):
+        """
+            This definition checks that a lowercase barcode is found and that the same barcode in another case
+            is only found on a backend comparing barcodes case-insensitively.
+        """
+        lines = [b'barcode,title\n', b'lib-lower1,A title\n', b'LIB-LOWER1\n', b'missing\n']
+        report = import_barcodes(self.user, get_items(), read_barcodes(lines))
+        unmatched = ['missing'] if folds_case(get_items()) else ['LIB-LOWER1', 'missing']
+        self.assertEqual(report, {'read': 3, 'found': 1, 'unmatched': len(unmatched), 'unmatched_barcodes': unmatched})
+
+
+class PrintJobTests(KohaTestCase):
+    """
+        A class representing the tests of the print jobs, see jobs.run_job(). The jobs are run in the test thread
+        and their labels rendered in it too, in a temporary PRINT_JOB_DIRECTORY.
+    """
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+        for name, value in (('PRINT_JOB_DIRECTORY', self.directory), ('PRINT_JOB_PROCESSES', 0),
+                            ('PRINT_JOB_THREADS', 0), ('PRINT_JOB_CHUNK_SIZE', 10)):
+            patcher = mock.patch.object(jobs, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        # The connections hold the transaction of the test, they are not closed at the end of the jobs
+        patcher = mock.patch.object(jobs.connections, 'close_all')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.user = User.objects.create_user('printer')
+        self.barcodes = list(Items.objects.filter(withdrawn=0).order_by('itemnumber')
+                             .values_list('barcode', flat=True)[:25])
+
+    def test_run_job(self):
+        job = jobs.submit_job(self.user, self.barcodes + ['', 'missing'], 'spine_data', 'pdf')
+        self.assertEqual((job.status, job.total), (PrintJob.QUEUED, 26))
+
+        self.assertTrue(jobs.run_job(job.pk))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.done, job.artifact, job.error),
+                         (PrintJob.DONE, 26, 'job-%d.pdf' % job.pk, ''))
+        self.assertIsNotNone(job.finished)
+        with open(jobs.job_path(job), 'rb') as file:
+            self.assertEqual(file.read(5), b'%PDF-')
+        self.assertEqual(os.listdir(self.directory), [job.artifact])
+
+        # A job already run is not run again
+        self.assertFalse(jobs.run_job(job.pk))
+
+    def test_progress(self):
+        """
+            This definition checks that the progress of a job is recorded chunk by chunk while it is rendered.
+        """
+        job = jobs.submit_job(self.user, self.barcodes, 'barcode_data', 'zpl')
+        progress = [PrintJob.objects.get(pk=job.pk).done for page in jobs.render_chunks(job)]
+        # The last label, left without its pair, is rendered after the last chunk
+        self.assertEqual(progress, [10, 20, 25, 25])
+
+    def test_failure(self):
+        """
+            This definition checks that a job failing while its labels are written is recorded as failed and
+            leaves no half written file.
+        """
+        job = jobs.submit_job(self.user, self.barcodes, 'spine_data', 'pdf')
+        with mock.patch.object(jobs, 'render_chunk', side_effect=RuntimeError('printer on fire')):
+            self.assertTrue(jobs.run_job(job.pk))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.artifact), (PrintJob.FAILED, ''))
+        self.assertIn('printer on fire', job.error)
+        self.assertIsNotNone(job.finished)
+        self.assertEqual(os.listdir(self.directory), [])
+
+    def test_failure_before_rendering(self):
+        job = jobs.submit_job(self.user, self.barcodes, 'spine_data', 'pdf')
+        with mock.patch.object(jobs.os, 'makedirs', side_effect=PermissionError('read-only')):
+            self.assertTrue(jobs.run_job(job.pk))
+        self.assertEqual(PrintJob.objects.get(pk=job.pk).status, PrintJob.FAILED)
+
+    def test_expire_jobs(self):
+        """
+            This definition checks that only the jobs finished and the job files written more than
+            PRINT_JOB_EXPIRY seconds ago are deleted.
+        """
+        old = timezone.now() - timedelta(seconds=jobs.PRINT_JOB_EXPIRY + 60)
+        expired = PrintJob.objects.create(user=self.user, layout='spine_data', output='pdf', barcodes='',
+                                          status=PrintJob.DONE, finished=old)
+        recent = PrintJob.objects.create(user=self.user, layout='spine_data', output='pdf', barcodes='',
+                                         status=PrintJob.FAILED, finished=timezone.now())
+        running = PrintJob.objects.create(user=self.user, layout='spine_data', output='pdf', barcodes='',
+                                          status=PrintJob.RUNNING, created=old)
+
+        for name in ('job-1.pdf', 'job-2.zpl.part', 'job-3.pdf', 'notes.txt'):
+            open(os.path.join(self.directory, name), 'w').close()
+        for name in ('job-1.pdf', 'job-2.zpl.part', 'notes.txt'):
+            os.utime(os.path.join(self.directory, name), (time.time(), old.timestamp()))
+
+        self.assertEqual(jobs.expire_jobs(), (1, 2))
+        self.assertEqual(set(PrintJob.objects.values_list('pk', flat=True)), {recent.pk, running.pk})
+        self.assertFalse(PrintJob.objects.filter(pk=expired.pk).exists())
+        self.assertEqual(sorted(os.listdir(self.directory)), ['job-3.pdf', 'notes.txt'])
+
+
+class SyncItemsTests(KohaTestCase):
+    """
+        A class representing the tests of the command sync_items, which mirrors the Koha Items locally.
+    """
+
+    def sync(self, *args):
+        call_command('sync_items', *args, chunk_size=300, stdout=StringIO())
+
+    def test_sync_changes_and_deletions(self):
+        self.sync()
+        self.assertEqual(ItemMirror.objects.count(), Items.objects.count())
+
+        changed, renamed, removed = Items.objects.order_by('itemnumber').select_related('biblionumber')[:3]
+        later = timezone.now() + timedelta(days=1)
+        Items.objects.filter(itemnumber=changed.itemnumber).update(barcode='CHANGED1', timestamp=later)
+        Biblio.objects.filter(biblionumber=renamed.biblionumber_id).update(title='Renamed title', timestamp=later)
+        Items.objects.filter(itemnumber=removed.itemnumber).delete()
+
+        with CaptureQueriesContext(connections['koha_db']) as queries:
+            self.sync()
+
+        self.assertEqual(ItemMirror.objects.get(itemnumber=changed.itemnumber).barcode, 'CHANGED1')
+        self.assertEqual(ItemMirror.objects.get(itemnumber=renamed.itemnumber).title, 'Renamed title')
+        self.assertFalse(ItemMirror.objects.filter(itemnumber=removed.itemnumber).exists())
+        self.assertEqual(ItemMirror.objects.count(), Items.objects.count())
+
+        # The changed Items are found without a condition on the timestamps of both tables at once
+        for query in queries.captured_queries:
+            sql = query['sql'].replace('`', '"')
+            self.assertFalse('"items"."timestamp" >=' in sql and '"biblio"."timestamp" >=' in sql, sql)
+
+
+class ReplicaTests(KohaTestCase):
+    """
+        A class representing the tests of the routing of the Koha reads to the replicas, see router.ReplicaSet.
+        Two SQLite replicas are declared for the tests: replica_up, the test Koha Database itself, and
+        replica_down, which cannot be opened.
+    """
+
+    def setUp(self):
+        if connections['koha_db'].vendor != 'sqlite':
+            self.skipTest("The replicas are SQLite Databases")
+
+        for alias, name in (('replica_up', connections['koha_db'].settings_dict['NAME']),
+                            ('replica_down', os.path.join(tempfile.gettempdir(), 'missing', 'replica.sqlite3'))):
+            connections.databases[alias] = {'ENGINE': 'django.db.backends.sqlite3', 'NAME': name}
+            connections.ensure_defaults(alias)
+            connections.prepare_test_settings(alias)
+            self.addCleanup(self.remove_alias, alias)
+
+        self.replicas = router.ReplicaSet(['replica_down', 'replica_up'], 30)
+        patcher = mock.patch.object(router, 'replicas', self.replicas)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        # replica_down looks the fastest, so it is chosen first
+        self.replicas.latency.update(replica_down=0.001, replica_up=0.5)
+
+    def remove_alias(self, alias):
+        connections[alias].close()
+        del connections.databases[alias]
+        if hasattr(connections._connections, alias):
+            delattr(connections._connections, alias)
+
+    def test_choose(self):
+        replicas = router.ReplicaSet(['a', 'b', 'c'], 30)
+        replicas.latency.update(a=0.3, b=0.1, c=0.2)
+        for _ in range(20):
+            self.assertIn(replicas.choose(), ('b', 'c'))
+        self.assertEqual(replicas.choose(exclude=['b']), 'c')
+
+        replicas.mark_down('c')
+        self.assertFalse(replicas.is_up('c'))
+        self.assertEqual(replicas.choose(exclude=['b']), 'a')
+        self.assertIsNone(replicas.choose(exclude=['a', 'b']))
+
+        # A replica is tried again once KOHA_REPLICA_RETRY seconds have passed
+        with mock.patch.object(router.time, 'monotonic', return_value=router.time.monotonic() + 31):
+            self.assertTrue(replicas.is_up('c'))
+
+    def test_failover(self):
+        """
+            This definition checks that a replica which cannot be connected to is left out and the read is
+            routed to the other one.
+        """
+        self.assertEqual(router.KohaRouter().db_for_read(Items), 'replica_up')
+        self.assertFalse(self.replicas.is_up('replica_down'))
+        self.assertEqual(Items.objects.all().db, 'replica_up')
+        self.assertEqual(Items.objects.count(), Items.objects.using('koha_db').count())
+
+    def test_fallback_to_koha_db(self):
+        self.replicas.mark_down('replica_up')
+        self.assertEqual(router.KohaRouter().db_for_read(Items), 'koha_db')
+        self.assertEqual(router.KohaRouter().db_for_read(User), 'default')
+
+    def test_query_error_marks_down(self):
+        """
+            This definition checks that a replica failing once connected is left out of the next reads.
+        """
+        def execute(sql, params, many, context):
+            raise OperationalError('server has gone away')
+
+        context = {'connection': connections['replica_up'], 'cursor': None}
+        with self.assertRaises(OperationalError):
+            self.replicas(execute, 'SELECT 1', None, False, context)
+        self.assertFalse(self.replicas.is_up('replica_up'))
+        self.assertEqual(router.KohaRouter().db_for_read(Items), 'koha_db')
+
+
+class ConnectionPoolTests(SimpleTestCase):
+    """
+        A class representing the tests of the pool of connections, see backends.pool, with fake connections and
+        with the pooled SQLite engine on a temporary file.
+    """
+
+    def setUp(self):
+        self.opened, self.closed = [], []
+
+    def connect(self):
+        connection = mock.Mock()
+        connection.close.side_effect = lambda: self.closed.append(connection)
+        self.opened.append(connection)
+        return connection
+
+    def pool(self, **options):
+        return pool.ConnectionPool('test', dict(pool.POOL_DEFAULTS, **options))
+
+    def test_size_and_timeout(self):
+        connections_pool = self.pool(SIZE=2, TIMEOUT=0.05)
+        first = connections_pool.acquire(self.connect, None)
+        connections_pool.acquire(self.connect, None)
+        with self.assertRaises(OperationalError):
+            connections_pool.acquire(self.connect, None)
+
+        connections_pool.release(*first[:2])
+        connection, created, reused = connections_pool.acquire(self.connect, None)
+        self.assertEqual((connection, reused, len(self.opened)), (first[0], True, 2))
+
+    def test_lifetime(self):
+        connections_pool = self.pool(MAX_LIFETIME=60)
+        connection, created, reused = connections_pool.acquire(self.connect, None)
+        connections_pool.release(connection, created)
+
+        with mock.patch.object(pool.time, 'monotonic', return_value=created + 61):
+            renewed, created, reused = connections_pool.acquire(self.connect, None)
+        self.assertFalse(reused)
+        self.assertIsNot(renewed, connection)
+        self.assertEqual(self.closed, [connection])
+
+    def test_health_check(self):
+        """
+            This definition checks that a connection idle for PING_AFTER seconds is checked before it is reused,
+            and closed if the check fails.
+        """
+        connections_pool = self.pool(PING_AFTER=30)
+        ping = mock.Mock(return_value=False)
+        connection, created, reused = connections_pool.acquire(self.connect, ping)
+        connections_pool.release(connection, created)
+        self.assertEqual(connections_pool.acquire(self.connect, ping)[0], connection)
+        ping.assert_not_called()
+
+        connections_pool.release(connection, created)
+        with mock.patch.object(pool.time, 'monotonic', return_value=time.monotonic() + 31):
+            renewed = connections_pool.acquire(self.connect, ping)[0]
+        ping.assert_called_once_with(connection)
+        self.assertIsNot(renewed, connection)
+        self.assertEqual(self.closed, [connection])
+
+    def test_unclean_connection_is_not_reused(self):
+        connections_pool = self.pool()
+        connection, created, reused = connections_pool.acquire(self.connect, None)
+        connections_pool.release(connection, created, reusable=False)
+        self.assertEqual(self.closed, [connection])
+        self.assertFalse(connections_pool.acquire(self.connect, None)[2])
+
+    def wrapper(self, name):
+        """
+            This definition returns a connection of the pooled SQLite engine, as Django would create it.
+
+            :param name: *The path of the SQLite Database*
+
+            :return: *A DatabaseWrapper*
+
+        """
+        settings_dict = {'ENGINE': 'barcode.backends.sqlite3', 'NAME': name, 'POOL': {'SIZE': 1, 'TIMEOUT': 1},
+                         'ATOMIC_REQUESTS': False, 'AUTOCOMMIT': True, 'CONN_MAX_AGE': 0, 'OPTIONS': {},
+                         'TIME_ZONE': None, 'USER': '', 'PASSWORD': '', 'HOST': '', 'PORT': '', 'TEST': {}}
+        return PooledSQLiteWrapper(settings_dict, alias='pool_test')
+
+    def test_reused_connection_restores_autocommit(self):
+        """
+            This definition checks that a reused connection leaving autocommit and back commits its transaction
+            instead of being given back to the pool with the transaction open.
+        """
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        self.addCleanup(self.remove_pool)
+        name = os.path.join(directory, 'pool.sqlite3')
+
+        first = self.wrapper(name)
+        with first.cursor() as cursor:
+            cursor.execute('CREATE TABLE labels (barcode TEXT)')
+        connection = first.connection
+        first.close()
+
+        second = self.wrapper(name)
+        second.ensure_connection()
+        self.assertTrue(second.pool_reused)
+        self.assertIs(second.connection, connection)
+
+        second.set_autocommit(False)
+        with second.cursor() as cursor:
+            cursor.execute("INSERT INTO labels VALUES ('LIB000001')")
+        second.set_autocommit(True)
+        self.assertFalse(second.connection.in_transaction)
+        second.close()
+
+        reader = sqlite3.connect(name)
+        self.addCleanup(reader.close)
+        self.assertEqual(reader.execute('SELECT barcode FROM labels').fetchall(), [('LIB000001',)])
+
+    def remove_pool(self):
+        connections_pool = pool._pools.pop('pool_test', None)
+        if connections_pool is not None:
+            connections_pool.clear()
+
+
+class BasketPageTests(KohaTestCase):
+    """
+        A class representing the tests of the pages of the print basket read by the DataTables grid, see
+        views.basketItems().
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user('reader')
+        self.client.force_login(self.user)
+
+        # Two searches, the second one listed first, whose Items share the time they were added at
+        items = list(get_items().order_by('barcode')[:50])
+        added = timezone.now()
+        add_to_basket(self.user, items[:30], added - timedelta(minutes=1))
+        add_to_basket(self.user, items[30:], added)
+        self.expected = [item.barcode for item in items[30:] + items[:30]]
+
+    def page(self, **params):
+        response = self.client.get(reverse('basket'), params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_after_pages(self):
+        """
+            This definition checks that the pages read after the key of the previous page are those read with
+            offsets, across the searches of the basket.
+        """
+        barcodes, after = [], None
+        for start in range(0, 50, 15):
+            params = {'draw': 1, 'start': start, 'length': 15}
+            offset = self.page(**params)
+            if after:
+                params['after'] = after
+            keyset = self.page(**params)
+            self.assertEqual(keyset['data'], offset['data'])
+            self.assertEqual((keyset['recordsTotal'], keyset['last']), (50, offset['last']))
+            barcodes.extend(row['barcode'] for row in keyset['data'])
+            after = keyset['last']
+
+        self.assertEqual(barcodes, self.expected)
+        self.assertEqual(self.page(start=50, length=15, after=after)['data'], [])
+
+    def test_invalid_after(self):
+        response = self.client.get(reverse('basket'), {'start': 15, 'length': 15, 'after': 'yesterday,1'})
+        self.assertEqual(response.status_code, 400)
+
+
+class LabelItemTests(KohaTestCase):
+    """
+        A class representing the tests of the querysets of LabelItem objects, see items.label_items().
+    """
+
+    def test_chaining_keeps_label_items(self):
+        first, last = self.fixture['numeric']
+        items = label_items(Items.objects.filter(withdrawn=0))
+        chained = items.filter(numeric_range_filter(str(first), str(first + 99))).order_by('-barcode')
+
+        page = list(chained[10:20])
+        self.assertEqual(len(page), 10)
+        self.assertTrue(all(isinstance(item, LabelItem) for item in page))
+        self.assertEqual([item.barcode for item in page], sorted((item.barcode for item in page), reverse=True))
+        self.assertIsInstance(chained.first(), LabelItem)
+        self.assertIsInstance(next(chained.iterator()), LabelItem)
+        self.assertEqual(chained.count(), Items.objects.filter(withdrawn=0, barcode__in=[
+            str(number) for number in range(first, first + 100)]).count())
+
+        item = page[0]
+        expected = Items.objects.select_related('biblionumber').get(itemnumber=item.itemnumber)
+        self.assertEqual((item.barcode, item.biblionumber_id, item.biblionumber.title, item.timestamp),
+                         (expected.barcode, expected.biblionumber_id, expected.biblionumber.title, expected.timestamp))
+
+        # The values of the Items are still read as values
+        self.assertEqual(list(chained.values_list('barcode', flat=True)[:1]), [chained.first().barcode])
+
+
+class CallNumberTests(SimpleTestCase):
+    """
+        A class representing the golden tests of the call numbers: their parts printed on the spine labels and
+        their sort keys, which must stay those Koha stores in items.cn_sort.
+    """
+
+    # Call numbers as typed in Koha, with their class part, author mark and sort key
+    CORPUS = (
+        ('823.914 ROW', '823.914', 'ROW', '823_914000000000000_ROW'),
+        ('823.914ROW', '823.914', 'ROW', '823_000000000000000_914ROW'),
+        ('823.914ROWLING', '823.914ROWL', 'ING', '823_000000000000000_914ROWLING'),
+        ('823PETERS2', '823PET', 'ERS2', '823PETERS2'),
+        ('005.133 PYT', '005.133', 'PYT', '005_133000000000000_PYT'),
+        ('005.133 KNU v.2', '005.133 KNU', 'v.2', '005_133000000000000_KNU_V_2'),
+        ('510 RAM', '510', 'RAM', '510_000000000000000_RAM'),
+        ('FIC TAG', 'FIC', 'TAG', 'FIC_TAG'),
+        ('FIC823 NAR', 'FIC823', 'NAR', 'FIC_823_000000000000000_NAR'),
+        ('R 030 BRI', 'R 030', 'BRI', 'R_030_000000000000000_BRI'),
+        ('954.02', '954.02', '', '954_020000000000000'),
+        ('954.02 ', '954.02', '', '954_020000000000000'),
+        ('  891.44 TAG  ', '891.44', 'TAG', '891_440000000000000_TAG'),
+        ('370.954 K96', '370.954', 'K96', '370_954000000000000_K96'),
+        ('658.4/012 DRU', '658.4/012', 'DRU', '658_401200000000000_DRU'),
+        ('Ref 423 OXF 2010', 'Ref 423 OXF 2010', '', 'REF_423_OXF_201000000000000'),
+        ('808.81', '808.81', '', '808_810000000000000'),
+        ('QA76.73 .P98', 'QA76.73 .P98', '', 'QA_76_730000000000000__P98'),
+        ('338.9 SEN c.2', '338.9 SEN', 'c.2', '338_900000000000000_SEN_C_2'),
+        ('823.912 Orw', '823.912', 'Orw', '823_912000000000000_ORW'),
+        ('THESIS 620 SHA', 'THESIS 620', 'SHA', 'THESIS_620_000000000000000_SHA'),
+        ('780.92 BEE/V', '780.92', 'BEE/V', '780_920000000000000_BEEV'),
+        ('330.1 SMI 1776', '330.1 SMI 1776', '', '330_100000000000000_SMI_1776'),
+        (None, '', '', ''),
+        ('', '', '', ''),
+        ('  ', '', '', ''),
+    )
+
+    def test_parse_callnumber(self):
+        for itemcallnumber, callnumber, author_mark, sort_key in self.CORPUS:
+            with self.subTest(itemcallnumber=itemcallnumber):
+                parsed = parse_callnumber(itemcallnumber)
+                self.assertEqual((parsed.callnumber, parsed.author_mark), (callnumber, author_mark))
+
+    def test_callnumber_sort_key(self):
+        for itemcallnumber, callnumber, author_mark, sort_key in self.CORPUS:
+            with self.subTest(itemcallnumber=itemcallnumber):
+                self.assertEqual(callnumber_sort_key(itemcallnumber), sort_key)
+
+    def test_sort_keys_follow_shelf_order(self):
+        shelf = ['005.133 PYT', '510 RAM', '823.912 Orw', '823.914 ROW', '891.44 TAG', '954.02']
+        self.assertEqual(sorted(shelf, key=callnumber_sort_key), shelf)
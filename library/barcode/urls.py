@@ -4,5 +4,19 @@ from . import views
 
 urlpatterns = [
     path('', views.index, name='index'),
-    path('barcode/api/fonts/encode/base64', views.encodeFont, name='encode')
+    path('barcode/api/items', views.searchItems, name='items'),
+    path('barcode/api/items/count', views.countItems, name='items_count'),
+    path('barcode/api/items/lookup', views.lookupItems, name='items_lookup'),
+    path('barcode/api/basket', views.basketItems, name='basket'),
+    path('barcode/api/basket/import', views.importBarcodes, name='basket_import'),
+    path('barcode/api/basket/<str:action>', views.updateBasket, name='basket_update'),
+    path('barcode/api/fonts/encode/base64', views.encodeFont, name='encode'),
+    path('barcode/api/fonts/bundle', views.fontBundle, name='fonts'),
+    path('barcode/api/labels/<str:output>', views.printLabels, name='labels'),
+    path('barcode/api/export/<str:output>', views.exportItems, name='export'),
+    path('barcode/api/jobs/<int:job>', views.printJob, name='job'),
+    path('barcode/api/jobs/<int:job>/download', views.downloadJob, name='job_download'),
+    path('barcode/api/jobs/<str:output>', views.submitJob, name='jobs'),
+    path('barcode/api/barcodes/<path:value>.svg', views.barcodeSvg, name='barcode_svg'),
+    path('barcode/api/metrics', views.metrics, name='metrics')
 ]
\ No newline at end of file
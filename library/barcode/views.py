@@ -1,12 +1,76 @@
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.contrib.staticfiles.templatetags.staticfiles import static
-from django.shortcuts import render, HttpResponse
-from django.db.models.functions import Cast
-from django.db.models import IntegerField
-import xml.etree.ElementTree as ET
+from django.shortcuts import get_object_or_404, render, HttpResponse
+from django.urls import reverse
+from django.http import FileResponse, Http404, HttpResponseBadRequest, JsonResponse, StreamingHttpResponse
+from django.db.models import Q
+from django.views.decorators.http import etag
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 from django.conf import settings
-from .models import Items, BiblioMetadata
-import base64, os, re
+from .accessions import accession_filter, accession_pages
+from .basket import add_to_basket, after_basket, basket_barcodes, basket_items, remove_from_basket
+from .code39 import code39_svg
+from .exports import EXPORT_FORMATS
+from .fonts import encoded_font, font_bundle
+from .imports import import_barcodes, read_barcodes
+from .items import count_items, get_items, get_labels
+from .jobs import PRINT_JOB_THRESHOLD, job_path, submit_job
+from .labels import LABEL_LAYOUTS, render_labels
+from .lookups import lookup_barcodes, lookup_range
+from .metrics import BARCODE_METRICS, store, timed
+from .models import PrintJob
+from .printers import PRINTER_LANGUAGES, print_labels
+from .ranges import BARCODE_BATCH_SIZE, barcode_list, batched, range_filter
+from .sheets import LABEL_SHEETS, render_sheets
+from .shelves import after_shelf, shelf_filter, shelf_labels, shelf_pages
+
+
+# Maximum number of rows of a page of the DataTables grid
+SEARCH_PAGE_SIZE = 1000
+
+
+def label_row(label):
+    """
+        This definition converts a label into a row of the DataTables grid.
+
+        :param label: *A label, e.g. a LabelRecord or an ItemMirror*
+
+        :return: *A dictionary with the columns of the grid*
+
+    """
+    return {
+        'barcode': label.barcode,
+        'title': label.title,
+        'author': label.author,
+        'callNum': label.callnumber,
+        'authorMark': label.author_mark,
+    }
+
+
+def search_filter(params):
+    """
+        This definition builds the filter of a search from the parameters of the form: a single barcode, a range
+        of barcodes, a span of call numbers or a batch of accessions.
+
+        :param params: *The parameters of the request, e.g. request.GET*
+
+        :return: *A tuple (query, shelf) of the filter on the Items, None if the parameters are missing or
+                 invalid, and whether the Items are read in shelf order*
+
+    """
+    if params.get('barcode_num'):
+        return Q(barcode=params['barcode_num']), False
+    if params.get('barcode_start') and params.get('barcode_end'):
+        return range_filter(params['barcode_start'], params['barcode_end']), False
+    if params.get('cn_start') and params.get('cn_end'):
+        return shelf_filter(params['cn_start'], params['cn_end'], params.get('location', ''),
+                            params.get('homebranch', '')), True
+    if params.get('accessioned_from'):
+        return accession_filter(params['accessioned_from'], params.get('accessioned_to', ''),
+                                params.get('homebranch', ''), params.get('itype', ''), params.get('location', '')), False
+    return None, False
+
 
 # Create your views here.
 @login_required
@@ -14,10 +78,14 @@ def index(request):
     """
         This definition handles the POST request from the HTML Form. If the form parameters are correct, 
         then a query is made to the **Koha Database** based on whether it is a single query or a range of 
-        queries. The retrieved data is wrapped in a dictionary "context" and request is rendered back. 
+        queries, or on the barcodes of an uploaded file, a span of call numbers or a batch of accessions.
+        The retrieved data is appended to the print basket of the user, shown by the Table through
+        basketItems(), and the number of Items found is rendered back in the dictionary "context".
         It requires the user to be logged in.
 
-        :param request: *A POST request from the HTML Form*
+        :param request: *A POST request from the HTML Form, with barcode_num, barcode_start and barcode_end,
+                        the file barcode_file, cn_start and cn_end or accessioned_from and optionally accessioned_to
+                        and itype, with optionally location and homebranch for the last two*
 
         :return: `render() <https://docs.djangoproject.com/en/2.2/topics/http/shortcuts/#django.shortcuts.render>`_ - *A function with request, redirection to the only template and context data*
 
@@ -30,71 +98,551 @@ def index(request):
     if request.method == "POST":
 
         data = None
+        context['searched'] = True
+        context['found'] = 0
+
+        items = get_items()
 
-        #Check if the request was for a single barcode
-        if request.POST['barcode_num']:
+        #Check if a file of barcodes, e.g. the dump of a handheld scanner, was uploaded
+        if request.FILES.get('barcode_file'):
+            #Append the Items of every barcode of the file to the print basket of the user, resolved in batches.
+            report = import_barcodes(request.user, items, read_barcodes(request.FILES['barcode_file']))
+            context['found'] = report['found']
+            context['import_report'] = report
+
+        #Else, check if the request was for a single barcode
+        elif request.POST['barcode_num']:
             #Get data from the Koha database where barcode value matches the requested value.
-            data = Items.objects.filter(barcode=request.POST['barcode_num']).filter(withdrawn=0)
+            data = items.filter(barcode=request.POST['barcode_num'])
 
         #Else, check if the request was for a range of barcodes
         elif request.POST['barcode_start'] and request.POST['barcode_end']:
-            start = request.POST['barcode_start']
-            end = request.POST['barcode_end']
+            #Get data from the Koha database page by page, merged in the order of the range. The range is split
+            #into one string range per barcode width so that the barcode index is used.
+            data = lookup_range(items, request.POST['barcode_start'], request.POST['barcode_end'])
+
+        #Else, check if the request was for a span of call numbers, e.g. the shelves of a floor
+        elif request.POST.get('cn_start') and request.POST.get('cn_end'):
+            query = shelf_filter(request.POST['cn_start'], request.POST['cn_end'],
+                                 request.POST.get('location', ''), request.POST.get('homebranch', ''))
+
+            #Append the Items to the print basket of the user in shelf order, page by page.
+            if query is not None:
+                added = timezone.now()
+                for page in shelf_pages(items.filter(query)):
+                    context['found'] += len(page)
+                    add_to_basket(request.user, page, added)
+
+        #Else, check if the request was for a batch of accessions, e.g. the BOOKs of a branch since Monday
+        elif request.POST.get('accessioned_from'):
+            query = accession_filter(request.POST['accessioned_from'], request.POST.get('accessioned_to', ''),
+                                     request.POST.get('homebranch', ''), request.POST.get('itype', ''),
+                                     request.POST.get('location', ''))
+
+            #Append the Items to the print basket of the user in the order they were catalogued, page by page.
+            if query is not None:
+                added = timezone.now()
+                for page in accession_pages(items.filter(query)):
+                    context['found'] += len(page)
+                    add_to_basket(request.user, page, added)
+
+        #Append the Items found to the print basket of the user, the labels are resolved when they are shown.
+        if data:
+            context['found'] = len(data)
+            add_to_basket(request.user, data)
+
+    context['label_renderer'] = getattr(settings, 'LABEL_RENDERER', 'pdf')
+    context['print_job_threshold'] = PRINT_JOB_THRESHOLD
+    context['label_sheets'] = sorted(LABEL_SHEETS)
+
+    # The version of the fonts lets the browser keep them in its cache until they change
+    if context['label_renderer'] == 'browser':
+        context['font_version'] = font_bundle()[1]
+
+    with timed('render'):
+        return render(request, 'barcode/index.html', context)
+
+
+
+@login_required
+def basketItems(request):
+    """
+        This definition answers the server-side processing requests of the DataTables grid with one page of the
+        print basket of the user, the latest searches first. Pages are read with keyset pagination: when the
+        request gives the key of the last entry of the previous page in *after*, the page starts right after it
+        on the index of the basket instead of skipping *start* rows. It requires the user to be logged in.
+
+        :param request: *A GET request with the DataTables parameters (draw, start, length), length -1 for
+                        the whole basket, and optionally after*
+
+        :return: `JsonResponse <https://docs.djangoproject.com/en/2.2/ref/request-response/#jsonresponse-objects>`_ - *The page in the DataTables format with the key of its last entry: the time it was added at and its id separated by a comma*
+
+    """
+    try:
+        draw = int(request.GET.get('draw', 0))
+        start = max(0, int(request.GET.get('start', 0)))
+        length = int(request.GET.get('length', 25))
+    except ValueError:
+        return HttpResponseBadRequest()
+
+    basket = basket_items(request.user)
+    total = basket.count()
+
+    if request.GET.get('after'):
+        added, _, id = request.GET['after'].rpartition(',')
+        added = parse_datetime(added)
+        if added is None or not id.isdecimal():
+            return HttpResponseBadRequest()
+        page = basket.filter(after_basket(added, int(id)))
+        page = page if length < 0 else page[:length]
+    else:
+        page = basket[start:] if length < 0 else basket[start:start + length]
+
+    entries = list(page.values_list('id', 'added', 'barcode', named=True))
+    data = get_labels(barcode_list(get_items(), [entry.barcode for entry in entries]))
+    return JsonResponse({
+        'draw': draw,
+        'recordsTotal': total,
+        'recordsFiltered': total,
+        'data': [label_row(item.label) for item in data],
+        'last': '%s,%d' % (entries[-1].added.isoformat(), entries[-1].id) if entries else None,
+    })
+
+
+
+@login_required
+def updateBasket(request, action):
+    """
+        This definition adds barcodes to or removes barcodes from the print basket of the user. It requires the
+        user to be logged in.
+
+        :param request: *A POST request with the barcodes, or with all=1 to empty the basket* \n
+        :param action: *Either add or remove*
+
+        :return: `JsonResponse <https://docs.djangoproject.com/en/2.2/ref/request-response/#jsonresponse-objects>`_ - *The number of Items in the basket*
+
+    """
+    if request.method != "POST":
+        return HttpResponseBadRequest()
+
+    barcodes = request.POST.getlist('barcodes')
+    if action == 'add':
+        count = add_to_basket(request.user, barcode_list(get_items(), barcodes))
+    elif action == 'remove':
+        count = remove_from_basket(request.user, None if request.POST.get('all') else barcodes)
+    else:
+        raise Http404("Unknown basket action")
+
+    return JsonResponse({'count': count})
+
+
+
+@login_required
+def importBarcodes(request):
+    """
+        This definition appends the Items of the barcodes of an uploaded text or CSV file, e.g. the dump of a
+        handheld scanner, to the print basket of the user and reports the barcodes that were not found, i.e.
+        unknown or withdrawn. The file is read line by line and resolved in batches of BARCODE_BATCH_SIZE.
+        It requires the user to be logged in.
+
+        :param request: *A POST request with the file barcode_file*
+
+        :return: `JsonResponse <https://docs.djangoproject.com/en/2.2/ref/request-response/#jsonresponse-objects>`_ - *The report of the import, see imports.import_barcodes()*
+
+    """
+    if request.method != "POST" or not request.FILES.get('barcode_file'):
+        return HttpResponseBadRequest()
+
+    return JsonResponse(import_barcodes(request.user, get_items(), read_barcodes(request.FILES['barcode_file'])))
+
+
+
+@login_required
+def searchItems(request):
+    """
+        This definition answers the server-side processing requests of the DataTables grid with one page of the
+        Items matching a single barcode, a range of barcodes, a span of call numbers or a batch of accessions,
+        see search_filter(). The Items are ordered by
+        barcode, or in shelf order by (cn_sort, itemnumber) for a span of call numbers. Pages are read with keyset
+        pagination: when the request gives the key of the last Item of the previous page in *after*, the page
+        starts right after it on the index instead of skipping *start* rows. It requires the user to be logged in.
+
+        :param request: *A GET request with the form parameters, see search_filter(), and the DataTables
+                        parameters (draw, start, length, search[value]) and optionally after*
+
+        :return: `JsonResponse <https://docs.djangoproject.com/en/2.2/ref/request-response/#jsonresponse-objects>`_ - *The page in the DataTables format with the key of its last Item: its barcode, or its cn_sort and itemnumber separated by a comma in shelf order*
+
+    """
+    params = request.GET
+    query, shelf = search_filter(params)
+
+    try:
+        draw = int(params.get('draw', 0))
+        start = max(0, int(params.get('start', 0)))
+        length = min(max(1, int(params.get('length', 25))), SEARCH_PAGE_SIZE)
+    except ValueError:
+        return HttpResponseBadRequest()
+
+    if query is None:
+        return JsonResponse({'draw': draw, 'recordsTotal': 0, 'recordsFiltered': 0, 'data': [], 'last': None})
+
+    # The Items are counted without their Biblios
+    total = count_items(query)
+    if params.get('search[value]'):
+        query &= Q(barcode__startswith=params['search[value]'])
+        filtered = count_items(query)
+    else:
+        filtered = total
+
+    items = get_items().filter(query)
+
+    if shelf:
+        items = items.order_by('cn_sort', 'itemnumber')
+        if params.get('after'):
+            cn_sort, _, itemnumber = params['after'].rpartition(',')
+            if not itemnumber.isdecimal():
+                return HttpResponseBadRequest()
+            page = items.filter(after_shelf(cn_sort, int(itemnumber)))[:length]
+        else:
+            page = items[start:start + length]
+    else:
+        items = items.order_by('barcode')
+        if params.get('after'):
+            page = items.filter(barcode__gt=params['after'])[:length]
+        else:
+            page = items[start:start + length]
+
+    data = get_labels(list(page))
+    if not data:
+        last = None
+    elif shelf:
+        last = '%s,%d' % (data[-1].cn_sort, data[-1].itemnumber)
+    else:
+        last = data[-1].barcode
+
+    return JsonResponse({
+        'draw': draw,
+        'recordsTotal': total,
+        'recordsFiltered': filtered,
+        'data': [label_row(item.label) for item in data],
+        'last': last,
+    })
+
+
+
+@login_required
+def lookupItems(request):
+    """
+        This definition answers a search with every Item of a range of barcodes or of a list of barcodes at once,
+        e.g. to check a large range before printing it. The range is read page by page and the list in chunks, their
+        authors extracted from the MARC records concurrently in the threads of lookups.lookup_executor(), and the
+        Items are merged back in barcode order, see lookups.lookup_range(). It requires the user to be
+        logged in.
+
+        :param request: *A GET or POST request with barcode_start and barcode_end, or with barcodes*
+
+        :return: `JsonResponse <https://docs.djangoproject.com/en/2.2/ref/request-response/#jsonresponse-objects>`_ - *The Items in the DataTables format and their number as found*
+
+    """
+    params = request.POST if request.method == "POST" else request.GET
+
+    if params.get('barcode_start') and params.get('barcode_end'):
+        data = lookup_range(get_items(), params['barcode_start'], params['barcode_end'], labels=True)
+    elif params.getlist('barcodes'):
+        data = lookup_barcodes(get_items(), [barcode for barcode in params.getlist('barcodes') if barcode],
+                               labels=True)
+    else:
+        data = None
+
+    if data is None:
+        return HttpResponseBadRequest()
 
-            if start.isdecimal() and end.isdecimal():
-                #Get data from the Koha database where the barcode value lies within the requested range of values.
-                #The barcode values from the Koha table are first converted into integer fields and then data is retrieved.
-                data = Items.objects.annotate(barcode_int=Cast('barcode', IntegerField())).filter(barcode_int__range=(request.POST['barcode_start'], request.POST['barcode_end'])).filter(withdrawn=0)
+    return JsonResponse({
+        'found': len(data),
+        'data': [label_row(item.label) for item in data],
+    })
 
-            else:
-                match_from = re.compile("[^\W\d]+").search(start)
-                match_to = match = re.compile("[^\W\d]+").search(end)
 
-                if start[match_from.start():match_from.end()] == end[match_to.start():match_to.end()]:
-                    start_index = int(start[match_from.end():])
-                    end_index = int(end[match_to.end():])
-                    startCharCode = start[match_from.start():match_from.end()]
 
-                    data = Items.objects.filter(barcode=startCharCode + str(start_index)).filter(withdrawn=0)
+@login_required
+def countItems(request):
+    """
+        This definition counts the Items a search would find before they are read, e.g. to tell the size of a
+        batch of accessions before adding it to the print basket. It requires the user to be logged in.
 
-                    for i in range(start_index+1, end_index+1):
-                        data = data | Items.objects.filter(barcode=startCharCode+str(i)).filter(withdrawn=0)
-                        
+        :param request: *A GET request with the form parameters, see search_filter()*
 
-        if data and len(data) != 0:
-            data = list(data)
+        :return: `JsonResponse <https://docs.djangoproject.com/en/2.2/ref/request-response/#jsonresponse-objects>`_ - *The number of Items as count*
 
-            for val in data:
-                if not val.biblionumber.author:
-                    result = BiblioMetadata.objects.filter(biblionumber=val.biblionumber.biblionumber)
-                    root = ET.fromstring(result[0].metadata)
-                    for field in root.findall("{http://www.loc.gov/MARC21/slim}datafield"):
-                        sub = field.find("{http://www.loc.gov/MARC21/slim}subfield")
-                        if field.attrib['tag'] == '700':
-                            if sub.attrib['code'] == "a":
-                                val.biblionumber.author = sub.text
-                                if sub.text:
-                                    break
+    """
+    query, shelf = search_filter(request.GET)
+    if query is None:
+        return HttpResponseBadRequest()
+    return JsonResponse({'count': count_items(query)})
 
 
 
-            context['data'] = data
+@login_required
+def exportItems(request, output='csv'):
+    """
+        This definition exports Items as a CSV document or an XLSX workbook, e.g. for inventory reconciliation.
+        The Items of a search are read page by page with keyset queries, in shelf order for a span of call numbers
+        and else in the order they were catalogued, and without any search the print basket of the user is
+        exported in its order. The export is streamed back as the pages are read, so memory does not grow with
+        the number of Items. It requires the user to be logged in.
 
-        """--------------------------------------------------------------------------------------------"""
+        :param request: *A GET request with the form parameters, see search_filter(), or none for the basket* \n
+        :param output: *The format of the export: csv or xlsx*
 
-        # SELECT    ExtractValue((     SELECT metadata     FROM biblio_metadata     WHERE       biblionumber=420),       '//datafield[@tag="700"]/subfield[@code>="a"]') AS ITEM;
+        :return: `StreamingHttpResponse <https://docs.djangoproject.com/en/2.2/ref/request-response/#streaminghttpresponse-objects>`_ - *The CSV document or XLSX workbook*
 
+    """
+    if output not in EXPORT_FORMATS:
+        raise Http404("Unknown export format")
 
+    query, shelf = search_filter(request.GET)
+    if query is not None:
+        items = get_items().filter(query)
+        pages = shelf_pages(items) if shelf else accession_pages(items)
+    elif any(request.GET.values()):
+        return HttpResponseBadRequest()
+    else:
+        pages = (barcode_list(get_items(), batch, len(batch))
+                 for batch in batched(basket_barcodes(request.user), BARCODE_BATCH_SIZE))
 
-    return render(request, 'barcode/index.html', context)
+    writer, content_type = EXPORT_FORMATS[output]
+    response = StreamingHttpResponse(writer(pages), content_type=content_type)
+    response['Content-Disposition'] = 'attachment; filename="items.%s"' % output
+    return response
+
+
+
+@login_required
+def printLabels(request, output='pdf'):
+    """
+        This definition renders the barcode or spine labels of the selected rows of the Table, either as a PDF
+        document or as raw ZPL/EPL commands for thermal label printers, which is streamed back to the browser.
+        It requires the user to be logged in.
+
+        :param request: *A POST request with the type of labels (barcode_data or spine_data), optionally the
+                        sheet the labels are packed on (a4 or letter, see sheets.LABEL_SHEETS) and the barcodes,
+                        if none then the print basket of the user is printed. A span of call numbers (cn_start and
+                        cn_end with optionally location and homebranch) is printed instead in shelf order, read
+                        page by page while the labels are streamed* \n
+        :param output: *The format of the labels: pdf, zpl or epl*
+
+        :return: `StreamingHttpResponse <https://docs.djangoproject.com/en/2.2/ref/request-response/#streaminghttpresponse-objects>`_ - *The PDF document or printer commands*
+
+    """
+    if request.method != "POST" or request.POST.get('type') not in LABEL_LAYOUTS:
+        return HttpResponseBadRequest()
+    if output != 'pdf' and output not in PRINTER_LANGUAGES:
+        raise Http404("Unknown label format")
+
+    # Labels are packed on sheets only in PDF documents, the label printers print on rolls
+    sheet = request.POST.get('sheet', '') if output == 'pdf' else ''
+    if sheet and sheet not in LABEL_SHEETS:
+        return HttpResponseBadRequest()
+
+    if request.POST.get('cn_start') and request.POST.get('cn_end'):
+        query = shelf_filter(request.POST['cn_start'], request.POST['cn_end'],
+                             request.POST.get('location', ''), request.POST.get('homebranch', ''))
+        if query is None:
+            return HttpResponseBadRequest()
+        labels = shelf_labels(get_items().filter(query))
+    else:
+        # Without any barcode, the whole print basket of the user is printed
+        barcodes = request.POST.getlist('barcodes') or basket_barcodes(request.user)
+        data = get_labels(barcode_list(get_items(), barcodes))
+        labels = (item.label for item in data)
+    layout = request.POST['type']
+
+    if sheet:
+        response = StreamingHttpResponse(render_sheets(labels, layout, sheet), content_type='application/pdf')
+        response['Content-Disposition'] = 'inline; filename="%s.pdf"' % layout
+    elif output == 'pdf':
+        response = StreamingHttpResponse(render_labels(labels, layout), content_type='application/pdf')
+        response['Content-Disposition'] = 'inline; filename="%s.pdf"' % layout
+    else:
+        response = StreamingHttpResponse(print_labels(labels, layout, output), content_type='text/plain; charset=utf-8')
+        response['Content-Disposition'] = 'attachment; filename="%s.%s"' % (layout, output)
+    return response
+
+
+
+def job_state(job):
+    """
+        This definition describes the state of a print job to the browser.
+
+        :param job: *A PrintJob*
+
+        :return: *A dictionary with the id, status and progress of the job, and the URL of its labels when done*
+
+    """
+    return {
+        'id': job.pk,
+        'status': job.status,
+        'total': job.total,
+        'done': job.done,
+        'error': job.error,
+        'url': reverse('job_download', args=[job.pk]) if job.status == PrintJob.DONE else None,
+    }
+
+
+@login_required
+def submitJob(request, output='pdf'):
+    """
+        This definition queues a print job for a large batch of labels, which is rendered in the background
+        instead of within the request. It requires the user to be logged in.
+
+        :param request: *A POST request with the type of labels (barcode_data or spine_data), optionally the
+                        sheet the labels are packed on (a4 or letter, see sheets.LABEL_SHEETS) and the barcodes,
+                        if none then the print basket of the user is printed. A span of call numbers (cn_start and
+                        cn_end with optionally location and homebranch) is printed instead in shelf order, read
+                        page by page while the labels are streamed* \n
+        :param output: *The format of the labels: pdf, zpl or epl*
+
+        :return: `JsonResponse <https://docs.djangoproject.com/en/2.2/ref/request-response/#jsonresponse-objects>`_ - *The state of the job, see job_state()*
+
+    """
+    if request.method != "POST" or request.POST.get('type') not in LABEL_LAYOUTS:
+        return HttpResponseBadRequest()
+    if output != 'pdf' and output not in PRINTER_LANGUAGES:
+        raise Http404("Unknown label format")
+
+    # Labels are packed on sheets only in PDF documents, the label printers print on rolls
+    sheet = request.POST.get('sheet', '') if output == 'pdf' else ''
+    if sheet and sheet not in LABEL_SHEETS:
+        return HttpResponseBadRequest()
+
+    barcodes = request.POST.getlist('barcodes') or basket_barcodes(request.user)
+    job = submit_job(request.user, barcodes, request.POST['type'], output, sheet)
+    return JsonResponse(job_state(job), status=202)
+
+
+
+@login_required
+def printJob(request, job):
+    """
+        This definition reports the progress of a print job of the user. It requires the user to be logged in.
+
+        :param request: *A GET request* \n
+        :param job: *The id of the PrintJob*
+
+        :return: `JsonResponse <https://docs.djangoproject.com/en/2.2/ref/request-response/#jsonresponse-objects>`_ - *The state of the job, see job_state()*
+
+    """
+    return JsonResponse(job_state(get_object_or_404(PrintJob, pk=job, user=request.user)))
+
+
+
+@login_required
+def downloadJob(request, job):
+    """
+        This definition returns the labels rendered by a print job of the user. It requires the user to be
+        logged in.
+
+        :param request: *A GET request* \n
+        :param job: *The id of the PrintJob*
+
+        :return: `FileResponse <https://docs.djangoproject.com/en/2.2/ref/request-response/#fileresponse-objects>`_ - *The PDF document or printer commands*
+
+    """
+    job = get_object_or_404(PrintJob, pk=job, user=request.user, status=PrintJob.DONE)
+    try:
+        file = open(job_path(job), 'rb')
+    except OSError:
+        raise Http404("The labels of the job are no longer available")
+
+    filename = '%s.%s' % (job.layout, job.output)
+    if job.output == 'pdf':
+        return FileResponse(file, filename=filename, content_type='application/pdf')
+    return FileResponse(file, as_attachment=True, filename=filename, content_type='text/plain; charset=utf-8')
+
+
+
+@login_required
+def barcodeSvg(request, value):
+    """
+        This definition renders the Code 39 barcode of a value as an SVG image. It requires the user to be logged in.
+
+        :param request: *A GET request, optionally with the width and height of the image in pixels*
+        :param value: *The value to encode*
+
+        :return: `HttpResponse <https://docs.djangoproject.com/en/2.2/ref/request-response/#httpresponse-objects>`_ - *The SVG image*
+
+    """
+    try:
+        width = int(request.GET.get('width', 100))
+        height = int(request.GET.get('height', 20))
+        svg = code39_svg(value, width, height)
+    except ValueError:
+        return HttpResponseBadRequest()
+
+    response = HttpResponse(svg, content_type='image/svg+xml')
+    response['Cache-Control'] = 'private, max-age=86400'
+    return response
 
 
 
 @login_required
 def encodeFont(request):
+    """
+        This definition returns a font of LABEL_FONTS encoded to a Base64 string. It requires the user to be
+        logged in.
+
+        :param request: *A POST request with the path of the font in the field text*
+
+        :return: `HttpResponse <https://docs.djangoproject.com/en/2.2/ref/request-response/#httpresponse-objects>`_ - *The encoded font*
+
+        .. note:: The browser gets all the fonts at once and caches them from fontBundle().
+
+    """
     if request.method == "POST":
-        fileName = request.POST.get('text')
-        file = open(os.path.join(settings.STATICFILES_DIRS[0], fileName), 'rb')
-        file_content = file.read()
-        encode = base64.b64encode(file_content).decode('ascii')
+        try:
+            with timed('fonts'):
+                encode = encoded_font(request.POST.get('text'))
+        except (KeyError, OSError):
+            raise Http404("Font not found")
         return HttpResponse(repr(encode))
+    return HttpResponseBadRequest()
+
+
+
+@login_required
+@etag(lambda request: font_bundle()[1])
+def fontBundle(request):
+    """
+        This definition returns all the fonts of LABEL_FONTS encoded to Base64 strings in a single JSON document.
+        The document only changes with the fonts, so it is served with its ETag and may be cached by the browser
+        for a year. It requires the user to be logged in.
+
+        :param request: *A GET request*
+
+        :return: `HttpResponse <https://docs.djangoproject.com/en/2.2/ref/request-response/#httpresponse-objects>`_ - *The fonts by their file names*
+
+    """
+    with timed('fonts'):
+        content = font_bundle()[0]
+    response = HttpResponse(content, content_type='application/json')
+    response['Cache-Control'] = 'private, max-age=31536000, immutable'
+    return response
+
+
+
+@user_passes_test(lambda u: u.is_superuser)
+def metrics(request):
+    """
+        This definition returns the measures of the latest requests of this process aggregated by view: the
+        percentiles of their duration, of their queries and query time per database alias and of their timed
+        sections, and their slowest statements. It requires the user to be a superuser and BARCODE_METRICS
+        to be set.
+
+        :param request: *A GET request*
+
+        :return: `JsonResponse <https://docs.djangoproject.com/en/2.2/ref/request-response/#jsonresponse-objects>`_ - *The measures by view, see metrics.MetricsStore.report()*
+
+    """
+    if not BARCODE_METRICS:
+        raise Http404("Metrics are disabled")
+    return JsonResponse(store.report())
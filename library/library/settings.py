@@ -45,6 +45,7 @@ INSTALLED_APPS = [
 
 # Auto Generated MiddleWare
 MIDDLEWARE = [
+    'barcode.middleware.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -89,6 +90,9 @@ DATABASES = {
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
     },
 
+    # Set the ENGINE to 'barcode.backends.mysql' to reuse the connections to Koha across the requests from a pool
+    # of at most POOL['SIZE'] connections per process, see barcode/backends/pool.py. Keep CONN_MAX_AGE at 0 then,
+    # the connections are given back to the pool at the end of every request.
     'koha_db': {
         'ENGINE': 'django.db.backends.mysql',
         'USER': 'your_username',
@@ -96,6 +100,12 @@ DATABASES = {
         'NAME': 'your_database_name',
         'HOST': 'your_database_ip_address',
         'PORT': 'your_database_port_number',
+        'POOL': {
+            'SIZE': 10,
+            'MAX_LIFETIME': 3600,
+            'TIMEOUT': 10,
+            'PING_AFTER': 30,
+        },
     }
 }
 
@@ -149,3 +159,80 @@ LOGOUT_REDIRECT_URL = '/'
 
 # Root folder of all documentation
 DOCS_ROOT = os.path.join(BASE_DIR, 'barcode/docs/html')
+
+
+# Barcode App
+# Maximum number of barcodes or biblionumbers sent to the Koha Database in a single IN (...) query
+BARCODE_BATCH_SIZE = 1000
+
+# Width up to which numeric barcodes are zero-padded in Koha, e.g. 6 for 000123. Set 0 if they are not padded.
+BARCODE_PAD_WIDTH = 0
+
+# Extractor of the authors missing in biblio, either 'python' (parses MARCXML) or 'sql' (MySQL ExtractValue)
+AUTHOR_EXTRACTOR = 'python'
+
+# Maximum number of resolved labels cached in the default Database. Set 0 to disable the label cache.
+LABEL_CACHE_SIZE = 100000
+
+# Answer the searches from the local mirror of the Koha Items, kept up to date with "python manage.py sync_items"
+KOHA_MIRROR = False
+
+# How the labels are printed: 'pdf' (PDF built by the Barcode App), 'browser' (PDF built by pdfMake)
+# or 'zpl'/'epl' (raw commands for Zebra thermal printers, see PRINTER_DPI)
+LABEL_RENDERER = 'pdf'
+
+# Maximum number of rendered Code 39 barcodes kept in memory
+BARCODE_CACHE_SIZE = 4096
+
+# Resolution of the thermal label printers in dots per inch, for the 'zpl' and 'epl' label renderers
+PRINTER_DPI = 203
+
+# Print jobs, which render large batches of labels in the background and leave them in PRINT_JOB_DIRECTORY.
+# PRINT_JOB_THREADS jobs are run at once by the web server, set 0 to run them with "python manage.py run_print_jobs".
+# Their labels are rendered by PRINT_JOB_PROCESSES processes, set 0 to render them in the job thread.
+PRINT_JOB_DIRECTORY = os.path.join(BASE_DIR, 'print_jobs')
+PRINT_JOB_THREADS = 1
+PRINT_JOB_PROCESSES = os.cpu_count() or 1
+
+# Seconds the finished print jobs and their labels are kept before they are deleted
+PRINT_JOB_EXPIRY = 7 * 24 * 3600
+
+# Number of labels in the print basket from which it is printed by a print job instead of a single request
+PRINT_JOB_THRESHOLD = 5000
+
+# Maximum number of parsed call numbers kept in memory
+CALLNUMBER_CACHE_SIZE = 10000
+
+# Label templates and sheets (e.g. A4, Letter) the 'pdf' label renderer can pack many labels per page on,
+# see barcode/sheets.py for their defaults and format
+# LABEL_TEMPLATES = {...}
+# LABEL_SHEETS = {...}
+
+# Aliases of read replicas of the Koha Database, declared in DATABASES like 'koha_db'. The reads of the Koha
+# tables are spread across them by their latency and fall back to 'koha_db' when none can be connected to.
+KOHA_REPLICAS = []
+
+# Seconds a replica is left out after a connection error before it is tried again
+KOHA_REPLICA_RETRY = 30
+
+# Measure the queries and timings of every request, sent back in Server-Timing headers and aggregated by view
+# at barcode/api/metrics for superusers. Disabled, the measuring middleware is left out altogether.
+BARCODE_METRICS = False
+
+# Number of latest requests per view the percentiles of the metrics are computed over
+METRICS_SAMPLES = 1000
+
+# Number of Items read per query when a span of call numbers is walked in shelf order, by (cn_sort, itemnumber)
+SHELF_PAGE_SIZE = 1000
+
+# Number of Items read per query when a batch of accessions is added to the print basket
+ACCESSION_PAGE_SIZE = 1000
+
+# Concurrent lookups of large ranges and lists of barcodes: they are split into chunks of KOHA_LOOKUP_CHUNK_SIZE
+# barcodes looked up by KOHA_LOOKUP_THREADS threads shared by every request, at most KOHA_LOOKUP_REQUEST_THREADS
+# of them for a single request. Set KOHA_LOOKUP_THREADS to 0 to look the chunks up in the request thread.
+# A lookup makes at most KOHA_LOOKUP_MAX_CHUNKS chunks, larger lookups get larger chunks.
+KOHA_LOOKUP_THREADS = 4
+KOHA_LOOKUP_REQUEST_THREADS = 4
+KOHA_LOOKUP_CHUNK_SIZE = 1000
+KOHA_LOOKUP_MAX_CHUNKS = 100